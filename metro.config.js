@@ -1,3 +1,4 @@
+const path = require('path');
 const { getDefaultConfig, mergeConfig } = require('@react-native/metro-config');
 
 /**
@@ -10,7 +11,16 @@ const extraNodeModules = {
   stream: require.resolve('stream-browserify'),
   'readable-stream': require.resolve('readable-stream'),
 };
+// 由 scripts/metro_cache.py 管理的项目级转换缓存目录，未设置时使用 Metro 默认的临时目录
+const cacheStores = process.env.METRO_CACHE_DIR
+  ? [new (require('metro-cache').FileStore)({ root: process.env.METRO_CACHE_DIR })]
+  : undefined;
+// scripts/ 的缓存目录（Metro 转换缓存、node_modules 快照等）不是源码，不让 Metro 扫描与监听
+const escapeRegExp = value => value.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+const buildCacheDir = new RegExp(`^${escapeRegExp(path.join(__dirname, '.build-cache'))}[/\\\\]`);
+const defaultConfig = getDefaultConfig(__dirname);
 const config = {
+  ...(cacheStores ? { cacheStores } : {}),
   transformer: {
     getTransformOptions: async () => ({
       transform: {
@@ -24,6 +34,7 @@ const config = {
   },
   resolver: {
     sourceExts: ['js', 'ts', 'tsx', 'svg', 'json'],
+    blockList: [].concat(defaultConfig.resolver.blockList ?? [], buildCacheDir),
     extraNodeModules: {
       ...extraNodeModules,
       'react-native-url-polyfill': require.resolve('react-native-url-polyfill'),
@@ -31,4 +42,4 @@ const config = {
   },
 };
 
-module.exports = mergeConfig(getDefaultConfig(__dirname), config);
+module.exports = mergeConfig(defaultConfig, config);
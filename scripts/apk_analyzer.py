@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+APK 体积构成分析
+按类别（dex、各 ABI 原生库、res、assets、JS Bundle、Hermes 字节码）统计压缩/未压缩字节，
+并与上一次构建的报告对比，超出增长预算时返回失败
+
+使用方法:
+    python scripts/apk_analyzer.py APK [APK ...] [--baseline PATH] [--budget 200KB|5%] [--json PATH]
+
+参数:
+    --baseline  上一次构建的 JSON 报告
+    --budget    单个 APK 压缩后体积允许的最大增长，支持 KB/MB 或百分比
+    --json      将本次报告写入指定路径
+"""
+
+import re
+import sys
+import json
+import argparse
+import zipfile
+from pathlib import Path
+
+from toolchain import parse_size
+
+# Hermes 字节码文件头
+HERMES_MAGIC = bytes.fromhex('c61fbc03c103191f')
+
+# 输出文件名中的时间戳后缀，如 app-arm64-v8a-release-2025-01-01_12-00-00
+TIMESTAMP_SUFFIX = re.compile(r'-\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}$')
+
+CATEGORIES = ['dex', 'js-bundle', 'hermes-bytecode', 'res', 'assets', 'other']
+
+
+def apk_key(apk_path: Path) -> str:
+    """去掉时间戳后的 APK 名称，用于跨构建对比"""
+    return TIMESTAMP_SUFFIX.sub('', apk_path.stem)
+
+
+def classify_entry(zipf: zipfile.ZipFile, info: zipfile.ZipInfo) -> str:
+    """判断 APK 内单个条目的类别"""
+    name = info.filename
+    if name.endswith('.dex'):
+        return 'dex'
+    if name.startswith('lib/'):
+        parts = name.split('/')
+        return f'lib/{parts[1]}' if len(parts) > 2 else 'other'
+    if name.startswith('assets/') and name.endswith('.bundle'):
+        with zipf.open(info) as f:
+            header = f.read(len(HERMES_MAGIC))
+        return 'hermes-bytecode' if header == HERMES_MAGIC else 'js-bundle'
+    if name.startswith('res/') or name == 'resources.arsc':
+        return 'res'
+    if name.startswith('assets/'):
+        return 'assets'
+    return 'other'
+
+
+def analyze_apk(apk_path: Path) -> dict:
+    """统计单个 APK 各类别的压缩/未压缩字节"""
+    categories = {}
+    with zipfile.ZipFile(apk_path) as zipf:
+        for info in zipf.infolist():
+            if info.is_dir():
+                continue
+            category = classify_entry(zipf, info)
+            entry = categories.setdefault(category, {'compressed': 0, 'uncompressed': 0, 'files': 0})
+            entry['compressed'] += info.compress_size
+            entry['uncompressed'] += info.file_size
+            entry['files'] += 1
+
+    return {
+        'file_size': apk_path.stat().st_size,
+        'compressed': sum(c['compressed'] for c in categories.values()),
+        'uncompressed': sum(c['uncompressed'] for c in categories.values()),
+        'categories': dict(sorted(categories.items())),
+    }
+
+
+def build_report(apk_files: list[Path]) -> dict:
+    """分析全部 APK"""
+    return {apk_key(apk): analyze_apk(apk) for apk in sorted(apk_files)}
+
+
+def parse_budget(budget: str) -> tuple[str, float]:
+    """解析增长预算，返回 ('bytes' | 'percent', 数值)；格式错误时抛出 ValueError"""
+    value = budget.strip()
+    try:
+        kind, limit = ('percent', float(value[:-1])) if value.endswith('%') else ('bytes', parse_size(value))
+    except ValueError:
+        raise ValueError(f'无效的体积预算: {budget}（应为 200KB、1MB 或 5% 等）') from None
+    if limit < 0:
+        raise ValueError(f'体积预算不能为负数: {budget}')
+    return kind, limit
+
+
+def budget_arg(value: str) -> str:
+    """argparse 的 type：在开始构建前校验预算格式"""
+    try:
+        parse_budget(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def format_bytes(size: float) -> str:
+    """格式化字节数（带符号）"""
+    sign = '-' if size < 0 else ''
+    size = abs(size)
+    if size >= 1024 * 1024:
+        return f'{sign}{size / (1024 * 1024):.2f} MB'
+    return f'{sign}{size / 1024:.1f} KB'
+
+
+def print_report(report: dict, baseline: dict | None = None):
+    """输出各 APK 的类别明细及与上一次构建的差异"""
+    baseline = baseline or {}
+    for key, apk in report.items():
+        previous = baseline.get(key)
+        print(f'\n📦 {key}: {format_bytes(apk["file_size"])}'
+              f' (解压后 {format_bytes(apk["uncompressed"])})')
+        print(f'  {"类别":<20}{"压缩":>12}{"解压后":>12}{"变化":>14}')
+        for category, sizes in apk['categories'].items():
+            line = f'  {category:<20}{format_bytes(sizes["compressed"]):>12}{format_bytes(sizes["uncompressed"]):>12}'
+            if previous:
+                old = previous['categories'].get(category, {}).get('compressed', 0)
+                delta = sizes['compressed'] - old
+                if delta:
+                    line += f'{("+" if delta > 0 else "") + format_bytes(delta):>14}'
+            print(line)
+        if previous:
+            delta = apk['file_size'] - previous['file_size']
+            print(f'  总变化: {("+" if delta > 0 else "") + format_bytes(delta)}')
+
+
+def check_budget(report: dict, baseline: dict, budget: str) -> list[str]:
+    """检查每个 APK 的增长是否超出预算，返回超限说明"""
+    kind, limit = parse_budget(budget)
+    violations = []
+    for key, apk in report.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        growth = apk['file_size'] - previous['file_size']
+        allowed = previous['file_size'] * limit / 100 if kind == 'percent' else limit
+        if growth > allowed:
+            violations.append(f'{key} 增长 {format_bytes(growth)}，超出预算 {budget}')
+    return violations
+
+
+def load_report(path: Path) -> dict | None:
+    """读取 JSON 报告，不存在时返回 None"""
+    if not path or not path.exists():
+        return None
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='APK 体积构成分析')
+    parser.add_argument('apks', nargs='+', help='APK 文件')
+    parser.add_argument('--baseline', type=str, help='上一次构建的 JSON 报告')
+    parser.add_argument('--budget', type=budget_arg, help='单个 APK 允许的最大增长，如 200KB 或 5%%')
+    parser.add_argument('--json', type=str, help='报告输出路径')
+    args = parser.parse_args()
+
+    report = build_report([Path(apk) for apk in args.apks])
+    baseline = load_report(Path(args.baseline)) if args.baseline else None
+    print_report(report, baseline)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    if args.budget and baseline:
+        violations = check_budget(report, baseline, args.budget)
+        if violations:
+            print('\n❌ APK 体积超出预算:')
+            for violation in violations:
+                print(f'  - {violation}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+APK/IPA 二进制增量包
+按 zip 条目比较相邻两次构建的产物：内容未变的条目引用旧文件中的字节区间，其余部分作为新数据写入，
+整体使用 LZMA 压缩。应用增量后逐字节还原新产物，并校验 SHA-256
+
+使用方法:
+    python scripts/artifact_delta.py create OLD NEW DELTA
+    python scripts/artifact_delta.py apply OLD DELTA OUTPUT
+"""
+
+import re
+import sys
+import json
+import lzma
+import shutil
+import struct
+import hashlib
+import argparse
+import zipfile
+from pathlib import Path
+
+MAGIC = b'SVDELTA1'
+
+OP_COPY = b'C'
+OP_DATA = b'D'
+
+LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 输出文件名中的时间戳后缀，如 app-arm64-v8a-release-2025-01-01_12-00-00
+TIMESTAMP_SUFFIX = re.compile(r'(-\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})+$')
+
+
+def artifact_key(artifact: Path) -> str:
+    """去掉时间戳后的产物名称，用于匹配上一次构建"""
+    return TIMESTAMP_SUFFIX.sub('', artifact.stem)
+
+
+def sha256_file(path: Path) -> str:
+    """计算文件 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def zip_entry_ranges(path: Path) -> dict[str, tuple[int, int]]:
+    """返回每个 zip 条目（本地文件头 + 数据）在文件中的字节区间 {名称: (起始, 结束)}"""
+    ranges = {}
+    try:
+        with zipfile.ZipFile(path) as zipf, open(path, 'rb') as f:
+            for info in zipf.infolist():
+                f.seek(info.header_offset)
+                header = f.read(LOCAL_HEADER.size)
+                if len(header) < LOCAL_HEADER.size:
+                    continue
+                fields = LOCAL_HEADER.unpack(header)
+                if fields[0] != LOCAL_HEADER_SIGNATURE:
+                    continue
+                name_length, extra_length = fields[9], fields[10]
+                end = info.header_offset + LOCAL_HEADER.size + name_length + extra_length + info.compress_size
+                ranges[info.filename] = (info.header_offset, end)
+    except zipfile.BadZipFile:
+        return {}
+    return ranges
+
+
+def read_range(f, start: int, end: int) -> bytes:
+    """读取文件中的字节区间"""
+    f.seek(start)
+    return f.read(end - start)
+
+
+def diff_artifacts(old_path: Path, new_path: Path) -> list[tuple]:
+    """生成操作序列 [('copy', 偏移, 长度) | ('data', 字节)]"""
+    old_ranges = zip_entry_ranges(old_path)
+    new_ranges = zip_entry_ranges(new_path)
+    new_size = new_path.stat().st_size
+
+    ops = []
+
+    def add_data(data: bytes):
+        # 连续的变化条目追加到同一个 bytearray，避免反复拼接不可变 bytes（字面量总量的平方级复制）
+        if not data:
+            return
+        if ops and ops[-1][0] == 'data':
+            ops[-1][1].extend(data)
+        else:
+            ops.append(('data', bytearray(data)))
+
+    def add_copy(offset: int, length: int):
+        if ops and ops[-1][0] == 'copy' and ops[-1][1] + ops[-1][2] == offset:
+            ops[-1] = ('copy', ops[-1][1], ops[-1][2] + length)
+        else:
+            ops.append(('copy', offset, length))
+
+    with open(old_path, 'rb') as old_f, open(new_path, 'rb') as new_f:
+        position = 0
+        for name, (start, end) in sorted(new_ranges.items(), key=lambda item: item[1][0]):
+            if start < position:
+                continue
+            add_data(read_range(new_f, position, start))
+            new_bytes = read_range(new_f, start, end)
+            old_range = old_ranges.get(name)
+            if old_range and old_range[1] - old_range[0] == end - start and read_range(old_f, *old_range) == new_bytes:
+                add_copy(old_range[0], end - start)
+            else:
+                add_data(new_bytes)
+            position = end
+        add_data(read_range(new_f, position, new_size))
+
+    return [('data', bytes(op[1])) if op[0] == 'data' else op for op in ops]
+
+
+def encode_delta(header: dict, ops: list[tuple]) -> bytes:
+    """序列化并压缩增量数据"""
+    header_bytes = json.dumps(header).encode('utf-8')
+    parts = [MAGIC, struct.pack('<I', len(header_bytes)), header_bytes]
+    for op in ops:
+        if op[0] == 'copy':
+            parts.append(OP_COPY + struct.pack('<QQ', op[1], op[2]))
+        else:
+            parts.append(OP_DATA + struct.pack('<Q', len(op[1])))
+            parts.append(op[1])
+    return lzma.compress(b''.join(parts), preset=6)
+
+
+def decode_delta(data: bytes) -> tuple[dict, list[tuple]]:
+    """解压并解析增量数据"""
+    raw = lzma.decompress(data)
+    if not raw.startswith(MAGIC):
+        raise ValueError('不是有效的增量文件')
+    offset = len(MAGIC)
+    (header_length,) = struct.unpack_from('<I', raw, offset)
+    offset += 4
+    header = json.loads(raw[offset:offset + header_length])
+    offset += header_length
+
+    ops = []
+    while offset < len(raw):
+        op = raw[offset:offset + 1]
+        offset += 1
+        if op == OP_COPY:
+            ops.append(('copy', *struct.unpack_from('<QQ', raw, offset)))
+            offset += 16
+        elif op == OP_DATA:
+            (length,) = struct.unpack_from('<Q', raw, offset)
+            offset += 8
+            ops.append(('data', raw[offset:offset + length]))
+            offset += length
+        else:
+            raise ValueError(f'未知操作: {op!r}')
+    return header, ops
+
+
+def create_delta(old_path: Path, new_path: Path, delta_path: Path) -> dict:
+    """生成增量文件，返回统计信息"""
+    ops = diff_artifacts(old_path, new_path)
+    header = {
+        'source_sha256': sha256_file(old_path),
+        'target_sha256': sha256_file(new_path),
+        'target_size': new_path.stat().st_size,
+        'target_name': new_path.name,
+    }
+    delta_path.write_bytes(encode_delta(header, ops))
+
+    copied = sum(op[2] for op in ops if op[0] == 'copy')
+    return {
+        'delta_size': delta_path.stat().st_size,
+        'full_size': header['target_size'],
+        'copied_bytes': copied,
+        'literal_bytes': header['target_size'] - copied,
+    }
+
+
+def apply_delta(old_path: Path, delta_path: Path, output_path: Path) -> Path:
+    """应用增量文件还原新产物，哈希不一致时抛出 ValueError"""
+    header, ops = decode_delta(delta_path.read_bytes())
+    if sha256_file(old_path) != header['source_sha256']:
+        raise ValueError(f'基准文件不匹配: {old_path.name}')
+
+    with open(old_path, 'rb') as old_f, open(output_path, 'wb') as out_f:
+        for op in ops:
+            if op[0] == 'copy':
+                old_f.seek(op[1])
+                remaining = op[2]
+                while remaining:
+                    chunk = old_f.read(min(remaining, HASH_CHUNK_SIZE))
+                    out_f.write(chunk)
+                    remaining -= len(chunk)
+            else:
+                out_f.write(op[1])
+
+    if sha256_file(output_path) != header['target_sha256']:
+        output_path.unlink()
+        raise ValueError(f'还原结果校验失败: {output_path.name}')
+    return output_path
+
+
+def publish_deltas(artifacts: list[Path], cache_dir: Path) -> list[dict]:
+    """为每个产物生成相对上一次构建的增量包（写到产物旁边），并将本次产物保存为下一次的基准"""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    for artifact in artifacts:
+        key = artifact_key(artifact)
+        previous = cache_dir / f'{key}{artifact.suffix}'
+        if previous.exists():
+            delta_path = artifact.with_name(f'{artifact.stem}.delta')
+            stats = create_delta(previous, artifact, delta_path)
+            # 生成后立即验证可逐字节还原
+            verify_path = delta_path.with_suffix('.verify')
+            try:
+                apply_delta(previous, delta_path, verify_path)
+                results.append({'artifact': artifact, 'delta': delta_path, **stats})
+            except ValueError as e:
+                print(f'  ❌ 增量包校验失败: {e}')
+                delta_path.unlink()
+            finally:
+                if verify_path.exists():
+                    verify_path.unlink()
+
+        shutil.copy2(artifact, previous)
+    return results
+
+
+def print_deltas(results: list[dict]):
+    """输出增量包与完整包的体积对比"""
+    for r in results:
+        ratio = r['delta_size'] / r['full_size'] if r['full_size'] else 0
+        print(f'   {r["delta"].name}: {r["delta_size"] / (1024 * 1024):.2f} MB'
+              f' / 完整包 {r["full_size"] / (1024 * 1024):.2f} MB ({ratio:.1%})')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='APK/IPA 二进制增量包')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    create_parser = subparsers.add_parser('create', help='生成增量包')
+    create_parser.add_argument('old')
+    create_parser.add_argument('new')
+    create_parser.add_argument('delta')
+
+    apply_parser = subparsers.add_parser('apply', help='应用增量包')
+    apply_parser.add_argument('old')
+    apply_parser.add_argument('delta')
+    apply_parser.add_argument('output')
+
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        stats = create_delta(Path(args.old), Path(args.new), Path(args.delta))
+        ratio = stats['delta_size'] / stats['full_size'] if stats['full_size'] else 0
+        print(f'✅ 增量包: {stats["delta_size"] / 1024:.1f} KB / 完整包 {stats["full_size"] / 1024:.1f} KB ({ratio:.1%})')
+    else:
+        try:
+            output = apply_delta(Path(args.old), Path(args.delta), Path(args.output))
+        except ValueError as e:
+            print(f'❌ {e}')
+            sys.exit(1)
+        print(f'✅ 已还原并校验: {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+构建产物完整性清单
+对 output/ 中的所有产物通过内存映射读取，在线程池中计算整个文件的 SHA-256（与 sha256sum、
+artifact_server 的 ETag 一致），以及按 CHUNK_SIZE 分块并行计算的 SHA-256 树哈希与快速哈希
+（安装了 xxhash 时为 XXH64，否则为 CRC32），写入 output/manifest.json，
+同时记录大小、平台、ABI 与构建类型，并列出内容相同的重复文件。hashlib / zlib / xxhash 计算时释放 GIL，
+不同文件与大文件的各个分块可以在多个核上同时计算，整体速度受限于磁盘而不是单核
+
+树哈希 (sha256_tree / fast):
+    按 RFC 6962 的 Merkle 树：文件按 chunk_size 分块，叶子 = H(0x00 || 分块)，
+    节点 = H(0x01 || 左 || 右)，左子树包含不超过分块数的最大 2 的幂个分块；空文件为 H()
+
+使用方法:
+    python scripts/artifact_manifest.py [create] [--dir PATH] [--workers N]
+    python scripts/artifact_manifest.py verify [--dir PATH]
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import zlib
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from artifact_server import apk_abi
+from toolchain import get_project_root
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_FORMAT = 2
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# 不属于产物的目录（logcat 日志等）
+EXCLUDED_DIRS = ('logs',)
+
+PLATFORMS = {'.apk': 'android', '.aab': 'android', '.ipa': 'ios'}
+
+# RFC 6962 的域分隔前缀：叶子与内部节点的哈希输入不会相同
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+class Crc32:
+    """与 hashlib 接口一致的 CRC32"""
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def digest(self) -> bytes:
+        return self.value.to_bytes(4, 'big')
+
+
+def fast_hasher():
+    """快速哈希的 (名称, 构造函数)：优先 XXH64，未安装 xxhash 时使用 CRC32"""
+    try:
+        import xxhash
+    except ImportError:
+        return 'crc32-tree', Crc32
+    return 'xxh64-tree', xxhash.xxh64
+
+
+def hash_range(mm: mmap.mmap, start: int, end: int, new_hashes: tuple, prefix: bytes = b'') -> list[bytes]:
+    """对映射内存的 [start, end) 计算各个哈希，直接在映射内存上计算，不复制数据"""
+    view = memoryview(mm)
+    chunk = view[start:end]
+    try:
+        digests = []
+        for new in new_hashes:
+            digest = new()
+            digest.update(prefix)
+            digest.update(chunk)
+            digests.append(digest.digest())
+        return digests
+    finally:
+        chunk.release()
+        view.release()
+
+
+def merkle_root(leaves: list[bytes], new) -> bytes:
+    """RFC 6962 Merkle 树根（leaves 为已加前缀计算的叶子哈希）"""
+    if not leaves:
+        return new().digest()
+    if len(leaves) == 1:
+        return leaves[0]
+    split = 1 << ((len(leaves) - 1).bit_length() - 1)
+    node = new()
+    node.update(NODE_PREFIX)
+    node.update(merkle_root(leaves[:split], new))
+    node.update(merkle_root(leaves[split:], new))
+    return node.digest()
+
+
+def hash_files(paths: list[Path], workers: int | None = None, chunk_size: int = CHUNK_SIZE) -> dict[Path, dict]:
+    """并行计算所有文件的哈希，返回 {路径: {'sha256', 'sha256_tree', 'fast'}}
+
+    整个文件的 SHA-256 只能顺序计算，每个文件作为一个任务；树哈希的每个分块各是一个任务，
+    所有任务在同一个线程池中并行执行
+    """
+    _, fast = fast_hasher()
+    leaf_hashes = (hashlib.sha256, fast)
+    results = {}
+    opened = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            pending = {}
+            for path in paths:
+                size = path.stat().st_size
+                if size == 0:
+                    results[path] = {
+                        'sha256': hashlib.sha256().hexdigest(),
+                        'sha256_tree': merkle_root([], hashlib.sha256).hex(),
+                        'fast': merkle_root([], fast).hex(),
+                    }
+                    continue
+                f = open(path, 'rb')
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                opened.append((f, mm))
+                whole = pool.submit(hash_range, mm, 0, size, (hashlib.sha256,))
+                chunks = [pool.submit(hash_range, mm, start, min(start + chunk_size, size), leaf_hashes, LEAF_PREFIX)
+                          for start in range(0, size, chunk_size)]
+                pending[path] = (whole, chunks)
+            for path, (whole, chunks) in pending.items():
+                leaves = [future.result() for future in chunks]
+                results[path] = {
+                    'sha256': whole.result()[0].hex(),
+                    'sha256_tree': merkle_root([leaf[0] for leaf in leaves], hashlib.sha256).hex(),
+                    'fast': merkle_root([leaf[1] for leaf in leaves], fast).hex(),
+                }
+    finally:
+        for f, mm in opened:
+            mm.close()
+            f.close()
+    return results
+
+
+def list_artifacts(output_dir: Path) -> list[Path]:
+    """output/ 中需要记录的文件"""
+    files = []
+    for path in sorted(output_dir.rglob('*')):
+        relative = path.relative_to(output_dir)
+        if not path.is_file() or path.name == MANIFEST_NAME or relative.parts[0] in EXCLUDED_DIRS:
+            continue
+        files.append(path)
+    return files
+
+
+def describe(path: Path, output_dir: Path) -> dict:
+    """平台、ABI 与构建类型（按文件名与 output/<变体>/ 目录识别）"""
+    info = {'platform': PLATFORMS.get(path.suffix)}
+    if path.suffix == '.apk':
+        info['abi'] = apk_abi(path)
+    text = '/'.join(path.relative_to(output_dir).parts).lower()
+    if 'release' in text or path.suffix == '.ipa':
+        info['build_type'] = 'release'
+    elif 'debug' in text:
+        info['build_type'] = 'debug'
+    return info
+
+
+def create_manifest(output_dir: Path, workers: int | None = None) -> dict:
+    """哈希 output/ 中的所有产物并写入 manifest.json"""
+    paths = list_artifacts(output_dir)
+    start = time.perf_counter()
+    hashes = hash_files(paths, workers)
+    elapsed = time.perf_counter() - start
+
+    files = {}
+    by_hash = {}
+    for path in paths:
+        name = path.relative_to(output_dir).as_posix()
+        files[name] = {'size': path.stat().st_size, **hashes[path], **describe(path, output_dir)}
+        by_hash.setdefault(hashes[path]['sha256'], []).append(name)
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'hash': {'sha256': 'sha256', 'sha256_tree': 'rfc6962-sha256', 'fast': fast_hasher()[0], 'chunk_size': CHUNK_SIZE},
+        'files': files,
+        'duplicates': [names for names in by_hash.values() if len(names) > 1],
+    }
+    (output_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding='utf-8')
+    manifest['seconds'] = elapsed
+    return manifest
+
+
+def verify_manifest(output_dir: Path, workers: int | None = None) -> list[str]:
+    """按清单重新计算哈希，返回问题列表（为空表示一致）"""
+    manifest = json.loads((output_dir / MANIFEST_NAME).read_text(encoding='utf-8'))
+    chunk_size = manifest['hash']['chunk_size']
+    problems = []
+    paths = []
+    for name, entry in manifest['files'].items():
+        path = output_dir / name
+        if not path.exists():
+            problems.append(f'缺少文件: {name}')
+        elif path.stat().st_size != entry['size']:
+            problems.append(f'大小不一致: {name}')
+        else:
+            paths.append(path)
+    fast_name = fast_hasher()[0]
+    for path, hashes in hash_files(paths, workers, chunk_size).items():
+        entry = manifest['files'][path.relative_to(output_dir).as_posix()]
+        if hashes['sha256'] != entry['sha256'] or hashes['sha256_tree'] != entry['sha256_tree']:
+            problems.append(f'SHA-256 不一致: {path.name}')
+        elif fast_name == manifest['hash']['fast'] and hashes['fast'] != entry['fast']:
+            problems.append(f'快速哈希不一致: {path.name}')
+    return problems
+
+
+def print_manifest(manifest: dict, output_dir: Path):
+    total = sum(entry['size'] for entry in manifest['files'].values())
+    seconds = manifest.get('seconds', 0)
+    speed = f', {total / seconds / 1024 / 1024:.0f} MB/s' if seconds else ''
+    print(f'  🔏 {len(manifest["files"])} 个文件, {total / 1024 / 1024:.1f} MB, 哈希耗时 {seconds:.2f}s{speed}')
+    for names in manifest['duplicates']:
+        print(f'  ⚠️ 内容相同: {", ".join(names)}')
+    print(f'  📄 {output_dir / MANIFEST_NAME}')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='构建产物完整性清单')
+    parser.add_argument('command', nargs='?', choices=['create', 'verify'], default='create', help='操作')
+    parser.add_argument('--dir', type=str, help='产物目录（默认 output）')
+    parser.add_argument('--workers', type=int, help='并行线程数（默认 CPU 核数）')
+    args = parser.parse_args()
+
+    output_dir = Path(args.dir) if args.dir else get_project_root() / 'output'
+    if args.command == 'create':
+        print('🔏 生成产物清单...')
+        print_manifest(create_manifest(output_dir, args.workers), output_dir)
+        return
+
+    problems = verify_manifest(output_dir, args.workers)
+    if problems:
+        for problem in problems:
+            print(f'❌ {problem}')
+        sys.exit(1)
+    print('✅ 所有文件与清单一致')
+
+
+if __name__ == '__main__':
+    main()
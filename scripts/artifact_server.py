@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+局域网构建产物分发服务
+通过 HTTP 在局域网内提供 output/ 中的 APK、IPA 等产物，测试人员在手机浏览器中打开首页即可下载安装。
+支持 HTTP Range（断点续传）、基于内容 SHA-256 的 ETag / If-None-Match / If-Range，
+文件内容通过 socket.sendfile 零拷贝发送，几十个测试人员同时下载也不会占满 CPU 与内存
+
+使用方法:
+    python scripts/artifact_server.py [--port 8080] [--host 0.0.0.0] [--dir PATH]
+
+地址:
+    /                       产物列表（按 ABI 分组的 APK 安装链接）
+    /files/<路径>           下载 output/ 中的文件
+    /latest/<ABI>.apk       该 ABI 最新的 APK（如 /latest/arm64-v8a.apk、/latest/universal.apk）
+"""
+
+import re
+import html
+import socket
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote, urlparse
+
+from artifact_delta import artifact_key, sha256_file
+from toolchain import get_project_root
+
+DEFAULT_PORT = 8080
+
+# 首页列出的产物类型
+ARTIFACT_SUFFIXES = ('.apk', '.aab', '.ipa', '.delta')
+CONTENT_TYPES = {
+    '.apk': 'application/vnd.android.package-archive',
+    '.ipa': 'application/octet-stream',
+    '.json': 'application/json',
+    '.txt': 'text/plain; charset=utf-8',
+    '.map': 'application/json',
+}
+
+APK_ABIS = ('arm64-v8a', 'armeabi-v7a', 'x86_64', 'x86')
+UNIVERSAL_ABI = 'universal'
+
+RANGE_HEADER = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+# 下载停滞超过该时间（秒）的连接会被关闭
+CLIENT_TIMEOUT = 60
+LISTEN_BACKLOG = 128
+
+
+class ArtifactIndex:
+    """产物目录的 ETag 缓存：按 (大小, mtime) 缓存内容哈希，同一文件只计算一次"""
+
+    def __init__(self, root: Path):
+        self.root = root.resolve()
+        self.lock = threading.Lock()
+        self.hashes: dict[Path, tuple[int, int, str]] = {}
+        self.hashing: dict[Path, threading.Lock] = {}
+
+    def resolve(self, relative: str) -> Path | None:
+        """URL 路径转为 root 下的文件，越界或不存在时返回 None"""
+        path = (self.root / relative).resolve()
+        if self.root not in path.parents or not path.is_file():
+            return None
+        return path
+
+    def etag(self, path: Path) -> str:
+        st = path.stat()
+        with self.lock:
+            cached = self.hashes.get(path)
+            if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+                return cached[2]
+            file_lock = self.hashing.setdefault(path, threading.Lock())
+        # 多个请求同时访问新文件时只由一个线程计算哈希
+        with file_lock:
+            with self.lock:
+                cached = self.hashes.get(path)
+                if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+                    return cached[2]
+            digest = f'"{sha256_file(path)}"'
+            with self.lock:
+                self.hashes[path] = (st.st_size, st.st_mtime_ns, digest)
+            return digest
+
+    def artifacts(self) -> list[Path]:
+        """按修改时间（新 → 旧）排列的产物"""
+        files = [path for path in self.root.rglob('*') if path.is_file() and path.suffix in ARTIFACT_SUFFIXES]
+        return sorted(files, key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def latest_apk(self, abi: str) -> Path | None:
+        for path in self.artifacts():
+            if path.suffix == '.apk' and apk_abi(path) == abi:
+                return path
+        return None
+
+
+def apk_abi(path: Path) -> str:
+    """从 APK 文件名识别 ABI（按 ABI 拆分时文件名如 app-arm64-v8a-release.apk）"""
+    name = artifact_key(path)
+    for abi in APK_ABIS:
+        if f'-{abi}-' in f'-{name}-':
+            return abi
+    return UNIVERSAL_ABI
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """解析单个字节区间，返回 [start, end]；多区间或格式错误（含 last < first）时返回 None（按完整内容响应）"""
+    match = RANGE_HEADER.match(header.strip())
+    if not match or (not match.group('start') and not match.group('end')):
+        return None
+    if not match.group('start'):
+        # bytes=-N：最后 N 个字节
+        length = int(match.group('end'))
+        return max(size - length, 0), size - 1
+    start = int(match.group('start'))
+    if not match.group('end'):
+        return start, size - 1
+    end = int(match.group('end'))
+    if end < start:
+        # RFC 9110 14.1.1：last-pos 小于 first-pos 的区间无效，忽略 Range 头
+        return None
+    return start, min(end, size - 1)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match：* 匹配任意 ETag，其余按弱比较（忽略 W/ 前缀）"""
+    tags = [tag.strip() for tag in header.split(',') if tag.strip()]
+    return '*' in tags or etag in [tag.removeprefix('W/') for tag in tags]
+
+
+def render_index(index: ArtifactIndex) -> bytes:
+    """产物列表页：APK 按 ABI 分组提供安装链接，其余产物直接下载"""
+    rows = []
+    latest_abis = []
+    for path in index.artifacts():
+        relative = path.relative_to(index.root).as_posix()
+        st = path.stat()
+        modified = datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M')
+        kind = apk_abi(path) if path.suffix == '.apk' else path.suffix[1:].upper()
+        if path.suffix == '.apk' and kind not in latest_abis:
+            latest_abis.append(kind)
+        content_type = CONTENT_TYPES.get(path.suffix, 'application/octet-stream')
+        rows.append(
+            f'<tr><td><a href="/files/{quote(relative)}" type="{content_type}" download>{html.escape(relative)}</a></td>'
+            f'<td>{html.escape(kind)}</td><td>{st.st_size / 1024 / 1024:.1f} MB</td><td>{modified}</td></tr>'
+        )
+
+    buttons = ''.join(
+        f'<a class="install" href="/latest/{abi}.apk" type="{CONTENT_TYPES[".apk"]}">安装最新 APK ({abi})</a>'
+        for abi in latest_abis
+    )
+    page = f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>构建产物</title>
+<style>
+body {{ font-family: -apple-system, sans-serif; margin: 16px; }}
+.install {{ display: block; margin: 8px 0; padding: 14px; background: #1a73e8; color: #fff;
+           border-radius: 8px; text-align: center; text-decoration: none; font-size: 18px; }}
+table {{ border-collapse: collapse; width: 100%; margin-top: 16px; font-size: 14px; }}
+td, th {{ border-bottom: 1px solid #ddd; padding: 6px; text-align: left; word-break: break-all; }}
+</style>
+</head>
+<body>
+<h2>构建产物</h2>
+<p>大多数手机使用 arm64-v8a；较旧的 32 位设备使用 armeabi-v7a。</p>
+{buttons or '<p>暂无 APK</p>'}
+<table>
+<tr><th>文件</th><th>类型</th><th>大小</th><th>时间</th></tr>
+{''.join(rows)}
+</table>
+</body>
+</html>
+'''
+    return page.encode('utf-8')
+
+
+class ArtifactHandler(BaseHTTPRequestHandler):
+    """产物下载：Range、ETag 与 sendfile"""
+
+    index: ArtifactIndex = None
+    protocol_version = 'HTTP/1.1'
+    timeout = CLIENT_TIMEOUT
+
+    def send_body(self, code: int, body: bytes = b'', content_type: str = 'text/plain; charset=utf-8'):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_GET(self):
+        path = unquote(urlparse(self.path).path)
+        if path in ('/', '/index.html'):
+            self.send_body(200, render_index(self.index), 'text/html; charset=utf-8')
+            return
+
+        if path.startswith('/latest/') and path.endswith('.apk'):
+            latest = self.index.latest_apk(path[len('/latest/'):-len('.apk')])
+            if latest is None:
+                self.send_body(404, '没有该 ABI 的 APK\n'.encode('utf-8'))
+                return
+            # 重定向到实际文件，下载的文件名与缓存都以实际文件为准
+            self.send_response(302)
+            self.send_header('Location', '/files/' + quote(latest.relative_to(self.index.root).as_posix()))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        file_path = self.index.resolve(path[len('/files/'):]) if path.startswith('/files/') else None
+        if file_path is None:
+            self.send_body(404, b'Not Found\n')
+            return
+        self.send_file(file_path)
+
+    do_HEAD = do_GET
+
+    def send_file(self, path: Path):
+        size = path.stat().st_size
+        etag = self.index.etag(path)
+        if etag_matches(self.headers.get('If-None-Match', ''), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        byte_range = None
+        range_header = self.headers.get('Range')
+        # If-Range 与当前 ETag 不一致时（文件已更新）返回完整内容
+        if range_header and self.headers.get('If-Range', etag) == etag:
+            byte_range = parse_range(range_header, size)
+            if byte_range and byte_range[0] >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+        start, end = byte_range or (0, size - 1)
+        length = max(end - start + 1, 0)
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', CONTENT_TYPES.get(path.suffix, 'application/octet-stream'))
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Disposition', f"attachment; filename*=UTF-8''{quote(path.name)}")
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if self.command == 'HEAD' or not length:
+            return
+
+        with open(path, 'rb') as f:
+            try:
+                # 内核直接从页缓存发送（不支持 sendfile 的平台自动退回普通读写）
+                self.connection.sendfile(f, offset=start, count=length)
+            except (ConnectionResetError, BrokenPipeError, TimeoutError):
+                self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ArtifactServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+def lan_address() -> str:
+    """本机的局域网地址（不发送数据包）"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        try:
+            probe.connect(('10.255.255.255', 1))
+            return probe.getsockname()[0]
+        except OSError:
+            return '127.0.0.1'
+
+
+def create_server(directory: Path, host: str = '0.0.0.0', port: int = DEFAULT_PORT) -> ArtifactServer:
+    """创建服务（端口为 0 时由系统分配）"""
+    handler = type('Handler', (ArtifactHandler,), {'index': ArtifactIndex(directory)})
+    return ArtifactServer((host, port), handler)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='局域网构建产物分发服务')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='监听地址')
+    parser.add_argument('--dir', type=str, help='产物目录（默认 output）')
+    args = parser.parse_args()
+
+    directory = Path(args.dir) if args.dir else get_project_root() / 'output'
+    directory.mkdir(parents=True, exist_ok=True)
+    server = create_server(directory, args.host, args.port)
+    port = server.server_address[1]
+
+    artifacts = server.RequestHandlerClass.index.artifacts()
+    print(f'📡 产物分发服务: http://{lan_address()}:{port}/ ({len(artifacts)} 个产物, 目录 {directory})')
+    print('  测试人员在同一局域网内用手机浏览器打开上面的地址即可下载安装，Ctrl+C 停止')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+产物分发服务并发下载基准测试
+在本机启动 artifact_server（临时目录中放一个随机内容的 APK），用多个并发客户端完整下载或分段（Range）下载，
+校验内容哈希，输出吞吐量以及本进程（客户端与服务端）的 CPU 时间与内存峰值
+
+使用方法:
+    python scripts/bench_artifact_server.py [--clients 30] [--size 60MB]
+
+参数:
+    --clients   并发客户端数（默认 30）
+    --size      测试 APK 大小（默认 60MB）
+"""
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import artifact_server
+from toolchain import parse_size
+
+# 每个分段下载客户端请求的区间数
+RANGE_PARTS = 4
+READ_SIZE = 256 * 1024
+
+
+def download(url: str, digest, byte_range: tuple[int, int] | None = None):
+    """流式下载并更新哈希（客户端不缓存整个文件）"""
+    request = urllib.request.Request(url)
+    if byte_range:
+        request.add_header('Range', f'bytes={byte_range[0]}-{byte_range[1]}')
+    with urllib.request.urlopen(request, timeout=120) as response:
+        expected = 206 if byte_range else 200
+        if response.status != expected:
+            raise RuntimeError(f'期望 {expected}，实际 {response.status}')
+        while chunk := response.read(READ_SIZE):
+            digest.update(chunk)
+
+
+def client(url: str, size: int, ranged: bool) -> str:
+    """完整下载或分 RANGE_PARTS 段下载，返回内容的 SHA-256"""
+    digest = hashlib.sha256()
+    if not ranged:
+        download(url, digest)
+        return digest.hexdigest()
+    step = -(-size // RANGE_PARTS)
+    for start in range(0, size, step):
+        download(url, digest, (start, min(start + step, size) - 1))
+    return digest.hexdigest()
+
+
+def process_usage() -> tuple[float, float | None]:
+    """本进程的 CPU 时间（秒）与内存峰值（MB）"""
+    times = os.times()
+    try:
+        import resource
+    except ImportError:
+        return times.user + times.system, None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return times.user + times.system, peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='产物分发服务并发下载基准测试')
+    parser.add_argument('--clients', type=int, default=30, help='并发客户端数')
+    parser.add_argument('--size', type=str, default='60MB', help='测试 APK 大小')
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    with tempfile.TemporaryDirectory() as tmp:
+        apk = Path(tmp) / 'app-arm64-v8a-release.apk'
+        expected = hashlib.sha256()
+        with open(apk, 'wb') as f:
+            for offset in range(0, size, READ_SIZE):
+                chunk = os.urandom(min(READ_SIZE, size - offset))
+                expected.update(chunk)
+                f.write(chunk)
+
+        server = artifact_server.create_server(Path(tmp), '127.0.0.1', 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+
+        # 预热 ETag 哈希，测量只包含传输
+        download(f'{base}/files/{apk.name}', hashlib.sha256(), (0, 0))
+        cpu_before, _ = process_usage()
+        start = time.perf_counter()
+        url = f'{base}/latest/arm64-v8a.apk'
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            futures = [pool.submit(client, url, size, i % 2 == 1) for i in range(args.clients)]
+            digests = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        cpu_after, peak_rss = process_usage()
+        server.shutdown()
+        server.server_close()
+
+    total = size * args.clients
+    ok = all(digest == expected.hexdigest() for digest in digests)
+    print(f'📡 {args.clients} 个客户端并发下载 {size / 1024 / 1024:.0f} MB APK（一半使用 {RANGE_PARTS} 段 Range 请求）')
+    print(f'  耗时 {elapsed:.2f}s, 总吞吐 {total / elapsed / 1024 / 1024:.0f} MB/s')
+    print(f'  CPU 时间 {cpu_after - cpu_before:.2f}s（客户端与服务端同一进程）'
+          + (f', 内存峰值 {peak_rss:.0f} MB' if peak_rss is not None else ''))
+    if not ok:
+        print('❌ 内容校验失败')
+        sys.exit(1)
+    print('  ✅ 内容校验通过')
+
+
+if __name__ == '__main__':
+    main()
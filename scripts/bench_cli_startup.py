@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+CLI 分发耗时基准测试
+多次启动解释器，分别测量空解释器、cli.py 分发（help）以及各子命令模块导入的耗时，
+输出中位数、P90 与相对空解释器的额外开销，以及所有子命令分发开销（cli.py + 模块导入）的分布
+
+使用方法:
+    python scripts/bench_cli_startup.py [--runs N] [--budget MS]
+
+参数:
+    --runs      每项测量的启动次数（默认 20）
+    --budget    start 子命令（cli.py 分发 + start_with_port 导入）允许的额外开销（毫秒，默认 50），超出时返回失败；
+                其他超出预算的子命令只提示
+"""
+
+import sys
+import math
+import time
+import argparse
+import statistics
+import subprocess
+
+from cli import COMMANDS
+from toolchain import get_project_root
+
+
+def time_command(cmd: list[str], runs: int) -> list[float]:
+    """多次执行命令，返回每次的耗时（毫秒）"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def p90(values: list[float]) -> float:
+    """最近秩法 P90"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(0.9 * len(ordered)), 1) - 1]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='CLI 分发耗时基准测试')
+    parser.add_argument('--runs', type=int, default=20, help='每项测量的启动次数')
+    parser.add_argument('--budget', type=float, default=50.0, help='分发允许的额外开销（毫秒）')
+    args = parser.parse_args()
+
+    scripts_dir = get_project_root() / 'scripts'
+    python = sys.executable
+
+    print(f'⏱️ CLI 启动耗时 (每项 {args.runs} 次)\n')
+    print(f'  {"":<32}{"中位数":>9}{"P90":>10}{"额外开销":>10}')
+    baseline = statistics.median(time_command([python, '-c', 'pass'], args.runs))
+    print(f'  {"python -c pass":<32}{baseline:>8.1f} ms')
+
+    samples = {'cli.py help': time_command([python, str(scripts_dir / 'cli.py'), 'help'], args.runs)}
+    for module_name in dict.fromkeys(module for module, _, _ in COMMANDS.values()):
+        code = f'import sys; sys.path.insert(0, {str(scripts_dir)!r}); import {module_name}'
+        samples[module_name] = time_command([python, '-c', code], args.runs)
+
+    overheads = {}
+    for label, values in samples.items():
+        median = statistics.median(values)
+        overheads[label] = median - baseline
+        name = label if label == 'cli.py help' else f'import {label}'
+        print(f'  {name:<32}{median:>8.1f} ms{p90(values):>7.1f} ms  +{overheads[label]:.1f} ms')
+
+    # 每个子命令的分发开销 = cli.py 自身的开销 + 对应模块的导入开销
+    dispatch = overheads.pop('cli.py help')
+    commands = {name: dispatch + overheads[module] for name, (module, _, _) in COMMANDS.items()}
+    ordered = sorted(commands.values())
+    print(f'\n📊 {len(commands)} 个子命令的分发开销: 最小 {ordered[0]:.1f} ms, 中位数 {statistics.median(ordered):.1f} ms, '
+          f'P90 {p90(ordered):.1f} ms, 最大 {ordered[-1]:.1f} ms')
+    for name, overhead in sorted(commands.items(), key=lambda item: -item[1])[:5]:
+        flag = '  ⚠️ 超出预算' if overhead > args.budget else ''
+        print(f'  {name:<32}+{overhead:.1f} ms{flag}')
+
+    # yarn start / android / ios 走的路径：cli 分发 + start_with_port 导入
+    overhead = commands['start']
+    if overhead > args.budget:
+        print(f'\n❌ start 分发额外开销 {overhead:.1f} ms 超出预算 {args.budget:.0f} ms')
+        sys.exit(1)
+    print(f'\n✅ start 分发额外开销 {overhead:.1f} ms (预算 {args.budget:.0f} ms)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+IPA 打包压缩策略基准测试
+对合成的 .app 目录（以及可选的真实 .app）按每个压缩预设打包，统计耗时、体积与吞吐量
+
+使用方法:
+    python scripts/bench_ipa_packaging.py [--app PATH ...] [--repeat N] [--scale N]
+
+参数:
+    --app       额外参与测试的真实 .app 目录（可多次指定）
+    --repeat    每个预设重复次数，取最快一次（默认 3）
+    --scale     合成 .app 的体积倍数（默认 1，约 20 MB）
+"""
+
+import os
+import random
+import shutil
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from build_ios import COMPRESSION_PRESETS, package_app
+
+# Hermes 字节码文件头
+HERMES_MAGIC = bytes.fromhex('c61fbc03c103191f')
+
+
+def write_random(path: Path, size: int, rng: random.Random):
+    """写入不可压缩的随机数据"""
+    path.write_bytes(rng.randbytes(size))
+
+
+def write_text(path: Path, size: int, rng: random.Random):
+    """写入类似 JS 源码的可压缩文本"""
+    words = ['function', 'return', 'const', 'var', 'require', 'module', 'exports', 'this', 'props', 'state']
+    chunks = []
+    written = 0
+    while written < size:
+        line = ' '.join(rng.choice(words) for _ in range(12)) + ';\n'
+        chunks.append(line)
+        written += len(line)
+    path.write_text(''.join(chunks)[:size])
+
+
+def build_synthetic_app(parent: Path, scale: int = 1) -> Path:
+    """生成与 React Native .app 结构相近的合成目录"""
+    rng = random.Random(42)
+    app_path = parent / 'Synthetic.app'
+    app_path.mkdir()
+
+    mb = 1024 * 1024
+    # 可执行文件：中等可压缩
+    binary = bytearray()
+    while len(binary) < 8 * mb * scale:
+        binary += rng.randbytes(256) + bytes(768)
+    (app_path / 'Synthetic').write_bytes(bytes(binary))
+
+    # Hermes 字节码、Assets.car、图片：高熵
+    (app_path / 'main.jsbundle').write_bytes(HERMES_MAGIC + rng.randbytes(3 * mb * scale))
+    write_random(app_path / 'Assets.car', 2 * mb * scale, rng)
+    assets_dir = app_path / 'assets' / 'src' / 'assets'
+    assets_dir.mkdir(parents=True)
+    for i in range(40 * scale):
+        write_random(assets_dir / f'image_{i}.png', 50 * 1024, rng)
+
+    # 文本资源：高度可压缩
+    for i in range(20 * scale):
+        write_text(app_path / f'strings_{i}.json', 100 * 1024, rng)
+    write_text(app_path / 'Info.plist', 4 * 1024, rng)
+
+    return app_path
+
+
+def dir_size(path: Path) -> int:
+    """统计目录下所有文件大小"""
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+def bench_app(app_path: Path, work_dir: Path, repeat: int) -> list[dict]:
+    """对单个 .app 测试全部预设"""
+    results = []
+    input_bytes = dir_size(app_path)
+    for preset in COMPRESSION_PRESETS:
+        ipa_path = work_dir / f'{app_path.stem}-{preset}.ipa'
+        best = None
+        for _ in range(repeat):
+            if ipa_path.exists():
+                ipa_path.unlink()
+            start = time.perf_counter()
+            stats = package_app(app_path, ipa_path, preset)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        results.append({
+            'preset': preset,
+            'seconds': best,
+            'output_bytes': stats['output_bytes'],
+            'ratio': stats['output_bytes'] / input_bytes if input_bytes else 0,
+            'throughput_mb_s': input_bytes / (1024 * 1024) / best if best else 0,
+        })
+        ipa_path.unlink()
+    return results
+
+
+def print_results(name: str, input_bytes: int, results: list[dict]):
+    """输出对比表"""
+    print(f'\n📦 {name} ({input_bytes / (1024 * 1024):.2f} MB)')
+    print(f'  {"预设":<10}{"耗时(s)":>10}{"体积(MB)":>12}{"压缩比":>10}{"吞吐(MB/s)":>14}')
+    for r in results:
+        print(f'  {r["preset"]:<10}{r["seconds"]:>10.3f}{r["output_bytes"] / (1024 * 1024):>12.2f}'
+              f'{r["ratio"]:>10.1%}{r["throughput_mb_s"]:>14.1f}')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='IPA 打包压缩策略基准测试')
+    parser.add_argument('--app', action='append', default=[], help='真实 .app 目录')
+    parser.add_argument('--repeat', type=int, default=3, help='每个预设重复次数')
+    parser.add_argument('--scale', type=int, default=1, help='合成 .app 的体积倍数')
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error('--repeat 至少为 1')
+
+    work_dir = Path(tempfile.mkdtemp(prefix='ipa-bench-'))
+    try:
+        apps = [build_synthetic_app(work_dir, args.scale)]
+        for app in args.app:
+            app_path = Path(app)
+            if not app_path.is_dir():
+                print(f'❌ .app 目录不存在: {app}')
+                continue
+            apps.append(app_path)
+
+        for app_path in apps:
+            results = bench_app(app_path, work_dir, args.repeat)
+            print_results(app_path.name, dir_size(app_path), results)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f'\n💡 CPU: {os.cpu_count()} 核; 各预设取 {args.repeat} 次中最快一次')
+
+
+if __name__ == '__main__':
+    main()
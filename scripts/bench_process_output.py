@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+子进程输出管道基准测试
+模拟输出量很大的构建工具（按行输出 N MB 文本），比较子进程直接写终端与经过 process_runner
+（压缩日志 + 环形缓冲区 + 进度行）两种方式的耗时，以及运行期间本进程的内存峰值
+
+使用方法:
+    python scripts/bench_process_output.py [--size 200MB] [--runs N]
+
+参数:
+    --size      模拟工具的输出量（默认 200MB）
+    --runs      每种方式的运行次数（默认 3），取中位数
+
+注意:
+    - 直接写终端的耗时取决于终端模拟器，请在实际使用的终端中运行；标准输出不是终端时该项没有参考意义
+"""
+
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+import process_runner
+from toolchain import get_project_root, parse_size
+
+# 模拟 Gradle / xcodebuild 风格的输出行
+VERBOSE_TOOL = '''
+import sys
+line = b"CompileC /Users/dev/Library/Developer/Xcode/DerivedData/App/Build/Objects-normal/arm64/RCTBridge.o " \\
+       b"/Users/dev/app/ios/Pods/React-Core/RCTBridge.mm normal arm64 objective-c++ (in target 'React-Core')\\n"
+out = sys.stdout.buffer
+for _ in range({size} // len(line)):
+    out.write(line)
+'''
+
+
+def peak_rss_mb() -> float | None:
+    """本进程的内存峰值（MB）"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='子进程输出管道基准测试')
+    parser.add_argument('--size', type=str, default='200MB', help='模拟工具的输出量')
+    parser.add_argument('--runs', type=int, default=3, help='每种方式的运行次数')
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    cmd = [sys.executable, '-c', VERBOSE_TOOL.format(size=size)]
+    cwd = get_project_root()
+
+    direct = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, check=True)
+        direct.append(time.perf_counter() - start)
+
+    rss_before = peak_rss_mb()
+    piped = []
+    for _ in range(args.runs):
+        result = process_runner.run_logged(cmd, cwd, 'bench-output')
+        piped.append(result['seconds'])
+        log_size = result['log'].stat().st_size
+    rss_after = peak_rss_mb()
+
+    print(f'\n⏱️ 输出 {size / 1024 / 1024:.0f} MB (每种方式 {args.runs} 次, 中位数)')
+    if not sys.stdout.isatty():
+        print('  ⚠️ 标准输出不是终端，直接输出的耗时不代表终端渲染开销')
+    print(f'  {"直接写终端":<20}{statistics.median(direct):>8.2f}s')
+    print(f'  {"process_runner":<20}{statistics.median(piped):>8.2f}s  '
+          f'(日志 {log_size / 1024 / 1024:.1f} MB, 压缩比 {size / max(log_size, 1):.0f}x)')
+    if rss_before is not None:
+        print(f'  内存峰值: {rss_before:.0f} MB → {rss_after:.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
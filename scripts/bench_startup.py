@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Android 启动耗时基准测试
+对每台已连接设备执行 `adb shell am start -W`，分别测量冷启动与热启动的 TotalTime/WaitTime，
+输出中位数、P90 与方差，并与保存的基线对比。结果按设备序列号区分，基线按设备型号保存
+（同型号的多台设备合并样本作为该型号的基线）
+
+模式:
+    cold  每次启动前 force-stop，进程与 Activity 都重新创建
+    hot   进程与 Activity 都保留，按 HOME 退到后台后再切回前台
+
+使用方法:
+    python scripts/bench_startup.py [--runs N] [--modes cold,hot] [--save-baseline] [--threshold 10]
+
+参数:
+    --runs          每台设备每种模式的启动次数（默认 10）
+    --modes         测试模式，逗号分隔: cold、hot（默认两者）
+    --save-baseline 将本次结果保存为基线，只更新本次测量的型号（检测到回退时不保存）
+    --threshold     中位数相比基线增长超过该百分比时返回失败（默认 10）
+    --adb           adb 可执行文件路径（默认使用 PATH 中的 adb，也可通过 ADB 环境变量指定）
+
+注意:
+    - 需要先安装应用 (python scripts/build_android.py --release --install)
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import argparse
+import statistics
+import subprocess
+
+from toolchain import get_cache_dir, get_connected_devices, get_project_root
+
+PACKAGE_NAME = 'com.storeverserepoapp'
+MAIN_ACTIVITY = f'{PACKAGE_NAME}/.MainActivity'
+
+AM_START_FIELD = re.compile(r'^(TotalTime|WaitTime):\s*(\d+)', re.MULTILINE)
+
+# 两次启动之间的等待，避免上一次的后台工作影响测量
+SETTLE_SECONDS = 1.0
+
+METRICS = ('TotalTime', 'WaitTime')
+
+
+def adb_shell(adb: str, serial: str, *args: str) -> str:
+    """在设备上执行 shell 命令"""
+    result = subprocess.run([adb, '-s', serial, 'shell', *args], capture_output=True, text=True)
+    return result.stdout
+
+
+def get_device_model(adb: str, serial: str) -> str:
+    """设备型号，用作基线的 key（同型号设备共享基线）"""
+    model = adb_shell(adb, serial, 'getprop', 'ro.product.model').strip()
+    return model or serial
+
+
+def launch(adb: str, serial: str) -> dict | None:
+    """启动应用并解析 am start -W 的输出"""
+    output = adb_shell(adb, serial, 'am', 'start', '-W', '-n', MAIN_ACTIVITY)
+    fields = {name: int(value) for name, value in AM_START_FIELD.findall(output)}
+    return fields if 'TotalTime' in fields else None
+
+
+def measure(adb: str, serial: str, mode: str, runs: int, settle: float = SETTLE_SECONDS) -> list[dict]:
+    """按模式多次启动，返回每次的耗时"""
+    samples = []
+    if mode == 'hot':
+        # 热启动需要进程与 Activity 已存在
+        adb_shell(adb, serial, 'am', 'force-stop', PACKAGE_NAME)
+        launch(adb, serial)
+        time.sleep(settle)
+
+    for _ in range(runs):
+        if mode == 'cold':
+            adb_shell(adb, serial, 'am', 'force-stop', PACKAGE_NAME)
+        else:
+            adb_shell(adb, serial, 'input', 'keyevent', 'KEYCODE_HOME')
+        time.sleep(settle)
+        sample = launch(adb, serial)
+        if sample:
+            samples.append(sample)
+    return samples
+
+
+def percentile(values: list[int], pct: float) -> float:
+    """最近秩法百分位"""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples: list[dict]) -> dict:
+    """统计各指标的中位数、P90 与方差"""
+    summary = {'runs': len(samples)}
+    for metric in METRICS:
+        values = [s[metric] for s in samples if metric in s]
+        if not values:
+            continue
+        summary[metric] = {
+            'median': statistics.median(values),
+            'p90': percentile(values, 90),
+            'variance': statistics.pvariance(values),
+            'min': min(values),
+            'max': max(values),
+        }
+    return summary
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """按设备型号查找基线，对比每台设备的 TotalTime 中位数，返回超出阈值的说明"""
+    regressions = []
+    for serial, device in report.items():
+        for mode, summary in device['modes'].items():
+            previous = baseline.get(device['model'], {}).get(mode, {}).get('TotalTime')
+            current = summary.get('TotalTime')
+            if not previous or not current:
+                continue
+            change = (current['median'] - previous['median']) / previous['median'] * 100
+            line = (f'{device_label(device["model"], serial)} {mode}: '
+                    f'{previous["median"]:.0f} ms → {current["median"]:.0f} ms ({change:+.1f}%)')
+            print(f'  {line}')
+            if change > threshold:
+                regressions.append(line)
+    return regressions
+
+
+def device_label(model: str, serial: str) -> str:
+    return f'{model} ({serial})' if model != serial else serial
+
+
+def update_baseline(baseline: dict, samples_by_model: dict) -> dict:
+    """基线按型号保存：同型号多台设备的样本合并统计，只替换本次测量的型号与模式，其他型号的基线保留"""
+    updated = {model: dict(modes) for model, modes in baseline.items()}
+    for model, modes in samples_by_model.items():
+        for mode, samples in modes.items():
+            updated.setdefault(model, {})[mode] = summarize(samples)
+    return updated
+
+
+def print_summary(key: str, mode: str, summary: dict):
+    """输出单个设备单个模式的统计"""
+    print(f'\n📱 {key} [{mode}] {summary["runs"]} 次')
+    for metric in METRICS:
+        if metric in summary:
+            m = summary[metric]
+            print(f'  {metric:<10} 中位数 {m["median"]:>7.0f} ms  P90 {m["p90"]:>7.0f} ms  '
+                  f'方差 {m["variance"]:>9.1f}  范围 {m["min"]}-{m["max"]} ms')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Android 启动耗时基准测试')
+    parser.add_argument('--runs', type=int, default=10, help='每种模式的启动次数')
+    parser.add_argument('--modes', type=str, default='cold,hot', help='测试模式: cold,hot')
+    parser.add_argument('--save-baseline', action='store_true', help='保存为基线')
+    parser.add_argument('--threshold', type=float, default=10.0, help='中位数允许增长的百分比')
+    parser.add_argument('--settle', type=float, default=SETTLE_SECONDS, help='两次启动间隔（秒）')
+    parser.add_argument('--adb', type=str, help='adb 可执行文件路径')
+    args = parser.parse_args()
+
+    adb = args.adb or os.environ.get('ADB') or 'adb'
+    modes = [m.strip() for m in args.modes.split(',') if m.strip() in ('cold', 'hot')]
+
+    try:
+        devices = get_connected_devices(adb)
+    except FileNotFoundError:
+        print('❌ adb 未找到，请确保已安装 Android SDK platform-tools')
+        sys.exit(1)
+    if not devices:
+        print('❌ 未检测到连接的 Android 设备')
+        sys.exit(1)
+
+    print(f'⏱️ 启动耗时测试: {len(devices)} 台设备, 模式 {",".join(modes)}, 每种 {args.runs} 次')
+    report = {}
+    samples_by_model = {}
+    for serial in devices:
+        model = get_device_model(adb, serial)
+        label = device_label(model, serial)
+        report[serial] = {'model': model, 'modes': {}}
+        for mode in modes:
+            samples = measure(adb, serial, mode, args.runs, args.settle)
+            if not samples:
+                print(f'❌ {label} [{mode}] 未获取到启动耗时，请确认应用已安装')
+                continue
+            summary = summarize(samples)
+            report[serial]['modes'][mode] = summary
+            samples_by_model.setdefault(model, {}).setdefault(mode, []).extend(samples)
+            print_summary(label, mode, summary)
+
+    output_dir = get_project_root() / 'output'
+    output_dir.mkdir(exist_ok=True)
+    (output_dir / 'startup-report.json').write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    baseline_path = get_cache_dir('reports') / 'startup-baseline.json'
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8')) if baseline_path.exists() else {}
+    regressions = []
+    if baseline:
+        print('\n📊 与基线对比 (TotalTime 中位数):')
+        regressions = compare(report, baseline, args.threshold)
+
+    if args.save_baseline and regressions:
+        print('\n⚠️ 检测到启动耗时回退，未保存基线（确认回退可接受后，可先删除基线文件再保存）: '
+              f'{baseline_path}')
+    elif args.save_baseline:
+        baseline_path.write_text(json.dumps(update_baseline(baseline, samples_by_model), indent=2), encoding='utf-8')
+        print(f'\n💾 已保存基线: {baseline_path}')
+
+    if regressions:
+        print(f'\n❌ 启动耗时回退超过 {args.threshold}%:')
+        for line in regressions:
+            print(f'  - {line}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
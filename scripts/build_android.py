@@ -4,43 +4,60 @@ Android APK 打包脚本
 将 React Native 项目打包成可安装的 Android APK
 
 使用方法:
-    python scripts/build_android.py [--release] [--clean] [--install] [--java-home PATH]
+    python scripts/build_android.py [--release | --variants LIST] [--clean] [--install] [--java-home PATH] [--size-budget SIZE]
 
 参数:
     --release       构建 Release 版本（默认 Debug）
+    --variants      一次构建多个变体，如 debug,release 或 prodRelease,stagingRelease；
+                    所有 assemble 任务在同一次 Gradle 调用中执行，产物分别输出到 output/<变体>/
     --clean         构建前清理缓存
     --install       构建完成后自动安装到连接的设备
-    --java-home     指定 Java 路径 (例如: /Library/Java/JavaVirtualMachines/jdk-17.jdk/Contents/Home)
+    --java-home     指定 Java 路径 (例如: /Library/Java/JavaVirtualMachines/jdk-17.jdk/Contents/Home)，默认自动查找 JDK 17
+    --webp-quality  将 JS 引用的图片转换为 WebP 的质量 (1-100)，需要 cwebp
+    --size-budget   单个 APK 相比上次构建允许的最大增长 (例如: 200KB、1MB、5%)，超出则构建失败
+    --no-delta      不生成相对上一次构建的增量包 (output/*.delta)
+    --no-snapshot   不使用 node_modules 快照，总是执行 yarn install
+    --build-cache   启动或复用本地 Gradle HTTP 构建缓存服务 (见 gradle_cache_server.py)
+    --build-cache-url  连接已有的 Gradle HTTP 构建缓存服务（上传需要设置与服务端相同的 GRADLE_CACHE_TOKEN）
+    --no-task-report   不记录 Gradle 任务耗时（默认输出 output/gradle-task-report.txt/json）
+    --ota           Release 构建后生成相对已发布 bundle 的热更新补丁 output/ota/<id>/（见 ota_patch.py），
+                    需要该原生版本已保存基准，并通过 OTA_SIGNING_KEY 指定签名私钥
+    --ota-ship      将本次 Release 构建的 bundle 保存为该原生版本的热更新基准（用于实际发布的 APK）
+    --no-manifest   不生成产物完整性清单 output/manifest.json（SHA-256 树哈希、大小、ABI、构建类型）
 """
 
 import os
+import re
 import sys
 import subprocess
 import shutil
 import argparse
 import secrets
+import socket
 import string
+import time
+import json
 from pathlib import Path
 from datetime import datetime
 
-# ============================================================
-# 配置区域 - 可根据需要修改
-# ============================================================
-
-# 默认 Java 路径，设置为 None 则使用系统默认 Java
-# 示例:
-#   macOS (Homebrew): '/opt/homebrew/opt/openjdk@17'
-#   macOS (Oracle):   '/Library/Java/JavaVirtualMachines/jdk-17.jdk/Contents/Home'
-#   Linux:            '/usr/lib/jvm/java-17-openjdk'
-#   Windows:          'C:\\Program Files\\Java\\jdk-17'
-DEFAULT_JAVA_HOME: str | None = '/opt/homebrew/Cellar/openjdk@17/17.0.15/libexec/openjdk.jdk/Contents/Home'
-
-# ============================================================
-
-
-def get_project_root() -> Path:
-    """获取项目根目录"""
-    return Path(__file__).parent.parent
+from toolchain import (
+    DEFAULT_JAVA_HOME,
+    MIN_JAVA_VERSION,
+    PREFERRED_JAVA_VERSION,
+    check_sdk_components,
+    get_cache_dir,
+    get_connected_devices,
+    get_project_root,
+    get_release_source_dir,
+    install_dependencies,
+    read_gradle_sdk_versions,
+    resolve_toolchain,
+    run_step,
+    setup_java_home,
+    toolchain_env,
+)
+
+# 分析、缓存与发布相关的模块在用到的步骤中才导入，cli.py build-android 只加载本次构建需要的模块
 
 
 def generate_password(length: int = 16) -> str:
@@ -123,45 +140,49 @@ keyPassword={key_password}
     print(f'  ✅ 配置文件已生成: {config_path}\n')
 
 
-def check_environment():
-    """检查构建环境"""
+def check_environment(toolchain: dict):
+    """检查构建环境（版本探测结果有缓存，工具未变化时不启动子进程）
+
+    SDK 组件按 android/build.gradle 中的版本直接核对 source.properties，在执行耗时步骤前失败
+    """
     print('🔍 检查构建环境...')
 
     errors = []
 
     # 检查 Node.js
-    try:
-        result = subprocess.run(['node', '--version'], capture_output=True, text=True)
-        print(f'  ✅ Node.js: {result.stdout.strip()}')
-    except FileNotFoundError:
+    if toolchain['node'] is not None:
+        print(f'  ✅ Node.js: {toolchain["node"]}')
+    else:
         errors.append('Node.js 未安装')
 
     # 检查 npm/yarn
-    try:
-        result = subprocess.run(['yarn', '--version'], capture_output=True, text=True)
-        print(f'  ✅ Yarn: {result.stdout.strip()}')
-    except FileNotFoundError:
-        try:
-            result = subprocess.run(['npm', '--version'], capture_output=True, text=True)
-            print(f'  ✅ npm: {result.stdout.strip()}')
-        except FileNotFoundError:
-            errors.append('npm 或 yarn 未安装')
-
-    # 检查 ANDROID_HOME
-    android_home = os.environ.get('ANDROID_HOME') or os.environ.get('ANDROID_SDK_ROOT')
-    if android_home and os.path.exists(android_home):
-        print(f'  ✅ Android SDK: {android_home}')
+    if toolchain['yarn'] is not None:
+        print(f'  ✅ Yarn: {toolchain["yarn"]}')
+    elif toolchain['npm'] is not None:
+        print(f'  ✅ npm: {toolchain["npm"]}')
+    else:
+        errors.append('npm 或 yarn 未安装')
+
+    # 检查 Android SDK
+    if toolchain['android_sdk']:
+        versions = read_gradle_sdk_versions()
+        sdk_errors = check_sdk_components(toolchain['android_sdk'], versions)
+        if sdk_errors:
+            errors.extend(sdk_errors)
+        else:
+            components = ', '.join(f'{name}={value}' for name, value in versions.items())
+            print(f'  ✅ Android SDK: {toolchain["android_sdk"]} ({components})')
     else:
-        errors.append('ANDROID_HOME 环境变量未设置或路径不存在')
+        errors.append('未找到 Android SDK，请设置 ANDROID_HOME 或在 android/local.properties 中配置 sdk.dir')
 
     # 检查 Java
-    try:
-        result = subprocess.run(['java', '-version'], capture_output=True, text=True)
-        # Java 版本信息输出到 stderr
-        java_version = result.stderr.split('\n')[0] if result.stderr else result.stdout.split('\n')[0]
-        print(f'  ✅ Java: {java_version}')
-    except FileNotFoundError:
-        errors.append('Java 未安装')
+    java_version = toolchain['java_version']
+    if java_version is None:
+        errors.append(f'未找到 JDK {PREFERRED_JAVA_VERSION}，请安装或通过 --java-home 指定')
+    elif java_version < MIN_JAVA_VERSION:
+        errors.append(f'JDK 版本过低: {java_version}（{toolchain["java_home"]}），需要 {MIN_JAVA_VERSION}+')
+    else:
+        print(f'  ✅ Java {java_version}: {toolchain["java_home"]}')
 
     if errors:
         print('\n❌ 环境检查失败:')
@@ -169,26 +190,7 @@ def check_environment():
             print(f'  - {error}')
         sys.exit(1)
 
-    print('  ✅ 环境检查通过\n')
-
-
-def install_dependencies():
-    """安装项目依赖"""
-    print('📦 安装项目依赖...')
-    project_root = get_project_root()
-
-    # 优先使用 yarn
-    if shutil.which('yarn'):
-        cmd = ['yarn', 'install']
-    else:
-        cmd = ['npm', 'install']
-
-    result = subprocess.run(cmd, cwd=project_root)
-    if result.returncode != 0:
-        print('❌ 依赖安装失败')
-        sys.exit(1)
-
-    print('  ✅ 依赖安装完成\n')
+    print('  ✅ 环境检查通过')
 
 
 def clean_build():
@@ -217,38 +219,175 @@ def clean_build():
     print('  ✅ 清理完成\n')
 
 
-def build_bundle():
-    """构建 JavaScript Bundle"""
+# 与 React Native Gradle 插件 (BundleHermesCTask) 一致的 hermesc 参数
+HERMESC_FLAGS = ['-O', '-output-source-map']
+HERMESC_OS_DIRS = {'darwin': 'osx-bin', 'linux': 'linux64-bin', 'win32': 'win64-bin'}
+
+# 变体名: debug / release，或 <flavor>Debug / <flavor>Release
+VARIANT_PATTERN = re.compile(r'(?:(?P<flavor>[a-z][A-Za-z0-9]*?)(?P<flavor_type>Debug|Release))|(?P<type>debug|release)')
+
+
+def is_hermes_enabled() -> bool:
+    """读取 android/gradle.properties 中的 hermesEnabled（React Native 默认启用）"""
+    properties = get_project_root() / 'android' / 'gradle.properties'
+    if properties.exists():
+        for line in properties.read_text(encoding='utf-8').splitlines():
+            key, _, value = line.partition('=')
+            if key.strip() == 'hermesEnabled':
+                return value.strip().lower() == 'true'
+    return True
+
+
+def find_hermesc() -> Path | None:
+    """查找 react-native 自带的 hermesc"""
+    node_modules = get_project_root() / 'node_modules'
+    os_dir = HERMESC_OS_DIRS.get(sys.platform, 'linux64-bin')
+    name = 'hermesc.exe' if sys.platform == 'win32' else 'hermesc'
+    for candidate in (
+        node_modules / 'react-native' / 'sdks' / 'hermesc' / os_dir / name,
+        node_modules / 'hermes-compiler' / 'hermesc' / os_dir / name,
+    ):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def build_bundle(webp_quality: int | None = None):
+    """构建 JavaScript Bundle
+
+    与 Gradle 插件的 createBundleReleaseJsAndAssets 产出相同的内容：Metro 打包后（启用 Hermes 时）
+    使用 hermesc 编译为字节码并合并 source map，因此 build_apk 可以跳过该任务，整个构建只运行一次 Metro
+    """
+    import metro_cache
+
     print('📜 构建 JavaScript Bundle...')
     project_root = get_project_root()
     android_dir = project_root / 'android'
+    hermes = is_hermes_enabled()
 
-    # 确保 assets 目录存在
-    assets_dir = android_dir / 'app' / 'src' / 'main' / 'assets'
+    hermesc = find_hermesc() if hermes else None
+    if hermes and hermesc is None:
+        print('❌ 未找到 hermesc (node_modules/react-native/sdks/hermesc)，请先安装依赖')
+        sys.exit(1)
+
+    # bundle 与图片资源写入 Release 专用的 source set，同时构建的 Debug 变体不会带上 Release bundle
+    release_dir = get_release_source_dir()
+    assets_dir = release_dir / 'assets'
+    res_dir = release_dir / 'res'
     assets_dir.mkdir(parents=True, exist_ok=True)
+    # 旧版本写在 src/main/assets 中的 bundle 会被所有变体打包
+    (android_dir / 'app' / 'src' / 'main' / 'assets' / 'index.android.bundle').unlink(missing_ok=True)
 
-    # 构建 bundle
+    # Metro 输出的 JS bundle 与 source map 放在构建目录，最终 source map 输出到 output 目录，不打进 APK
+    js_dir = android_dir / 'app' / 'build' / 'generated' / 'js' / 'release'
+    js_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = project_root / 'output'
+    output_dir.mkdir(exist_ok=True)
+    js_bundle_path = js_dir / 'index.android.bundle'
+    packager_map_path = js_dir / 'index.android.bundle.packager.map'
+    bundle_path = assets_dir / 'index.android.bundle'
+    sourcemap_path = output_dir / 'index.android.bundle.map'
+
+    # 构建 bundle（Hermes 会自行优化，与 Gradle 插件一样不做 minify）
     cmd = [
         'npx', 'react-native', 'bundle',
         '--platform', 'android',
         '--dev', 'false',
         '--entry-file', 'index.js',
-        '--bundle-output', str(assets_dir / 'index.android.bundle'),
-        '--assets-dest', str(android_dir / 'app' / 'src' / 'main' / 'res'),
+        '--bundle-output', str(js_bundle_path),
+        '--sourcemap-output', str(packager_map_path),
+        '--assets-dest', str(res_dir),
     ]
+    if hermes:
+        cmd += ['--minify', 'false']
 
-    result = subprocess.run(cmd, cwd=project_root)
-    if result.returncode != 0:
-        print('❌ Bundle 构建失败')
-        sys.exit(1)
+    # 使用项目级 Metro 转换缓存，CI 可通过 metro_cache.py export/import 保存与恢复
+    metro_cache_dir = metro_cache.activate(project_root)
+    print(f'  🗃️ Metro 缓存: {metro_cache_dir}')
+    run_step(cmd, project_root, 'Bundle 构建失败', label='metro-bundle')
+    metro_cache.print_prune_stats(metro_cache.prune(keep=metro_cache_dir), metro_cache.DEFAULT_MAX_SIZE)
+
+    if hermes:
+        compile_hermes_bundle(hermesc, js_bundle_path, packager_map_path, bundle_path, sourcemap_path)
+    else:
+        shutil.copyfile(js_bundle_path, bundle_path)
+        shutil.copyfile(packager_map_path, sourcemap_path)
 
     print('  ✅ Bundle 构建完成\n')
+    optimize_bundle_assets(res_dir, webp_quality)
+    report_bundle_composition(js_bundle_path, packager_map_path, output_dir)
+
+
+def compile_hermes_bundle(hermesc: Path, js_bundle: Path, packager_map: Path, bundle_path: Path,
+                          sourcemap_path: Path):
+    """使用 hermesc 编译字节码，并将 Metro 与 hermesc 的 source map 合并为最终 source map"""
+    print('  ⚙️ 编译 Hermes 字节码...')
+    project_root = get_project_root()
+    bytecode = js_bundle.with_suffix('.hbc')
+    run_step([str(hermesc), '-w', '-emit-binary', '-max-diagnostic-width=80', '-out', str(bytecode),
+              str(js_bundle), *HERMESC_FLAGS], project_root, 'Hermes 字节码编译失败')
+    shutil.copyfile(bytecode, bundle_path)
 
+    compose_script = project_root / 'node_modules' / 'react-native' / 'scripts' / 'compose-source-maps.js'
+    compiler_map = bytecode.with_name(bytecode.name + '.map')
+    run_step(['node', str(compose_script), str(packager_map), str(compiler_map), '-o', str(sourcemap_path)],
+             project_root, 'Source map 合并失败')
 
-def build_apk(release: bool = False):
-    """构建 APK"""
-    build_type = 'Release' if release else 'Debug'
-    print(f'🔨 构建 {build_type} APK...')
+
+def optimize_bundle_assets(res_dir: Path, webp_quality: int | None = None):
+    """无损压缩 bundle 输出的图片（可选转 WebP），按内容哈希缓存处理结果"""
+    import optimize_assets
+
+    print('🖼️ 优化 Bundle 图片资源...')
+    stats = optimize_assets.optimize_assets(res_dir, get_cache_dir('assets'), webp_quality)
+    optimize_assets.print_stats(stats)
+    print()
+
+
+def report_bundle_composition(bundle_path: Path, sourcemap_path: Path, output_dir: Path):
+    """按模块/包统计 bundle 体积（编译前的 JS），写出文本与 JSON 报告"""
+    if not bundle_path.exists() or not sourcemap_path.exists():
+        return
+    import bundle_analyzer
+
+    print('📊 分析 Bundle 构成...')
+    report = bundle_analyzer.analyze_bundle(bundle_path, sourcemap_path, get_project_root())
+    text_path, json_path = bundle_analyzer.write_reports(report, output_dir)
+
+    print(f'  📜 Bundle 大小: {report["total_bytes"] / 1024:.1f} KB')
+    print('  最大的包:')
+    for name, entry in bundle_analyzer.sort_items(report['packages'], 'bytes', 'size')[:10]:
+        print(f'    {name:<40}{entry["bytes"] / 1024:>10.1f} KB')
+    print(f'  📄 报告: {text_path.name}, {json_path.name}\n')
+
+
+def parse_variant(name: str) -> dict:
+    """解析变体名，返回 Gradle 任务与 APK 输出目录等信息"""
+    match = VARIANT_PATTERN.fullmatch(name)
+    if not match:
+        raise ValueError(f'无效的变体: {name}（应为 debug、release 或 <flavor>Debug / <flavor>Release）')
+    build_type = (match.group('type') or match.group('flavor_type')).lower()
+    flavor = match.group('flavor')
+    capitalized = name[0].upper() + name[1:]
+    apk_dir = get_project_root() / 'android' / 'app' / 'build' / 'outputs' / 'apk'
+    return {
+        'name': name,
+        'release': build_type == 'release',
+        'task': f'assemble{capitalized}',
+        # 与 Gradle 插件的 createBundle<Variant>JsAndAssets 对应，Release 构建时由 build_bundle 完成打包
+        'bundle_task': f'createBundle{capitalized}JsAndAssets',
+        'apk_dir': apk_dir / flavor / build_type if flavor else apk_dir / build_type,
+    }
+
+
+def build_apk(variants: list[dict], skip_bundle_task: bool = False, gradle_args: list[str] | None = None):
+    """在一次 Gradle 调用中构建所有变体的 APK（配置阶段只执行一次）
+
+    skip_bundle_task 时 bundle 已由 build_bundle 生成，跳过 Release 变体中 Gradle 插件的重复打包任务；
+    gradle_args 为额外的 Gradle 参数（构建缓存、任务耗时记录的 init script 等）
+    """
+    names = ', '.join(variant['name'] for variant in variants)
+    print(f'🔨 构建 APK ({names})...')
 
     project_root = get_project_root()
     android_dir = project_root / 'android'
@@ -259,23 +398,89 @@ def build_apk(release: bool = False):
         os.chmod(gradlew, 0o755)
 
     # 构建命令
-    task = f'assemble{build_type}'
-    cmd = ['./gradlew', task, '--no-daemon']
+    cmd = ['./gradlew', *(variant['task'] for variant in variants), '--no-daemon']
+    if skip_bundle_task:
+        for variant in variants:
+            if variant['release']:
+                cmd += ['-x', variant['bundle_task']]
+    cmd += gradle_args or []
+
+    label = 'gradle-' + '-'.join(variant['task'] for variant in variants)
+    run_step(cmd, android_dir, f'APK 构建失败 ({names})', label=label)
+
+    print(f'  ✅ APK 构建完成 ({names})\n')
+
+
+def setup_build_cache(cache_url: str | None) -> tuple[str, str, Path] | None:
+    """启动或连接 HTTP 构建缓存，返回 (服务地址, 客户端标识, init script)"""
+    import gradle_cache_server
+
+    print('🗄️ 接入 Gradle HTTP 构建缓存...')
+    if cache_url is None:
+        if not gradle_cache_server.ensure_server():
+            print('  ⚠️ 本地缓存服务启动失败，本次构建不使用远程缓存\n')
+            return None
+        cache_url = f'http://127.0.0.1:{gradle_cache_server.DEFAULT_PORT}'
+        token = gradle_cache_server.load_token()
+    else:
+        token = os.environ.get(gradle_cache_server.TOKEN_ENV)
+        if not token:
+            print(f'  ⚠️ 未设置 {gradle_cache_server.TOKEN_ENV}，只读取缓存，不上传任务输出')
 
-    result = subprocess.run(cmd, cwd=android_dir)
-    if result.returncode != 0:
-        print(f'❌ {build_type} APK 构建失败')
-        sys.exit(1)
+    # 每次构建使用独立的客户端标识，服务端据此统计本次构建的命中率
+    client = f'{socket.gethostname()}-{os.getpid()}'
+    init_script = gradle_cache_server.write_init_script(cache_url, client, token)
+    print(f'  ✅ {cache_url} (客户端 {client})\n')
+    return cache_url, client, init_script
 
-    print(f'  ✅ {build_type} APK 构建完成\n')
 
+def task_timing_args() -> tuple[list[str], Path]:
+    """注入记录任务耗时的 init script，返回 (Gradle 参数, 原始数据路径)"""
+    import gradle_task_report
+
+    state_dir = get_project_root() / 'android' / 'build' / 'task-timing'
+    raw_path = state_dir / 'tasks.json'
+    raw_path.unlink(missing_ok=True)
+    init_script = gradle_task_report.write_init_script(state_dir / 'init.gradle', raw_path)
+    return ['--init-script', str(init_script)], raw_path
 
-def get_apk_path(release: bool = False) -> Path:
-    """获取生成的 APK 路径"""
-    project_root = get_project_root()
-    build_type = 'release' if release else 'debug'
 
-    apk_dir = project_root / 'android' / 'app' / 'build' / 'outputs' / 'apk' / build_type
+def report_gradle_tasks(raw_path: Path, variants: list[str] | None = None) -> dict | None:
+    """生成任务耗时、关键路径与缓存未命中报告"""
+    if not raw_path.exists():
+        return None
+    import gradle_task_report
+
+    print('🕒 分析 Gradle 任务耗时...')
+    report = gradle_task_report.analyze(json.loads(raw_path.read_text(encoding='utf-8')), variants=variants)
+    output_dir = get_project_root() / 'output'
+    output_dir.mkdir(exist_ok=True)
+    text_path, json_path = gradle_task_report.write_reports(report, output_dir)
+
+    print(f'  {report["tasks"]} 个任务, 总耗时 {report["wall_seconds"]:.1f}s, 关键路径 {report["critical_seconds"]:.1f}s')
+    print('  最慢的任务:')
+    for task in report['slowest'][:5]:
+        print(f'    {task["duration"]:>7.1f}s  {task["status"]:<11}{task["path"]}')
+    print(f'  未命中缓存 {len(report["cache_misses"])} 个任务')
+    print(f'  📄 报告: {text_path.name}, {json_path.name}\n')
+    return report
+
+
+def report_build_cache(cache_url: str, client: str):
+    """输出本次构建的缓存命中率"""
+    import gradle_cache_server
+
+    stats = gradle_cache_server.fetch_stats(cache_url, client)
+    if stats is None:
+        return
+    lookups = stats['hits'] + stats['misses']
+    rate = stats['hits'] / lookups if lookups else 0
+    print(f'🗄️ 构建缓存: 命中 {stats["hits"]}, 未命中 {stats["misses"]} (命中率 {rate:.1%}), 上传 {stats["puts"]}\n')
+
+
+def get_apk_path(variant: dict) -> Path:
+    """获取生成的 APK 路径"""
+    apk_dir = variant['apk_dir']
 
     # 查找 APK 文件
     if apk_dir.exists():
@@ -285,8 +490,8 @@ def get_apk_path(release: bool = False) -> Path:
     return None
 
 
-def clean_output_dir():
-    """清空输出目录"""
+def clean_output_dir(variant_dirs: list[Path] | None = None):
+    """清空输出目录（以及本次构建的各变体输出目录）"""
     print('🗑️ 清空输出目录...')
     project_root = get_project_root()
     output_dir = project_root / 'output'
@@ -297,22 +502,22 @@ def clean_output_dir():
             if file.is_file():
                 file.unlink()
                 print(f'  已删除: {file.name}')
+        for variant_dir in variant_dirs or []:
+            if variant_dir.exists():
+                shutil.rmtree(variant_dir)
+                print(f'  已删除: {variant_dir.name}/')
         print('  ✅ 输出目录已清空\n')
     else:
         print('  输出目录不存在，跳过清理\n')
 
 
-def copy_apk_to_output(release: bool = False) -> list:
-    """复制所有 APK 到输出目录"""
-    project_root = get_project_root()
-    output_dir = project_root / 'output'
-    output_dir.mkdir(exist_ok=True)
-
-    build_type = 'release' if release else 'debug'
-    apk_dir = project_root / 'android' / 'app' / 'build' / 'outputs' / 'apk' / build_type
+def copy_apk_to_output(variant: dict, output_dir: Path) -> list:
+    """复制变体的所有 APK 到输出目录"""
+    output_dir.mkdir(parents=True, exist_ok=True)
 
+    apk_dir = variant['apk_dir']
     if not apk_dir.exists():
-        print('❌ 未找到 APK 输出目录')
+        print(f'❌ 未找到 APK 输出目录 ({variant["name"]})')
         return []
 
     # 复制所有 APK 文件
@@ -330,18 +535,73 @@ def copy_apk_to_output(release: bool = False) -> list:
     return copied_files
 
 
-def install_apk(release: bool = False):
+def report_apk_sizes(apk_files: list, variant: str, output_dir: Path, budget: str | None = None) -> bool:
+    """分析 APK 体积构成并与上一次构建对比，超出预算时返回 False"""
+    if not apk_files:
+        return True
+    import apk_analyzer
+
+    print(f'📊 分析 APK 体积构成 ({variant})...')
+    baseline_path = get_cache_dir('reports') / f'apk-size-{variant}.json'
+
+    report = apk_analyzer.build_report(apk_files)
+    baseline = apk_analyzer.load_report(baseline_path)
+    apk_analyzer.print_report(report, baseline)
+
+    report_path = output_dir / f'apk-size-{variant}.json'
+    report_path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f'\n  📄 体积报告: {report_path}')
+
+    if budget and baseline:
+        violations = apk_analyzer.check_budget(report, baseline, budget)
+        if violations:
+            print('\n❌ APK 体积超出预算:')
+            for violation in violations:
+                print(f'  - {violation}')
+            # 超出预算时保留旧基线，下次构建仍与其对比
+            return False
+
+    baseline_path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print('  ✅ 体积分析完成\n')
+    return True
+
+
+def publish_apk_deltas(apk_files: list):
+    """生成相对上一次构建的增量包，供测试人员只下载变化部分"""
+    if not apk_files:
+        return
+    import artifact_delta
+
+    print('🧩 生成增量包...')
+    results = artifact_delta.publish_deltas(apk_files, get_cache_dir('artifacts'))
+    if results:
+        artifact_delta.print_deltas(results)
+        print('  应用方式: python scripts/artifact_delta.py apply <旧 APK> <增量包> <新 APK>')
+    else:
+        print('  首次构建，已保存为下一次的增量基准')
+    print()
+
+
+def write_manifest(output_root: Path):
+    """为 output/ 中的所有产物生成完整性清单 manifest.json"""
+    import artifact_manifest
+
+    print('🔏 生成产物清单...')
+    artifact_manifest.print_manifest(artifact_manifest.create_manifest(output_root), output_root)
+    print()
+
+
+def install_apk(variant: dict):
     """安装 APK 到连接的设备"""
-    print('📱 安装 APK 到设备...')
+    print(f'📱 安装 APK 到设备 ({variant["name"]})...')
 
-    apk_path = get_apk_path(release)
+    apk_path = get_apk_path(variant)
     if not apk_path:
         print('❌ 未找到 APK 文件')
         return False
 
     # 检查 adb 设备
-    result = subprocess.run(['adb', 'devices'], capture_output=True, text=True)
-    devices = [line for line in result.stdout.split('\n') if '\tdevice' in line]
+    devices = get_connected_devices()
 
     if not devices:
         print('❌ 未检测到连接的 Android 设备')
@@ -365,93 +625,181 @@ def install_apk(release: bool = False):
         return False
 
 
-def setup_java_home(java_home: str):
-    """设置 JAVA_HOME 环境变量"""
-    if not java_home:
-        return
+def print_variant_summary(results: list[dict], task_report: dict | None, elapsed: float):
+    """输出各变体的产物体积与 Gradle 任务耗时"""
+    from gradle_task_report import SHARED_VARIANT
 
-    java_path = Path(java_home)
-    if not java_path.exists():
-        print(f'❌ 指定的 Java 路径不存在: {java_home}')
-        sys.exit(1)
+    print('📊 变体汇总:')
+    seconds = (task_report or {}).get('variants', {})
+    for result in results:
+        size_mb = sum(apk.stat().st_size for apk in result['files']) / (1024 * 1024)
+        line = f'  {result["name"]:<24}{len(result["files"]):>3} 个 APK  {size_mb:>9.2f} MB'
+        if result['name'] in seconds:
+            line += f'  任务耗时 {seconds[result["name"]]["seconds"]:>7.1f}s'
+        print(line)
+    if SHARED_VARIANT in seconds:
+        print(f'  {SHARED_VARIANT:<24}任务耗时 {seconds[SHARED_VARIANT]["seconds"]:.1f}s')
+    print(f'  ⏱️ 总耗时 {elapsed:.0f}s（{len(results)} 个变体，一次 Gradle 调用）\n')
 
-    # 验证是否是有效的 Java 目录
-    java_bin = java_path / 'bin' / 'java'
-    if not java_bin.exists() and not (java_path / 'bin' / 'java.exe').exists():
-        print(f'❌ 指定的路径不是有效的 Java 目录: {java_home}')
-        print('   请确保路径指向 JAVA_HOME (包含 bin/java)')
-        sys.exit(1)
 
-    os.environ['JAVA_HOME'] = str(java_path)
-    # 将 Java bin 目录添加到 PATH 前面
-    os.environ['PATH'] = str(java_path / 'bin') + os.pathsep + os.environ.get('PATH', '')
-    print(f'☕ 使用指定的 Java: {java_home}\n')
+def size_budget_arg(value: str) -> str:
+    """--size-budget 的参数类型（指定时才导入 apk_analyzer）"""
+    import apk_analyzer
+
+    return apk_analyzer.budget_arg(value)
 
 
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='Android APK 打包脚本')
-    parser.add_argument('--release', action='store_true', help='构建 Release 版本')
+    variant_group = parser.add_mutually_exclusive_group()
+    variant_group.add_argument('--release', action='store_true', help='构建 Release 版本')
+    variant_group.add_argument('--variants', type=str, help='一次构建多个变体，逗号分隔，如 debug,release')
     parser.add_argument('--clean', action='store_true', help='构建前清理缓存')
-    parser.add_argument('--install', action='store_true', help='构建后自动安装到设备')
+    parser.add_argument('--install', action='store_true', help='构建后自动安装到设备（多个变体时安装第一个）')
     parser.add_argument('--skip-deps', action='store_true', help='跳过依赖安装')
+    parser.add_argument('--no-snapshot', action='store_true', help='不使用 node_modules 快照，总是执行 yarn install')
     parser.add_argument('--java-home', type=str, help='指定 Java 路径')
+    parser.add_argument('--webp-quality', type=int, choices=range(1, 101), metavar='1-100',
+                        help='将 bundle 图片转换为 WebP 的质量（需要 cwebp）')
+    parser.add_argument('--no-delta', action='store_true', help='不生成相对上一次构建的增量包')
+    parser.add_argument('--size-budget', type=size_budget_arg, help='单个 APK 相比上次构建允许的最大增长，如 200KB 或 5%%')
+    parser.add_argument('--build-cache', action='store_true', help='启动或复用本地 Gradle HTTP 构建缓存服务')
+    parser.add_argument('--build-cache-url', type=str, help='连接已有的 Gradle HTTP 构建缓存服务，如 http://host:5071')
+    parser.add_argument('--no-task-report', action='store_true', help='不记录 Gradle 任务耗时')
+    ota_group = parser.add_mutually_exclusive_group()
+    ota_group.add_argument('--ota', action='store_true', help='生成 JS 热更新补丁（Release）')
+    ota_group.add_argument('--ota-ship', action='store_true', help='将本次 Release 构建保存为热更新基准')
+    parser.add_argument('--no-manifest', action='store_true', help='不生成产物完整性清单')
     args = parser.parse_args()
 
-    build_type = 'Release' if args.release else 'Debug'
+    names = args.variants.split(',') if args.variants else ['release' if args.release else 'debug']
+    try:
+        variants = [parse_variant(name.strip()) for name in dict.fromkeys(names) if name.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+    if not variants:
+        parser.error('--variants 至少需要指定一个变体')
+    release = any(variant['release'] for variant in variants)
+    # 热更新补丁的前置条件在构建前检查，避免完整构建后才失败
+    if args.ota and release:
+        import ota_patch
+
+        if not os.environ.get(ota_patch.SIGNING_KEY_ENV):
+            parser.error(f'--ota 需要通过 {ota_patch.SIGNING_KEY_ENV} 指定签名私钥')
+        if ota_patch.load_base(ota_patch.read_native_version()) is None:
+            parser.error('--ota 需要该原生版本已保存的热更新基准（构建发布的 APK 时使用 --ota-ship）')
+
+    # 单个变体保持原有的输出位置，多个变体分别输出到 output/<变体>/
+    output_root = get_project_root() / 'output'
+    multi = len(variants) > 1
+    for variant in variants:
+        variant['output_dir'] = output_root / variant['name'] if multi else output_root
 
     print('=' * 50)
-    print(f'🚀 开始构建 Android {build_type} APK')
+    print(f'🚀 开始构建 Android APK ({", ".join(variant["name"] for variant in variants)})')
     print('=' * 50 + '\n')
+    build_start = time.perf_counter()
 
-    # 0. 设置 Java 路径（命令行参数优先，否则使用默认配置）
+    # 0. 查找工具链（命令行参数优先，其次默认配置，否则自动查找 JDK）
     java_home = args.java_home or DEFAULT_JAVA_HOME
     if java_home:
         setup_java_home(java_home)
+    preflight_start = time.perf_counter()
+    toolchain = resolve_toolchain(java_home)
 
-    # 1. 检查环境
-    check_environment()
+    # 1. 检查环境，并让 Gradle 使用找到的 JDK 与 SDK
+    check_environment(toolchain)
+    print(f'  ⏱️ 环境检查耗时 {time.perf_counter() - preflight_start:.2f}s\n')
+    os.environ.update(toolchain_env(toolchain))
 
-    # 2. 安装依赖
+    # 2. 安装依赖（所有变体共用）
     if not args.skip_deps:
-        install_dependencies()
+        install_dependencies(use_snapshot=not args.no_snapshot)
 
     # 3. 清空输出目录
-    clean_output_dir()
+    clean_output_dir([variant['output_dir'] for variant in variants] if multi else None)
 
     # 4. 清理缓存（可选）
     if args.clean:
         clean_build()
 
-    # 5. 生成签名密钥（Release 模式需要，每次都生成新的）
-    if args.release:
+    # 5. 生成签名密钥（Release 变体需要，每次都生成新的）
+    if release:
         generate_keystore()
 
-    # 6. 构建 JS Bundle（Release 模式需要）
-    if args.release:
-        build_bundle()
+    # 6. 构建 JS Bundle（Release 变体需要，所有 Release 变体共用 src/release 中的同一份 bundle）
+    if release:
+        build_bundle(args.webp_quality)
+
+    # 7. 构建 APK（记录任务耗时，可选接入 HTTP 构建缓存）
+    gradle_args, task_timing_path = task_timing_args() if not args.no_task_report else ([], None)
+    build_cache = setup_build_cache(args.build_cache_url) if args.build_cache or args.build_cache_url else None
+    if build_cache:
+        gradle_args += ['--build-cache', '--init-script', str(build_cache[2])]
+    try:
+        build_apk(variants, skip_bundle_task=True, gradle_args=gradle_args)
+    finally:
+        # init script 中有上传令牌，构建失败时也要删除
+        if build_cache:
+            build_cache[2].unlink(missing_ok=True)
+    task_report = None
+    if task_timing_path:
+        task_report = report_gradle_tasks(task_timing_path, [variant['name'] for variant in variants] if multi else None)
+    if build_cache:
+        report_build_cache(build_cache[0], build_cache[1])
+
+    results = []
+    within_budget = True
+    for variant in variants:
+        # 8. 复制到输出目录
+        output_files = copy_apk_to_output(variant, variant['output_dir'])
+        results.append({'name': variant['name'], 'files': output_files})
+
+        # 9. 体积分析，超出预算则构建失败（检查完所有变体后再退出）
+        if not report_apk_sizes(output_files, variant['name'], variant['output_dir'], args.size_budget):
+            within_budget = False
+            continue
+
+        # 10. 增量包
+        if not args.no_delta:
+            publish_apk_deltas(output_files)
+
+    if multi:
+        print_variant_summary(results, task_report, time.perf_counter() - build_start)
+    if not within_budget:
+        sys.exit(1)
+
+    # 11. JS 热更新：保存发布基准，或生成相对基准的补丁（可选，基于本次 build_bundle 的产出）
+    if (args.ota or args.ota_ship) and release:
+        import ota_patch
 
-    # 7. 构建 APK
-    build_apk(args.release)
+        native_version = ota_patch.read_native_version()
+        if args.ota_ship:
+            print(f'🛰️ 已保存原生版本 {native_version} 的热更新基准: {ota_patch.ship(native_version)}\n')
+        else:
+            ota_patch.run_pipeline(native_version, output_root)
 
-    # 8. 复制到输出目录
-    output_files = copy_apk_to_output(args.release)
+    # 12. 完整性清单（覆盖 output/ 中的所有产物）
+    if not args.no_manifest:
+        write_manifest(output_root)
 
-    # 9. 安装到设备（可选）
+    # 13. 安装到设备（可选）
     if args.install:
-        install_apk(args.release)
+        install_apk(variants[0])
 
     # 完成
     print('=' * 50)
     print('✅ 构建完成!')
     print('=' * 50)
 
+    output_files = [apk for result in results for apk in result['files']]
     if output_files:
         print(f'\n📦 APK 文件位置 ({len(output_files)} 个):')
         for apk_path in output_files:
             size_mb = apk_path.stat().st_size / (1024 * 1024)
-            print(f'   {apk_path.name} ({size_mb:.2f} MB)')
-        print(f'\n📁 输出目录: {get_project_root() / "output"}')
+            print(f'   {apk_path.relative_to(output_root)} ({size_mb:.2f} MB)')
+        print(f'\n📁 输出目录: {output_root}')
 
     if not args.install:
         print('\n💡 提示: 使用 --install 参数可自动安装到连接的设备')
@@ -4,11 +4,17 @@ iOS IPA 打包脚本
 将 React Native 项目打包成可安装的 iOS IPA
 
 使用方法:
-    python scripts/build_ios.py [--clean] [--install]
+    python scripts/build_ios.py [--clean] [--install] [--compression PRESET]
 
 参数:
     --clean         构建前清理缓存
     --install       构建完成后自动安装到连接的设备（需要 ios-deploy）
+    --compression   未签名 IPA 的压缩策略: store / fast / balanced / max（默认 balanced）
+    --no-delta      不生成相对上一次构建的增量包 (output/*.delta)
+    --no-snapshot   不使用 node_modules 快照，总是执行 yarn install
+    --compile-timing  开启单文件编译计时（clang -ftime-report、Swift -driver-time-compilation），报告最慢的源文件
+    --no-build-report 不分析 xcodebuild 输出（默认输出 output/xcodebuild-report.txt/json）
+    --no-manifest   不生成产物完整性清单 output/manifest.json（SHA-256 树哈希、大小、构建类型）
 
 注意:
     - 需要在 macOS 上运行
@@ -21,9 +27,20 @@ import sys
 import subprocess
 import shutil
 import argparse
+import math
+import time
+import zipfile
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
 
+import artifact_delta
+import artifact_manifest
+import metro_cache
+import process_runner
+import xcodebuild_log
+from toolchain import get_cache_dir, get_project_root, install_dependencies, probe_version, resolve_toolchain, run_step
+
 # ============================================================
 # 配置区域 - 可根据需要修改
 # ============================================================
@@ -33,12 +50,29 @@ WORKSPACE_NAME = 'storeverserepoApp.xcworkspace'
 SCHEME_NAME = 'storeverserepoApp'
 CONFIGURATION = 'Release'
 
-# ============================================================
-
+# IPA 压缩策略预设
+#   level:              可压缩文件使用的 deflate 级别，None 表示全部仅存储
+#   entropy_threshold:  未知类型文件的采样熵（bits/byte）不低于该值时视为已压缩，直接存储
+COMPRESSION_PRESETS = {
+    'store': {'level': None, 'entropy_threshold': 0.0},
+    'fast': {'level': 1, 'entropy_threshold': 7.0},
+    'balanced': {'level': 6, 'entropy_threshold': 7.5},
+    'max': {'level': 9, 'entropy_threshold': 7.9},
+}
+DEFAULT_COMPRESSION_PRESET = 'balanced'
+
+# 已压缩格式，重复 deflate 几乎没有收益
+STORED_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.heic', '.car',
+    '.mp3', '.mp4', '.m4a', '.mov', '.zip', '.gz', '.ttf', '.otf', '.woff', '.woff2',
+}
+# 文本类格式，压缩收益明显
+TEXT_EXTENSIONS = {'.js', '.json', '.plist', '.strings', '.xml', '.txt', '.html', '.css', '.map'}
+
+ENTROPY_SAMPLE_SIZE = 64 * 1024
+ENTROPY_MIN_SIZE = 4 * 1024
 
-def get_project_root() -> Path:
-    """获取项目根目录"""
-    return Path(__file__).parent.parent
+# ============================================================
 
 
 def check_platform():
@@ -65,30 +99,28 @@ def check_environment():
     except FileNotFoundError:
         errors.append('xcodebuild 未找到，请安装 Xcode Command Line Tools')
 
+    toolchain = resolve_toolchain(android=False)
+
     # 检查 Node.js
-    try:
-        result = subprocess.run(['node', '--version'], capture_output=True, text=True)
-        print(f'  ✅ Node.js: {result.stdout.strip()}')
-    except FileNotFoundError:
+    if toolchain['node'] is not None:
+        print(f'  ✅ Node.js: {toolchain["node"]}')
+    else:
         errors.append('Node.js 未安装')
 
     # 检查 CocoaPods
-    try:
-        result = subprocess.run(['pod', '--version'], capture_output=True, text=True)
-        print(f'  ✅ CocoaPods: {result.stdout.strip()}')
-    except FileNotFoundError:
+    pod_version = probe_version(['pod', '--version'])
+    if pod_version is not None:
+        print(f'  ✅ CocoaPods: {pod_version}')
+    else:
         errors.append('CocoaPods 未安装 (brew install cocoapods)')
 
     # 检查 yarn/npm
-    try:
-        result = subprocess.run(['yarn', '--version'], capture_output=True, text=True)
-        print(f'  ✅ Yarn: {result.stdout.strip()}')
-    except FileNotFoundError:
-        try:
-            result = subprocess.run(['npm', '--version'], capture_output=True, text=True)
-            print(f'  ✅ npm: {result.stdout.strip()}')
-        except FileNotFoundError:
-            errors.append('npm 或 yarn 未安装')
+    if toolchain['yarn'] is not None:
+        print(f'  ✅ Yarn: {toolchain["yarn"]}')
+    elif toolchain['npm'] is not None:
+        print(f'  ✅ npm: {toolchain["npm"]}')
+    else:
+        errors.append('npm 或 yarn 未安装')
 
     if errors:
         print('\n❌ 环境检查失败:')
@@ -99,35 +131,13 @@ def check_environment():
     print('  ✅ 环境检查通过\n')
 
 
-def install_dependencies():
-    """安装项目依赖"""
-    print('📦 安装项目依赖...')
-    project_root = get_project_root()
-
-    # 安装 JS 依赖
-    if shutil.which('yarn'):
-        cmd = ['yarn', 'install']
-    else:
-        cmd = ['npm', 'install']
-
-    result = subprocess.run(cmd, cwd=project_root)
-    if result.returncode != 0:
-        print('❌ JS 依赖安装失败')
-        sys.exit(1)
-
-    print('  ✅ JS 依赖安装完成\n')
-
-
 def install_pods():
     """安装 CocoaPods 依赖"""
     print('📦 安装 CocoaPods 依赖...')
     project_root = get_project_root()
     ios_dir = project_root / 'ios'
 
-    result = subprocess.run(['pod', 'install'], cwd=ios_dir)
-    if result.returncode != 0:
-        print('❌ CocoaPods 依赖安装失败')
-        sys.exit(1)
+    run_step(['pod', 'install'], ios_dir, 'CocoaPods 依赖安装失败', label='pod-install')
 
     print('  ✅ CocoaPods 依赖安装完成\n')
 
@@ -155,7 +165,34 @@ def clean_build():
     print('  ✅ 清理完成\n')
 
 
-def build_archive() -> Path:
+def run_xcodebuild(cmd: list[str], cwd: Path) -> tuple[dict, xcodebuild_log.XcodebuildLogParser]:
+    """运行 xcodebuild，边输出边解析（完整输出压缩保存到构建日志）"""
+    parser = xcodebuild_log.XcodebuildLogParser()
+    result = process_runner.run_logged(cmd, cwd, 'xcodebuild-archive',
+                                       on_line=lambda line: parser.feed(line, time.monotonic()))
+    return result, parser
+
+
+def report_xcodebuild(parser: xcodebuild_log.XcodebuildLogParser, log_path: Path):
+    """输出最慢的 Pods 与源文件，并写出完整报告"""
+    print('\n🕒 分析 xcodebuild 耗时...')
+    report = parser.report()
+    output_dir = get_project_root() / 'output'
+    output_dir.mkdir(exist_ok=True)
+    text_path, json_path = xcodebuild_log.write_reports(report, output_dir)
+
+    print(f'  编译耗时累计 {report["compile_seconds"]:.1f}s, 其中 Pods {report["pods_compile_seconds"]:.1f}s')
+    print('  最慢的 Pods:')
+    for target in report['pods'][:5]:
+        print(f'    {target["compile_seconds"]:>7.1f}s  {target["span_seconds"]:>7.1f}s  {target["target"]}')
+    if report['slowest_files']:
+        print('  最慢的源文件:')
+        for entry in report['slowest_files'][:5]:
+            print(f'    {entry["seconds"]:>7.2f}s  [{entry["target"]}] {Path(entry["file"]).name}')
+    print(f'  📄 报告: {text_path.name}, {json_path.name}；完整日志: {log_path}\n')
+
+
+def build_archive(compile_timing: bool = False, build_report: bool = True) -> Path:
     """构建 Xcode Archive"""
     print('🔨 构建 Archive...')
     project_root = get_project_root()
@@ -173,14 +210,24 @@ def build_archive() -> Path:
         '-configuration', CONFIGURATION,
         '-archivePath', str(archive_path),
         '-destination', 'generic/platform=iOS',
+        *(xcodebuild_log.TIMING_SUMMARY_ARGS if build_report else []),
         'archive',
         'CODE_SIGN_IDENTITY=-',  # Ad-hoc 签名
         'CODE_SIGNING_REQUIRED=NO',
         'CODE_SIGNING_ALLOWED=NO',
+        *(xcodebuild_log.TIMING_BUILD_SETTINGS if compile_timing else []),
     ]
 
-    result = subprocess.run(cmd, cwd=ios_dir)
-    if result.returncode != 0:
+    # "Bundle React Native code and images" 构建阶段继承环境变量，使用项目级 Metro 转换缓存
+    metro_cache_dir = metro_cache.activate(project_root)
+    if build_report:
+        result, parser = run_xcodebuild(cmd, ios_dir)
+        report_xcodebuild(parser, result['log'])
+    else:
+        result = process_runner.run_logged(cmd, ios_dir, 'xcodebuild-archive')
+    metro_cache.prune(keep=metro_cache_dir)
+    if result['code'] != 0:
+        process_runner.print_failure(result)
         print('❌ Archive 构建失败')
         print('\n💡 提示: 如果遇到签名问题，请确保:')
         print('   1. 在 Xcode 中打开项目并配置签名')
@@ -191,7 +238,7 @@ def build_archive() -> Path:
     return archive_path
 
 
-def export_ipa(archive_path: Path) -> Path:
+def export_ipa(archive_path: Path, preset: str = DEFAULT_COMPRESSION_PRESET) -> Path:
     """从 Archive 导出 IPA"""
     print('📦 导出 IPA...')
     project_root = get_project_root()
@@ -226,11 +273,11 @@ def export_ipa(archive_path: Path) -> Path:
         '-exportOptionsPlist', str(export_options_path),
     ]
 
-    result = subprocess.run(cmd, cwd=ios_dir)
-    if result.returncode != 0:
-        print('⚠️ IPA 导出失败（可能是签名问题）')
+    result = process_runner.run_logged(cmd, ios_dir, 'xcodebuild-export')
+    if result['code'] != 0:
+        print(f'⚠️ IPA 导出失败（可能是签名问题），日志: {result["log"]}')
         print('  将尝试创建未签名的 .app 包...\n')
-        return create_unsigned_app(archive_path)
+        return create_unsigned_app(archive_path, preset)
 
     # 查找生成的 IPA
     for ipa_file in export_path.glob('*.ipa'):
@@ -240,7 +287,7 @@ def export_ipa(archive_path: Path) -> Path:
     return None
 
 
-def create_unsigned_app(archive_path: Path) -> Path:
+def create_unsigned_app(archive_path: Path, preset: str = DEFAULT_COMPRESSION_PRESET) -> Path:
     """从 Archive 创建未签名的 .app（用于模拟器或重签名）"""
     print('📦 创建未签名 App 包...')
     project_root = get_project_root()
@@ -263,39 +310,81 @@ def create_unsigned_app(archive_path: Path) -> Path:
     print(f'  ✅ App 包已创建: {output_app}\n')
 
     # 创建 IPA（将 .app 打包成 .ipa）
-    ipa_path = create_ipa_from_app(output_app)
+    ipa_path = create_ipa_from_app(output_app, preset)
 
     return ipa_path
 
 
-def create_ipa_from_app(app_path: Path) -> Path:
+def sample_entropy(file_path: Path, sample_size: int = ENTROPY_SAMPLE_SIZE) -> float:
+    """计算文件头部采样的香农熵（bits/byte），用于识别已压缩数据"""
+    with open(file_path, 'rb') as f:
+        data = f.read(sample_size)
+    if not data:
+        return 0.0
+
+    total = len(data)
+    entropy = 0.0
+    for count in Counter(data).values():
+        p = count / total
+        entropy -= p * math.log2(p)
+    return entropy
+
+
+def choose_compression(file_path: Path, preset: str = DEFAULT_COMPRESSION_PRESET) -> tuple[int, int | None]:
+    """根据扩展名与熵值为单个文件选择压缩方式，返回 (compress_type, compresslevel)"""
+    policy = COMPRESSION_PRESETS[preset]
+    level = policy['level']
+    if level is None:
+        return zipfile.ZIP_STORED, None
+
+    suffix = file_path.suffix.lower()
+    if suffix in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED, None
+    if suffix in TEXT_EXTENSIONS:
+        return zipfile.ZIP_DEFLATED, level
+
+    # 未知类型（可执行文件、Hermes 字节码等）按采样熵决定
+    if file_path.stat().st_size >= ENTROPY_MIN_SIZE and sample_entropy(file_path) >= policy['entropy_threshold']:
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, level
+
+
+def package_app(app_path: Path, ipa_path: Path, preset: str = DEFAULT_COMPRESSION_PRESET) -> dict:
+    """将 .app 按压缩策略写入 ipa_path（直接写入 Payload/ 前缀，不复制目录），返回统计信息"""
+    stats = {'files': 0, 'stored': 0, 'deflated': 0, 'input_bytes': 0}
+
+    with zipfile.ZipFile(ipa_path, 'w') as zipf:
+        # 与 shutil.copytree 一致：符号链接的目录与文件都按其内容写入
+        for root, dirs, files in os.walk(app_path, followlinks=True):
+            dirs.sort()
+            for file in sorted(files):
+                file_path = Path(root) / file
+                arcname = Path('Payload') / app_path.name / file_path.relative_to(app_path)
+                compress_type, compresslevel = choose_compression(file_path, preset)
+                zipf.write(file_path, arcname, compress_type=compress_type, compresslevel=compresslevel)
+
+                stats['files'] += 1
+                stats['input_bytes'] += file_path.stat().st_size
+                if compress_type == zipfile.ZIP_STORED:
+                    stats['stored'] += 1
+                else:
+                    stats['deflated'] += 1
+
+    stats['output_bytes'] = ipa_path.stat().st_size
+    return stats
+
+
+def create_ipa_from_app(app_path: Path, preset: str = DEFAULT_COMPRESSION_PRESET) -> Path:
     """将 .app 打包成 .ipa"""
-    print('📦 打包 IPA...')
+    print(f'📦 打包 IPA (压缩策略: {preset})...')
 
     output_dir = app_path.parent
     ipa_name = app_path.stem + '.ipa'
     ipa_path = output_dir / ipa_name
 
-    # 创建 Payload 目录结构
-    payload_dir = output_dir / 'Payload'
-    if payload_dir.exists():
-        shutil.rmtree(payload_dir)
-    payload_dir.mkdir()
-
-    # 复制 .app 到 Payload
-    shutil.copytree(app_path, payload_dir / app_path.name)
-
     # 压缩成 .ipa
-    import zipfile
-    with zipfile.ZipFile(ipa_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(payload_dir):
-            for file in files:
-                file_path = Path(root) / file
-                arcname = file_path.relative_to(output_dir)
-                zipf.write(file_path, arcname)
-
-    # 清理 Payload 目录
-    shutil.rmtree(payload_dir)
+    stats = package_app(app_path, ipa_path, preset)
+    print(f'  📊 {stats["files"]} 个文件: {stats["deflated"]} 个压缩, {stats["stored"]} 个仅存储')
 
     # 删除 .app 目录（只保留 .ipa）
     shutil.rmtree(app_path)
@@ -312,7 +401,7 @@ def clean_output_dir():
 
     if output_dir.exists():
         for file in output_dir.iterdir():
-            if file.suffix in ['.ipa', '.app'] or file.is_dir():
+            if file.suffix in ['.ipa', '.app', '.delta'] or file.is_dir():
                 if file.is_dir():
                     shutil.rmtree(file)
                 else:
@@ -344,6 +433,25 @@ def copy_to_output(source_path: Path) -> Path:
     return output_path
 
 
+def publish_ipa_delta(ipa_path: Path):
+    """生成相对上一次构建的 IPA 增量包"""
+    print('🧩 生成增量包...')
+    results = artifact_delta.publish_deltas([ipa_path], get_cache_dir('artifacts'))
+    if results:
+        artifact_delta.print_deltas(results)
+        print('  应用方式: python scripts/artifact_delta.py apply <旧 IPA> <增量包> <新 IPA>')
+    else:
+        print('  首次构建，已保存为下一次的增量基准')
+    print()
+
+
+def write_manifest(output_dir: Path):
+    """为 output/ 中的所有产物生成完整性清单 manifest.json"""
+    print('🔏 生成产物清单...')
+    artifact_manifest.print_manifest(artifact_manifest.create_manifest(output_dir), output_dir)
+    print()
+
+
 def install_to_device(ipa_path: Path):
     """安装 IPA 到连接的设备"""
     print('📱 安装到设备...')
@@ -382,7 +490,14 @@ def main():
     parser.add_argument('--clean', action='store_true', help='构建前清理缓存')
     parser.add_argument('--install', action='store_true', help='构建后自动安装到设备')
     parser.add_argument('--skip-deps', action='store_true', help='跳过依赖安装')
+    parser.add_argument('--no-snapshot', action='store_true', help='不使用 node_modules 快照，总是执行 yarn install')
     parser.add_argument('--skip-pods', action='store_true', help='跳过 Pod 安装')
+    parser.add_argument('--compression', choices=sorted(COMPRESSION_PRESETS), default=DEFAULT_COMPRESSION_PRESET,
+                        help='未签名 IPA 的压缩策略预设')
+    parser.add_argument('--no-delta', action='store_true', help='不生成相对上一次构建的增量包')
+    parser.add_argument('--compile-timing', action='store_true', help='开启单文件编译计时')
+    parser.add_argument('--no-build-report', action='store_true', help='不分析 xcodebuild 输出')
+    parser.add_argument('--no-manifest', action='store_true', help='不生成产物完整性清单')
     args = parser.parse_args()
 
     print('=' * 50)
@@ -397,7 +512,7 @@ def main():
 
     # 2. 安装 JS 依赖
     if not args.skip_deps:
-        install_dependencies()
+        install_dependencies(use_snapshot=not args.no_snapshot)
 
     # 3. 安装 CocoaPods 依赖
     if not args.skip_pods:
@@ -411,10 +526,10 @@ def main():
         clean_build()
 
     # 6. 构建 Archive
-    archive_path = build_archive()
+    archive_path = build_archive(args.compile_timing, not args.no_build_report)
 
     # 7. 导出 IPA
-    ipa_path = export_ipa(archive_path)
+    ipa_path = export_ipa(archive_path, args.compression)
 
     # 8. 复制到输出目录
     if ipa_path:
@@ -422,7 +537,15 @@ def main():
     else:
         output_path = None
 
-    # 9. 安装到设备（可选）
+    # 9. 增量包
+    if output_path and not args.no_delta:
+        publish_ipa_delta(output_path)
+
+    # 10. 完整性清单
+    if output_path and not args.no_manifest:
+        write_manifest(output_path.parent)
+
+    # 11. 安装到设备（可选）
     if args.install and output_path:
         install_to_device(output_path)
 
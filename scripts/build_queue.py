@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+多分支并行构建队列
+为每个分支/提交在项目目录旁的 <项目名>-worktrees/ 中创建独立的 git worktree（不放在项目目录内，
+避免主工作树的 Metro 扫描与监听这些完整的检出），在各自的工作树中运行 build_android.py，
+按 CPU 与内存预算并行执行。node_modules 快照、图片优化与工具链探测缓存在所有工作树间共享，
+Gradle 依赖缓存位于所有工作树共用的 GRADLE_USER_HOME（默认 ~/.gradle，Gradle 对其加锁，可并发使用），
+产物按分支收集到 output/builds/<分支>/。任务输出的构建缓存可通过 -- --build-cache 让所有工作树共用一个本地缓存服务
+（由队列启动一次，通过 --build-cache-url 与 GRADLE_CACHE_TOKEN 传给每个构建）
+
+使用方法:
+    python scripts/build_queue.py REF [REF ...] [--jobs N] [--memory-per-build GB] [-- build_android 参数]
+
+示例:
+    python scripts/build_queue.py main release/1.2 feature/login -- --release --size-budget 5%
+
+参数:
+    --jobs              最大并行数（默认按 CPU 与可用内存自动计算）
+    --memory-per-build  每个构建预留的内存（GB，默认 4）
+    --cpus-per-build    每个构建预留的 CPU 核数（默认 4），同时作为 Gradle 的 max-workers
+    --prune             构建完成后删除工作树（默认保留，便于下次增量构建）
+    --build-cache-host  构建访问本机缓存服务的地址（容器中构建时使用，如 host.docker.internal 或 172.17.0.1），
+                        指定时缓存服务监听 0.0.0.0；需要同时传入 -- --build-cache
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import gradle_cache_server
+from toolchain import SHARED_CACHE_ENV, get_project_root
+
+# 传给 build_android.py 时不允许的参数：并行构建不能同时安装到同一台设备
+FORBIDDEN_BUILD_ARGS = ('--install',)
+
+
+def safe_name(ref: str) -> str:
+    """分支名转为目录名"""
+    return re.sub(r'[^\w.-]', '_', ref)
+
+
+def available_memory() -> int | None:
+    """可用内存（字节）：Linux 读取 MemAvailable，macOS 使用物理内存总量"""
+    meminfo = Path('/proc/meminfo')
+    if meminfo.exists():
+        for line in meminfo.read_text().splitlines():
+            if line.startswith('MemAvailable:'):
+                return int(line.split()[1]) * 1024
+    if sys.platform == 'darwin':
+        result = subprocess.run(['sysctl', '-n', 'hw.memsize'], capture_output=True, text=True)
+        if result.returncode == 0 and result.stdout.strip().isdigit():
+            return int(result.stdout.strip())
+    return None
+
+
+def plan_jobs(cpus_per_build: int, memory_per_build_gb: float) -> int:
+    """按 CPU 与内存预算计算并行数"""
+    by_cpu = max((os.cpu_count() or 1) // cpus_per_build, 1)
+    memory = available_memory()
+    by_memory = max(int(memory // (memory_per_build_gb * 1024 ** 3)), 1) if memory else by_cpu
+    return min(by_cpu, by_memory)
+
+
+def git(*args: str, cwd: Path | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run(['git', *args], cwd=cwd or get_project_root(), capture_output=True, text=True)
+
+
+def get_worktrees_dir(project_root: Path) -> Path:
+    """工作树目录：项目目录旁的 <项目名>-worktrees/"""
+    worktrees_dir = project_root.parent / f'{project_root.name}-worktrees'
+    worktrees_dir.mkdir(parents=True, exist_ok=True)
+    return worktrees_dir
+
+
+def prepare_worktree(ref: str, worktrees_dir: Path) -> Path | None:
+    """创建或更新 ref 对应的工作树（复用已有工作树以保留 Gradle 增量构建状态）"""
+    path = worktrees_dir / safe_name(ref)
+    if (path / '.git').exists():
+        result = git('checkout', '--force', '--detach', ref, cwd=path)
+    else:
+        git('worktree', 'prune')
+        result = git('worktree', 'add', '--force', '--detach', str(path), ref)
+    if result.returncode != 0:
+        print(f'❌ [{ref}] 工作树准备失败: {result.stderr.strip()}')
+        return None
+    return path
+
+
+def build_env(shared_cache: Path, cpus_per_build: int) -> dict:
+    """工作树构建的环境变量：共享缓存目录，并限制 Gradle 的并行 worker 数"""
+    env = dict(os.environ)
+    env[SHARED_CACHE_ENV] = str(shared_cache)
+    gradle_opts = env.get('GRADLE_OPTS', '')
+    env['GRADLE_OPTS'] = f'{gradle_opts} -Dorg.gradle.workers.max={cpus_per_build}'.strip()
+    return env
+
+
+def share_build_cache(build_args: list[str], cache_host: str | None) -> list[str] | None:
+    """启动所有构建共用的 Gradle 缓存服务，将 build_android.py 的 --build-cache 换成该服务的地址"""
+    bind = '0.0.0.0' if cache_host else gradle_cache_server.DEFAULT_HOST
+    if not gradle_cache_server.ensure_server(host=bind):
+        print('❌ Gradle 缓存服务启动失败')
+        return None
+    cache_url = f'http://{cache_host or "127.0.0.1"}:{gradle_cache_server.DEFAULT_PORT}'
+    print(f'🗄️ 共用 Gradle 构建缓存: {cache_url} (监听 {bind})\n')
+    return [arg for arg in build_args if arg != '--build-cache'] + ['--build-cache-url', cache_url]
+
+
+def collect_artifacts(worktree: Path, target_dir: Path) -> list[Path]:
+    """收集工作树 output/ 中的产物文件（含 --variants 的 output/<变体>/ 子目录）"""
+    collected = []
+    source_dir = worktree / 'output'
+    if not source_dir.exists():
+        return collected
+    for item in sorted(source_dir.rglob('*')):
+        if item.is_file():
+            target = target_dir / item.relative_to(source_dir)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(item, target)
+            collected.append(target)
+    return collected
+
+
+def run_build(ref: str, worktree: Path, build_args: list[str], env: dict, builds_dir: Path) -> dict:
+    """在工作树中运行 build_android.py，输出写入日志文件"""
+    target_dir = builds_dir / safe_name(ref)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    log_path = target_dir / 'build.log'
+
+    print(f'🚀 [{ref}] 开始构建 ({worktree})')
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        result = subprocess.run(
+            [sys.executable, str(worktree / 'scripts' / 'build_android.py'), *build_args],
+            cwd=worktree, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    elapsed = time.perf_counter() - start
+
+    artifacts = collect_artifacts(worktree, target_dir) if result.returncode == 0 else []
+    status = '✅' if result.returncode == 0 else '❌'
+    print(f'{status} [{ref}] 构建{"完成" if result.returncode == 0 else "失败"} {elapsed:.0f}s, 日志: {log_path}')
+    return {'ref': ref, 'code': result.returncode, 'seconds': elapsed, 'artifacts': artifacts, 'log': log_path}
+
+
+def print_summary(results: list[dict], wall_time: float):
+    """输出各分支的构建结果"""
+    print('\n' + '=' * 50)
+    print('📊 构建队列结果')
+    print('=' * 50)
+    for r in results:
+        status = '✅' if r['code'] == 0 else '❌'
+        print(f'  {status} {r["ref"]:<32}{r["seconds"]:>7.0f}s  {len(r["artifacts"])} 个产物')
+        for artifact in r['artifacts']:
+            print(f'      📦 {artifact}')
+    serial_time = sum(r['seconds'] for r in results)
+    print(f'\n⏱️ 总耗时 {wall_time:.0f}s（串行需 {serial_time:.0f}s）')
+
+
+def main():
+    """主函数"""
+    argv = sys.argv[1:]
+    build_args = []
+    if '--' in argv:
+        index = argv.index('--')
+        argv, build_args = argv[:index], argv[index + 1:]
+
+    parser = argparse.ArgumentParser(description='多分支并行构建队列')
+    parser.add_argument('refs', nargs='+', help='要构建的分支、标签或提交')
+    parser.add_argument('--jobs', type=int, help='最大并行数')
+    parser.add_argument('--memory-per-build', type=float, default=4.0, help='每个构建预留的内存（GB）')
+    parser.add_argument('--cpus-per-build', type=int, default=4, help='每个构建预留的 CPU 核数')
+    parser.add_argument('--prune', action='store_true', help='构建完成后删除工作树')
+    parser.add_argument('--build-cache-host', type=str, help='构建访问本机 Gradle 缓存服务的地址（容器构建）')
+    args = parser.parse_args(argv)
+
+    forbidden = [arg for arg in build_args if arg in FORBIDDEN_BUILD_ARGS]
+    if forbidden:
+        print(f'❌ 并行构建不支持参数: {" ".join(forbidden)}')
+        sys.exit(1)
+
+    refs = list(dict.fromkeys(args.refs))
+    jobs = min(args.jobs or plan_jobs(args.cpus_per_build, args.memory_per_build), len(refs))
+    print(f'📋 构建队列: {len(refs)} 个分支, 并行 {jobs}\n')
+
+    project_root = get_project_root()
+    worktrees_dir = get_worktrees_dir(project_root)
+    builds_dir = project_root / 'output' / 'builds'
+
+    # git worktree 操作会争用仓库锁，先串行准备好所有工作树
+    worktrees = {}
+    for ref in refs:
+        worktree = prepare_worktree(ref, worktrees_dir)
+        if worktree:
+            worktrees[ref] = worktree
+
+    env = build_env(project_root / '.build-cache', args.cpus_per_build)
+    if '--build-cache' in build_args:
+        build_args = share_build_cache(build_args, args.build_cache_host)
+        if build_args is None:
+            sys.exit(1)
+        # 构建通过 --build-cache-url 连接时，凭此令牌上传任务输出
+        env[gradle_cache_server.TOKEN_ENV] = gradle_cache_server.load_token()
+    elif args.build_cache_host:
+        print('⚠️ --build-cache-host 需要与 -- --build-cache 一起使用，已忽略')
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        futures = [pool.submit(run_build, ref, worktree, build_args, env, builds_dir)
+                   for ref, worktree in worktrees.items()]
+        results = [future.result() for future in futures]
+
+    if args.prune:
+        for worktree in worktrees.values():
+            git('worktree', 'remove', '--force', str(worktree))
+
+    print_summary(results, time.perf_counter() - start)
+    if len(results) < len(refs) or any(r['code'] != 0 for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+JS Bundle 体积归因分析
+读取 index.android.bundle 及其 source map，按模块和 node_modules 包统计字节数
+
+使用方法:
+    python scripts/bundle_analyzer.py BUNDLE [--sourcemap PATH] [--sort size|name] [--top N] [--json PATH]
+
+参数:
+    --sourcemap     source map 路径（默认 BUNDLE.map）
+    --sort          排序方式：size（默认，按体积降序）或 name
+    --top           文本报告中每个列表显示的条目数（默认 30，0 表示全部）
+    --json          JSON 报告输出路径
+"""
+
+import re
+import json
+import argparse
+from pathlib import Path
+
+from toolchain import get_project_root
+
+BASE64_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+BASE64_VALUES = {c: i for i, c in enumerate(BASE64_CHARS)}
+
+UNMAPPED = '<unmapped>'
+PROJECT = '<project>'
+
+NODE_MODULES_PACKAGE = re.compile(r'node_modules/((?:@[^/]+/)?[^/]+)')
+REQUIRE_RESOLVE = re.compile(r"require\.resolve\(\s*['\"]([^'\"]+)['\"]\s*\)")
+
+
+def decode_vlq_segment(segment: str) -> list[int]:
+    """解码单个 source map 段的 Base64 VLQ 数值"""
+    values = []
+    value = 0
+    shift = 0
+    for char in segment:
+        digit = BASE64_VALUES[char]
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            values.append(-(value >> 1) if value & 1 else value >> 1)
+            value = 0
+            shift = 0
+    return values
+
+
+def iter_line_segments(mappings: str):
+    """逐行产出 [(生成列, 源文件索引或 None), ...]"""
+    source = 0
+    for line in mappings.split(';'):
+        column = 0
+        segments = []
+        if line:
+            for segment in line.split(','):
+                if not segment:
+                    continue
+                values = decode_vlq_segment(segment)
+                column += values[0]
+                if len(values) >= 4:
+                    source += values[1]
+                    segments.append((column, source))
+                else:
+                    segments.append((column, None))
+        yield segments
+
+
+def attribute_bytes(bundle_text: str, sourcemap: dict) -> dict[str, int]:
+    """按源文件统计 bundle 字节数（UTF-8），未映射部分记为 <unmapped>"""
+    sources = sourcemap.get('sources', [])
+    sizes: dict[str, int] = {}
+    lines = bundle_text.split('\n')
+    segment_lines = iter_line_segments(sourcemap.get('mappings', ''))
+
+    for index, line in enumerate(lines):
+        segments = next(segment_lines, [])
+        newline = 1 if index < len(lines) - 1 else 0
+        ascii_line = line.isascii()
+
+        def measure(start: int, end: int) -> int:
+            return end - start if ascii_line else len(line[start:end].encode('utf-8'))
+
+        if not segments:
+            sizes[UNMAPPED] = sizes.get(UNMAPPED, 0) + measure(0, len(line)) + newline
+            continue
+
+        first_column = segments[0][0]
+        if first_column > 0:
+            sizes[UNMAPPED] = sizes.get(UNMAPPED, 0) + measure(0, first_column)
+
+        for i, (column, source) in enumerate(segments):
+            end = segments[i + 1][0] if i + 1 < len(segments) else len(line)
+            name = sources[source] if source is not None and source < len(sources) else UNMAPPED
+            sizes[name] = sizes.get(name, 0) + measure(column, end)
+
+        sizes[UNMAPPED] = sizes.get(UNMAPPED, 0) + newline
+
+    return sizes
+
+
+def normalize_source(source: str, project_root: Path) -> str:
+    """将 source map 中的绝对路径转为相对项目根目录的路径"""
+    root = str(project_root.resolve()) + '/'
+    return source[len(root):] if source.startswith(root) else source
+
+
+def package_of(module: str) -> str:
+    """模块所属的包：node_modules 中取最内层包名，否则归为项目代码"""
+    if module == UNMAPPED:
+        return UNMAPPED
+    packages = NODE_MODULES_PACKAGE.findall(module)
+    return packages[-1] if packages else PROJECT
+
+
+def read_extra_node_modules(project_root: Path) -> list[str]:
+    """读取 metro.config.js 中 extraNodeModules 通过 require.resolve 映射的包"""
+    metro_config = project_root / 'metro.config.js'
+    if not metro_config.exists():
+        return []
+    return sorted(set(REQUIRE_RESOLVE.findall(metro_config.read_text(encoding='utf-8'))))
+
+
+def analyze_bundle(bundle_path: Path, sourcemap_path: Path, project_root: Path | None = None) -> dict:
+    """生成模块、包两级的体积报告"""
+    project_root = project_root or get_project_root()
+    bundle_text = bundle_path.read_text(encoding='utf-8')
+    sourcemap = json.loads(sourcemap_path.read_text(encoding='utf-8'))
+
+    modules: dict[str, int] = {}
+    for source, size in attribute_bytes(bundle_text, sourcemap).items():
+        name = normalize_source(source, project_root)
+        modules[name] = modules.get(name, 0) + size
+
+    packages: dict[str, dict] = {}
+    for module, size in modules.items():
+        entry = packages.setdefault(package_of(module), {'bytes': 0, 'modules': 0})
+        entry['bytes'] += size
+        entry['modules'] += 1
+
+    extra = {name: packages.get(name, {'bytes': 0, 'modules': 0}) for name in read_extra_node_modules(project_root)}
+
+    return {
+        'bundle': str(bundle_path),
+        'total_bytes': bundle_path.stat().st_size,
+        'modules': modules,
+        'packages': packages,
+        'extra_node_modules': extra,
+    }
+
+
+def sort_items(items: dict, key: str, sort: str) -> list:
+    """按体积或名称排序"""
+    if sort == 'name':
+        return sorted(items.items())
+    return sorted(items.items(), key=lambda item: item[1] if key is None else item[1][key], reverse=True)
+
+
+def format_report(report: dict, sort: str = 'size', top: int = 30) -> str:
+    """生成文本报告"""
+    total = report['total_bytes'] or 1
+    limit = None if top == 0 else top
+    lines = [f'📜 {report["bundle"]}: {report["total_bytes"] / 1024:.1f} KB']
+
+    lines.append(f'\n📦 按包统计 ({len(report["packages"])} 个):')
+    lines.append(f'  {"包":<48}{"KB":>10}{"占比":>8}{"模块数":>8}')
+    for name, entry in sort_items(report['packages'], 'bytes', sort)[:limit]:
+        lines.append(f'  {name:<48}{entry["bytes"] / 1024:>10.1f}{entry["bytes"] / total:>8.1%}{entry["modules"]:>8}')
+
+    lines.append(f'\n📄 按模块统计 ({len(report["modules"])} 个):')
+    lines.append(f'  {"模块":<72}{"KB":>10}{"占比":>8}')
+    for name, size in sort_items(report['modules'], None, sort)[:limit]:
+        lines.append(f'  {name[-72:]:<72}{size / 1024:>10.1f}{size / total:>8.1%}')
+
+    if report['extra_node_modules']:
+        lines.append('\n🔁 metro.config.js extraNodeModules 映射的包:')
+        for name, entry in report['extra_node_modules'].items():
+            lines.append(f'  {name:<48}{entry["bytes"] / 1024:>10.1f} KB')
+
+    return '\n'.join(lines)
+
+
+def write_reports(report: dict, output_dir: Path, sort: str = 'size', top: int = 30) -> tuple[Path, Path]:
+    """写出文本与 JSON 报告"""
+    text_path = output_dir / 'bundle-report.txt'
+    json_path = output_dir / 'bundle-report.json'
+    text_path.write_text(format_report(report, sort, top) + '\n', encoding='utf-8')
+    json_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    return text_path, json_path
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='JS Bundle 体积归因分析')
+    parser.add_argument('bundle', help='bundle 文件路径')
+    parser.add_argument('--sourcemap', type=str, help='source map 路径')
+    parser.add_argument('--sort', choices=['size', 'name'], default='size', help='排序方式')
+    parser.add_argument('--top', type=int, default=30, help='每个列表显示的条目数，0 表示全部')
+    parser.add_argument('--json', type=str, help='JSON 报告输出路径')
+    args = parser.parse_args()
+
+    bundle_path = Path(args.bundle)
+    sourcemap_path = Path(args.sourcemap) if args.sourcemap else bundle_path.with_name(bundle_path.name + '.map')
+    report = analyze_bundle(bundle_path, sourcemap_path)
+    print(format_report(report, args.sort, args.top))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+脚本统一入口
+按子命令延迟导入对应模块，只加载当前命令需要的依赖（zipfile、argparse、lzma 等），
+使 yarn start / yarn android 等命令的分发开销保持在几十毫秒内
+
+使用方法:
+    python scripts/cli.py <子命令> [参数...]
+    python scripts/cli.py help
+
+示例:
+    python scripts/cli.py start
+    python scripts/cli.py android --logs
+    python scripts/cli.py build-android --release --install
+"""
+
+import sys
+
+# 子命令 -> (模块名, 是否将子命令作为第一个参数传入, 说明)
+# start_with_port 自身按 argv[1] 区分命令，其余模块直接接收剩余参数
+COMMANDS = {
+    'start': ('start_with_port', True, '启动 Metro bundler（已在运行则复用）'),
+    'android': ('start_with_port', True, '运行 Android 应用'),
+    'ios': ('start_with_port', True, '运行 iOS 应用'),
+    'supervise': ('start_with_port', True, '前台守护 Metro'),
+    'status': ('start_with_port', True, '查看后台 Metro 状态'),
+    'stop': ('start_with_port', True, '停止后台 Metro'),
+    'build-android': ('build_android', False, '构建 Android APK'),
+    'build-ios': ('build_ios', False, '构建 iOS IPA'),
+    'build-queue': ('build_queue', False, '多分支并行构建 Android'),
+    'update-app': ('update_app', False, '更新应用版本号'),
+    'deps': ('node_modules_cache', False, 'node_modules 快照保存/恢复/清理'),
+    'metro-cache': ('metro_cache', False, 'Metro 转换缓存导出/导入/清理'),
+    'gradle-cache': ('gradle_cache_server', False, 'Gradle HTTP 构建缓存服务'),
+    'analyze-apk': ('apk_analyzer', False, 'APK 体积分析'),
+    'analyze-bundle': ('bundle_analyzer', False, 'JS Bundle 体积归因'),
+    'analyze-gradle': ('gradle_task_report', False, 'Gradle 任务耗时与关键路径'),
+    'analyze-xcodebuild': ('xcodebuild_log', False, 'xcodebuild 日志耗时分析'),
+    'optimize-assets': ('optimize_assets', False, 'Bundle 图片资源优化'),
+    'delta': ('artifact_delta', False, '生成/应用构建产物增量包'),
+    'ota': ('ota_patch', False, 'JS 热更新补丁基准/生成/验证'),
+    'manifest': ('artifact_manifest', False, '生成/校验 output/ 产物完整性清单'),
+    'serve': ('artifact_server', False, '局域网分发 output/ 中的构建产物'),
+    'logs': ('log_collector', False, '启动 devWsLogger 日志收集服务'),
+    'build-logs': ('process_runner', False, '查看压缩保存的构建日志'),
+    'logcat': ('logcat_capture', False, '采集 Android logcat'),
+    'bench-startup': ('bench_startup', False, 'Android 启动耗时基准测试'),
+    'bench-ipa': ('bench_ipa_packaging', False, 'IPA 打包压缩基准测试'),
+    'bench-cli': ('bench_cli_startup', False, 'CLI 分发耗时基准测试'),
+    'bench-output': ('bench_process_output', False, '构建输出管道基准测试'),
+    'bench-serve': ('bench_artifact_server', False, '产物分发服务并发下载基准测试'),
+}
+
+
+def print_usage():
+    """输出子命令列表"""
+    print('用法: python scripts/cli.py <子命令> [参数...]\n')
+    print('子命令:')
+    for name, (_, _, description) in COMMANDS.items():
+        print(f'  {name:<20}{description}')
+    print('\n各子命令的参数可通过 python scripts/cli.py <子命令> --help 查看')
+
+
+def dispatch(argv: list[str]):
+    """导入子命令对应的模块并执行其 main()"""
+    if not argv or argv[0] in ('help', '-h', '--help'):
+        print_usage()
+        sys.exit(0 if argv else 1)
+
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f'❌ 未知子命令: {name}\n')
+        print_usage()
+        sys.exit(1)
+
+    module_name, pass_command, _ = COMMANDS[name]
+    module = __import__(module_name)
+
+    # 子模块使用 argparse 或 sys.argv 解析参数，这里改写为直接运行脚本时的形式
+    script = f'{module_name}.py'
+    sys.argv = [script, name, *rest] if pass_command else [script, *rest]
+    module.main()
+
+
+def main():
+    """主函数"""
+    dispatch(sys.argv[1:])
+
+
+if __name__ == '__main__':
+    main()
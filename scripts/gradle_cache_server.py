@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+本地 Gradle HTTP 构建缓存节点
+实现 Gradle HttpBuildCache 的 GET/PUT 协议，缓存条目存放在磁盘上，超出容量上限时按 LRU 淘汰，
+并按客户端统计命中/未命中次数。同一台机器上的多个构建容器可共享编译、资源与 native 任务的输出
+
+使用方法:
+    python scripts/gradle_cache_server.py serve [--port 5071] [--host 127.0.0.1] [--max-size 10GB] [--dir PATH]
+    python scripts/gradle_cache_server.py status [--port 5071]
+    python scripts/gradle_cache_server.py stop [--port 5071]
+
+协议:
+    GET  /cache/<client>/<key>   命中返回 200，未命中返回 404
+    PUT  /cache/<client>/<key>   写入缓存条目（需要 Basic 认证，用户名 gradle，密码为访问令牌）
+    GET  /stats[?client=ID]      JSON 统计（全部或指定客户端）
+    <client> 为任意标识，build_android.py 用它区分每次构建的命中率
+
+注意:
+    - build_android.py --build-cache 会自动启动或复用本服务，并通过 init script 接入 Gradle
+    - 默认只监听 127.0.0.1；使用 --host 0.0.0.0 向局域网开放时，其他机器需要设置相同的 GRADLE_CACHE_TOKEN 才能上传，
+      否则任何人都可以写入会被 Release 构建使用的任务输出
+    - 容器中的构建无法访问宿主机的 127.0.0.1：服务需以 --host 0.0.0.0（或 docker 网桥地址，如 172.17.0.1）启动，
+      容器内使用 --build-cache-url http://<宿主机地址>:5071（如 host.docker.internal）并传入 GRADLE_CACHE_TOKEN；
+      build_queue.py --build-cache-host 会按此方式启动服务并传给每个构建
+    - 访问令牌取自环境变量 GRADLE_CACHE_TOKEN，未设置时自动生成并保存在 .build-cache/gradle-cache/token
+"""
+
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import base64
+import secrets
+import signal
+import argparse
+import threading
+import subprocess
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from toolchain import get_cache_dir, parse_size
+
+DEFAULT_PORT = 5071
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_MAX_SIZE = 10 * 1024 ** 3
+
+CACHE_PATH = re.compile(r'^/cache/(?:(?P<client>[\w.-]+)/)?(?P<key>[0-9a-f]{16,128})$')
+
+SERVER_START_TIMEOUT = 10
+
+# 按客户端统计保留的客户端数（每次构建一个客户端标识），超出后丢弃最久未出现的客户端
+MAX_CLIENTS = 256
+
+TOKEN_ENV = 'GRADLE_CACHE_TOKEN'
+AUTH_USERNAME = 'gradle'
+
+
+class CacheStore:
+    """磁盘存储 + 内存中的 LRU 索引"""
+
+    def __init__(self, directory: Path, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.total = 0
+        self.stats = {'hits': 0, 'misses': 0, 'puts': 0, 'evictions': 0, 'bytes_served': 0, 'bytes_stored': 0}
+        self.clients: OrderedDict[str, dict] = OrderedDict()
+        self.load()
+
+    def load(self):
+        """按 mtime 恢复 LRU 顺序（命中时会更新 mtime）"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.iterdir():
+            if path.suffix == '.tmp':
+                path.unlink(missing_ok=True)
+            elif path.is_file():
+                st = path.stat()
+                files.append((st.st_mtime, path.name, st.st_size))
+        for _, key, size in sorted(files):
+            self.entries[key] = size
+            self.total += size
+
+    def count(self, client: str | None, name: str, amount: int = 1):
+        self.stats[name] += amount
+        if client:
+            stats = self.clients.setdefault(client, {'hits': 0, 'misses': 0, 'puts': 0})
+            self.clients.move_to_end(client)
+            while len(self.clients) > MAX_CLIENTS:
+                self.clients.popitem(last=False)
+            if name in stats:
+                stats[name] += amount
+
+    def get(self, key: str, client: str | None) -> bytes | None:
+        path = self.directory / key
+        with self.lock:
+            if key not in self.entries:
+                self.count(client, 'misses')
+                return None
+            self.entries.move_to_end(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.total -= self.entries.pop(key, 0)
+                self.count(client, 'misses')
+            return None
+        with self.lock:
+            self.count(client, 'hits')
+            self.stats['bytes_served'] += len(data)
+        return data
+
+    def put(self, key: str, data: bytes, client: str | None):
+        path = self.directory / key
+        tmp = path.with_name(f'{key}.{threading.get_ident()}.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self.lock:
+            self.total += len(data) - self.entries.pop(key, 0)
+            self.entries[key] = len(data)
+            self.count(client, 'puts')
+            self.stats['bytes_stored'] += len(data)
+            self.evict()
+
+    def evict(self):
+        """淘汰最久未使用的条目直到低于上限（调用方持有锁）"""
+        while self.total > self.max_size and len(self.entries) > 1:
+            key, size = self.entries.popitem(last=False)
+            (self.directory / key).unlink(missing_ok=True)
+            self.total -= size
+            self.stats['evictions'] += 1
+
+    def snapshot(self, client: str | None = None) -> dict:
+        with self.lock:
+            if client:
+                return dict(self.clients.get(client, {'hits': 0, 'misses': 0, 'puts': 0}))
+            return {**self.stats, 'entries': len(self.entries), 'size': self.total, 'max_size': self.max_size}
+
+
+class CacheHandler(BaseHTTPRequestHandler):
+    """Gradle HttpBuildCache 协议处理"""
+
+    store: CacheStore = None
+    token: str = None
+    protocol_version = 'HTTP/1.1'
+
+    def send_body(self, code: int, body: bytes = b'', content_type: str = 'application/octet-stream'):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            client = parse_qs(url.query).get('client', [None])[0]
+            stats = self.store.snapshot(client)
+            if not client:
+                # ensure_server 据此判断已运行的服务是否监听所需地址
+                stats['host'] = self.server.server_address[0]
+            self.send_body(200, json.dumps(stats).encode(), 'application/json')
+            return
+        match = CACHE_PATH.match(url.path)
+        if not match:
+            self.send_body(404)
+            return
+        data = self.store.get(match.group('key'), match.group('client'))
+        if data is None:
+            self.send_body(404)
+        else:
+            self.send_body(200, data)
+
+    do_HEAD = do_GET
+
+    def authorized(self) -> bool:
+        """校验 Basic 认证（用户名 AUTH_USERNAME，密码为访问令牌）"""
+        scheme, _, value = self.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'basic':
+            return False
+        try:
+            username, _, password = base64.b64decode(value).decode('utf-8').partition(':')
+        except (ValueError, UnicodeDecodeError):
+            return False
+        return username == AUTH_USERNAME and hmac.compare_digest(password, self.token)
+
+    def do_PUT(self):
+        if not self.authorized():
+            self.send_response(401)
+            self.send_header('WWW-Authenticate', 'Basic realm="gradle-build-cache"')
+            self.send_header('Content-Length', '0')
+            # 未读取请求体，不能复用连接
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+            self.end_headers()
+            return
+        match = CACHE_PATH.match(urlparse(self.path).path)
+        length = int(self.headers.get('Content-Length') or 0)
+        if not match or length <= 0:
+            self.send_body(400)
+            return
+        if length > self.store.max_size:
+            # 超过缓存上限的条目不保存，Gradle 将其视为正常的拒绝
+            self.rfile.read(length)
+            self.send_body(413)
+            return
+        self.store.put(match.group('key'), self.rfile.read(length), match.group('client'))
+        self.send_body(200)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def get_server_files(port: int) -> dict:
+    """指定端口对应的 PID 与日志文件"""
+    state_dir = get_cache_dir('gradle-cache')
+    return {'pid': state_dir / f'server-{port}.pid', 'log': state_dir / f'server-{port}.log'}
+
+
+def load_token() -> str:
+    """上传缓存条目所需的访问令牌：环境变量优先，否则使用（首次生成）本机保存的令牌"""
+    if os.environ.get(TOKEN_ENV):
+        return os.environ[TOKEN_ENV]
+    token_file = get_cache_dir('gradle-cache') / 'token'
+    if not token_file.exists():
+        fd = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(secrets.token_urlsafe(32))
+    return token_file.read_text(encoding='utf-8').strip()
+
+
+def fetch_stats(base_url: str, client: str | None = None) -> dict | None:
+    """读取服务端统计，服务不可用时返回 None"""
+    url = f'{base_url.rstrip("/")}/stats' + (f'?client={client}' if client else '')
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+
+def ensure_server(port: int = DEFAULT_PORT, max_size: int = DEFAULT_MAX_SIZE, host: str = DEFAULT_HOST) -> bool:
+    """端口上已有监听 host 的缓存服务则复用，否则在后台启动"""
+    base_url = f'http://{"127.0.0.1" if host == "0.0.0.0" else host}:{port}'
+    stats = fetch_stats(base_url)
+    if stats is not None:
+        if stats.get('host', host) != host:
+            print(f'  ⚠️ 端口 {port} 上的缓存服务监听 {stats["host"]}，而不是 {host}，'
+                  f'请先执行 gradle_cache_server.py stop --port {port}')
+            return False
+        return True
+
+    files = get_server_files(port)
+    kwargs = {'start_new_session': True} if os.name != 'nt' else {
+        'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP,
+    }
+    with open(files['log'], 'a', encoding='utf-8') as log:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), 'serve', '--port', str(port), '--host', host,
+             '--max-size', str(max_size)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **kwargs,
+        )
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if fetch_stats(base_url) is not None:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def write_init_script(cache_url: str, client: str, token: str | None = None) -> Path:
+    """生成接入 HTTP 构建缓存的 Gradle init script（没有令牌时只读取不上传）"""
+    init_script = get_cache_dir('gradle-cache') / f'init-{client}.gradle'
+    credentials = ''
+    if token:
+        # Groovy 单引号字符串转义
+        password = token.replace('\\', '\\\\').replace("'", "\\'")
+        credentials = f'''
+            credentials {{
+                username = '{AUTH_USERNAME}'
+                password = '{password}'
+            }}'''
+    fd = os.open(init_script, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(f'''// 由 scripts/gradle_cache_server.py 生成
+gradle.settingsEvaluated {{ settings ->
+    settings.buildCache {{
+        remote(HttpBuildCache) {{
+            url = '{cache_url.rstrip("/")}/cache/{client}/'
+            allowInsecureProtocol = true
+            push = {str(bool(token)).lower()}{credentials}
+        }}
+    }}
+}}
+''')
+    return init_script
+
+
+def serve(port: int, directory: Path, max_size: int, host: str = DEFAULT_HOST):
+    """前台运行缓存服务"""
+    files = get_server_files(port)
+    CacheHandler.store = CacheStore(directory, max_size)
+    CacheHandler.token = load_token()
+    server = ThreadingHTTPServer((host, port), CacheHandler)
+    server.daemon_threads = True
+    files['pid'].write_text(str(os.getpid()))
+
+    def handle_stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    store = CacheHandler.store
+    print(f'🗄️ Gradle 构建缓存服务: http://{host}:{port}/cache/ ({len(store.entries)} 个条目, '
+          f'{store.total / 1024 / 1024:.1f} MB / {max_size / 1024 / 1024:.0f} MB)', flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        files['pid'].unlink(missing_ok=True)
+        print(f'📊 {json.dumps(store.snapshot())}', flush=True)
+
+
+def stop_server(port: int) -> int:
+    """停止后台缓存服务"""
+    pid_file = get_server_files(port)['pid']
+    if not pid_file.exists():
+        print(f'端口 {port} 没有后台缓存服务')
+        return 0
+    pid = int(pid_file.read_text().strip())
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pid_file.unlink(missing_ok=True)
+    print(f'已停止缓存服务 (PID {pid})')
+    return 0
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='本地 Gradle HTTP 构建缓存节点')
+    parser.add_argument('command', choices=['serve', 'status', 'stop'], help='操作')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='监听地址（0.0.0.0 向局域网与容器开放）')
+    parser.add_argument('--max-size', type=str, default=str(DEFAULT_MAX_SIZE), help='缓存容量上限，如 10GB')
+    parser.add_argument('--dir', type=str, help='缓存目录（默认 .build-cache/gradle-http-cache）')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        directory = Path(args.dir) if args.dir else get_cache_dir('gradle-http-cache')
+        serve(args.port, directory, parse_size(args.max_size), args.host)
+    elif args.command == 'status':
+        stats = fetch_stats(f'http://127.0.0.1:{args.port}')
+        if stats is None:
+            print(f'端口 {args.port}: 未运行')
+            sys.exit(1)
+        lookups = stats['hits'] + stats['misses']
+        rate = stats['hits'] / lookups if lookups else 0
+        print(f'端口 {args.port}: 运行中, {stats["entries"]} 个条目, {stats["size"] / 1024 / 1024:.1f} MB '
+              f'/ {stats["max_size"] / 1024 / 1024:.0f} MB')
+        print(f'命中 {stats["hits"]}, 未命中 {stats["misses"]} (命中率 {rate:.1%}), 写入 {stats["puts"]}, '
+              f'淘汰 {stats["evictions"]}')
+    else:
+        sys.exit(stop_server(args.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Gradle 任务耗时报告
+通过注入的 init script（BuildEventsListenerRegistry 任务事件监听）记录每个任务的起止时间、
+执行状态 (EXECUTED / UP-TO-DATE / FROM-CACHE / SKIPPED / NO-SOURCE / FAILED)、执行原因与依赖，
+据此计算关键路径、最慢任务、各类任务（React Native、Hermes、CMake、Kotlin/Java、R8 等）的耗时以及未命中缓存的原因
+
+使用方法:
+    python scripts/gradle_task_report.py RAW_JSON [--top N] [--output-dir DIR]
+
+参数:
+    RAW_JSON        init script 记录的原始数据
+    --top           显示最慢的 N 个任务（默认 20）
+    --output-dir    报告输出目录（默认 output）
+"""
+
+import re
+import json
+import argparse
+from pathlib import Path
+
+from toolchain import get_project_root
+
+INIT_SCRIPT = '''// 由 scripts/gradle_task_report.py 生成：记录任务耗时、状态与依赖
+import groovy.json.JsonOutput
+import javax.inject.Inject
+import org.gradle.api.provider.Property
+import org.gradle.api.services.BuildService
+import org.gradle.api.services.BuildServiceParameters
+import org.gradle.build.event.BuildEventsListenerRegistry
+import org.gradle.tooling.events.FinishEvent
+import org.gradle.tooling.events.OperationCompletionListener
+import org.gradle.tooling.events.task.TaskExecutionResult
+import org.gradle.tooling.events.task.TaskFailureResult
+import org.gradle.tooling.events.task.TaskFinishEvent
+import org.gradle.tooling.events.task.TaskOperationDescriptor
+import org.gradle.tooling.events.task.TaskSkippedResult
+import org.gradle.tooling.events.task.TaskSuccessResult
+
+abstract class TaskTimingService implements BuildService<TaskTimingService.Params>, OperationCompletionListener, AutoCloseable {
+    interface Params extends BuildServiceParameters {
+        Property<String> getOutput()
+    }
+
+    private final List<Map> records = Collections.synchronizedList([])
+
+    @Override
+    void onFinish(FinishEvent event) {
+        if (!(event instanceof TaskFinishEvent)) {
+            return
+        }
+        def descriptor = event.descriptor
+        def result = event.result
+        def status = 'EXECUTED'
+        if (result instanceof TaskSkippedResult) {
+            status = result.skipMessage
+        } else if (result instanceof TaskFailureResult) {
+            status = 'FAILED'
+        } else if (result instanceof TaskSuccessResult && result.fromCache) {
+            status = 'FROM-CACHE'
+        } else if (result instanceof TaskSuccessResult && result.upToDate) {
+            status = 'UP-TO-DATE'
+        }
+        records << [
+            path        : descriptor.taskPath,
+            start       : result.startTime,
+            end         : result.endTime,
+            status      : status,
+            reasons     : result instanceof TaskExecutionResult ? (result.executionReasons ?: []) : [],
+            dependencies: descriptor.dependencies.findAll { it instanceof TaskOperationDescriptor }*.taskPath,
+        ]
+    }
+
+    @Override
+    void close() {
+        def output = new File(parameters.output.get())
+        output.parentFile.mkdirs()
+        output.text = JsonOutput.toJson([tasks: records])
+    }
+}
+
+abstract class TaskTimingPlugin implements Plugin<Gradle> {
+    @Inject
+    abstract BuildEventsListenerRegistry getRegistry()
+
+    void apply(Gradle gradle) {
+        def service = gradle.sharedServices.registerIfAbsent('taskTiming', TaskTimingService) {
+            parameters.output.set('__OUTPUT__')
+        }
+        registry.onTaskCompletion(service)
+    }
+}
+
+apply plugin: TaskTimingPlugin
+'''
+
+# 按任务名分类（按顺序匹配第一个），模块维度另见 projects
+TASK_CATEGORIES = [
+    ('Hermes', re.compile(r'hermes', re.I)),
+    ('React Native', re.compile(r'createBundle|generateCodegen|generateAutolinking|ReactNative', re.I)),
+    ('CMake / NDK', re.compile(r'CMake|externalNativeBuild|NativeLibs|buildNdk|ndk', re.I)),
+    ('Kotlin', re.compile(r'Kotlin|kapt|ksp', re.I)),
+    ('Java', re.compile(r'JavaWithJavac|compile\w*Java')),
+    ('R8 / 混淆', re.compile(r'R8|minify|proguard', re.I)),
+    ('Dex', re.compile(r'[dD]ex')),
+    ('资源', re.compile(r'Resources|Assets|Manifest|\bres\b', re.I)),
+    ('打包签名', re.compile(r'package|sign|zipalign|assemble', re.I)),
+]
+
+# 多变体构建时不属于任何变体的任务（依赖库的公共任务、代码生成等）
+SHARED_VARIANT = '共享'
+
+
+def write_init_script(path: Path, raw_output: Path) -> Path:
+    """生成记录任务数据的 init script"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(INIT_SCRIPT.replace('__OUTPUT__', raw_output.as_posix()), encoding='utf-8')
+    return path
+
+
+def categorize(task_path: str) -> str:
+    """任务类型（只看任务名，不含模块路径）"""
+    task_name = task_path.rsplit(':', 1)[-1]
+    for name, pattern in TASK_CATEGORIES:
+        if pattern.search(task_name):
+            return name
+    return '其他'
+
+
+def project_of(task_path: str) -> str:
+    """任务所属的 Gradle 模块（如 :app、:react-native-reanimated）"""
+    return task_path.rsplit(':', 1)[0] or ':'
+
+
+def critical_path(tasks: dict[str, dict]) -> list[str]:
+    """实际关键路径：从最后结束的任务开始，沿最晚结束的依赖回溯"""
+    if not tasks:
+        return []
+    current = max(tasks.values(), key=lambda t: t['end'])['path']
+    path = [current]
+    while True:
+        dependencies = [tasks[d] for d in tasks[current]['dependencies'] if d in tasks]
+        if not dependencies:
+            break
+        current = max(dependencies, key=lambda t: t['end'])['path']
+        path.append(current)
+    return list(reversed(path))
+
+
+def variant_of(task_path: str, variants: list[str]) -> str:
+    """任务所属的变体（按任务名匹配，较长的变体名优先，如 prodRelease 优先于 release）"""
+    task_name = task_path.rsplit(':', 1)[-1].lower()
+    for variant in sorted(variants, key=len, reverse=True):
+        if variant.lower() in task_name:
+            return variant
+    return SHARED_VARIANT
+
+
+def analyze(raw: dict, top: int = 20, variants: list[str] | None = None) -> dict:
+    """生成报告数据（指定 variants 时额外按变体统计任务耗时）"""
+    tasks = {}
+    for record in raw.get('tasks', []):
+        task = dict(record)
+        task['duration'] = max(task['end'] - task['start'], 0) / 1000
+        task['category'] = categorize(task['path'])
+        tasks[task['path']] = task
+
+    if not tasks:
+        return {'tasks': 0, 'wall_seconds': 0, 'status': {}, 'categories': {}, 'projects': {}, 'variants': {}, 'slowest': [],
+                'critical_path': [], 'critical_seconds': 0, 'cache_misses': {}, 'miss_reasons': {}}
+
+    wall = (max(t['end'] for t in tasks.values()) - min(t['start'] for t in tasks.values())) / 1000
+
+    status = {}
+    categories = {}
+    projects = {}
+    by_variant = {}
+    for task in tasks.values():
+        status[task['status']] = status.get(task['status'], 0) + 1
+        groups = [(categories, task['category']), (projects, project_of(task['path']))]
+        if variants:
+            groups.append((by_variant, variant_of(task['path'], variants)))
+        for group, name in groups:
+            entry = group.setdefault(name, {'seconds': 0.0, 'tasks': 0, 'executed': 0})
+            entry['seconds'] += task['duration']
+            entry['tasks'] += 1
+            entry['executed'] += task['status'] == 'EXECUTED'
+
+    path = critical_path(tasks)
+
+    # 执行了的任务即未命中缓存（包括不可缓存的任务），按原因分组
+    misses = [t for t in tasks.values() if t['status'] == 'EXECUTED']
+    reasons = {}
+    for task in misses:
+        for reason in task['reasons'] or ['(未提供原因)']:
+            reasons[reason] = reasons.get(reason, 0) + 1
+
+    return {
+        'tasks': len(tasks),
+        'wall_seconds': wall,
+        'status': status,
+        'categories': dict(sorted(categories.items(), key=lambda item: item[1]['seconds'], reverse=True)),
+        'projects': dict(sorted(projects.items(), key=lambda item: item[1]['seconds'], reverse=True)),
+        'variants': by_variant,
+        'slowest': [
+            {key: t[key] for key in ('path', 'duration', 'status', 'category')}
+            for t in sorted(tasks.values(), key=lambda t: t['duration'], reverse=True)[:top]
+        ],
+        'critical_path': [
+            {key: tasks[p][key] for key in ('path', 'duration', 'status')} for p in path
+        ],
+        'critical_seconds': sum(tasks[p]['duration'] for p in path),
+        'cache_misses': {
+            t['path']: t['reasons'] for t in sorted(misses, key=lambda t: t['duration'], reverse=True)
+        },
+        'miss_reasons': dict(sorted(reasons.items(), key=lambda item: item[1], reverse=True)),
+    }
+
+
+def format_report(report: dict, top_reasons: int = 10) -> str:
+    """文本报告"""
+    lines = [f'🕒 Gradle 任务: {report["tasks"]} 个, 总耗时 {report["wall_seconds"]:.1f}s']
+    lines.append('  状态: ' + ', '.join(f'{name} {count}' for name, count in sorted(report['status'].items())))
+
+    lines.append('\n📂 按类别 (任务耗时累计，可能并行):')
+    for name, entry in report['categories'].items():
+        lines.append(f'  {name:<16}{entry["seconds"]:>9.1f}s  {entry["tasks"]:>4} 个任务, 执行 {entry["executed"]}')
+
+    if report.get('variants'):
+        lines.append('\n🧩 按变体:')
+        for name, entry in report['variants'].items():
+            lines.append(f'  {name:<24}{entry["seconds"]:>9.1f}s  {entry["tasks"]:>4} 个任务, 执行 {entry["executed"]}')
+
+    lines.append('\n📦 按模块 (前 10):')
+    for name, entry in list(report['projects'].items())[:10]:
+        lines.append(f'  {name:<40}{entry["seconds"]:>9.1f}s  {entry["tasks"]:>4} 个任务, 执行 {entry["executed"]}')
+
+    lines.append(f'\n🐢 最慢的 {len(report["slowest"])} 个任务:')
+    for task in report['slowest']:
+        lines.append(f'  {task["duration"]:>8.1f}s  {task["status"]:<11}{task["path"]}')
+
+    lines.append(f'\n🧭 关键路径 ({report["critical_seconds"]:.1f}s):')
+    for task in report['critical_path']:
+        lines.append(f'  {task["duration"]:>8.1f}s  {task["status"]:<11}{task["path"]}')
+
+    lines.append(f'\n❌ 未命中缓存: {len(report["cache_misses"])} 个任务执行，原因:')
+    for reason, count in list(report['miss_reasons'].items())[:top_reasons]:
+        lines.append(f'  {count:>5}  {reason}')
+    return '\n'.join(lines)
+
+
+def write_reports(report: dict, output_dir: Path) -> tuple[Path, Path]:
+    """写出文本与 JSON 报告"""
+    text_path = output_dir / 'gradle-task-report.txt'
+    json_path = output_dir / 'gradle-task-report.json'
+    text_path.write_text(format_report(report) + '\n', encoding='utf-8')
+    json_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    return text_path, json_path
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Gradle 任务耗时报告')
+    parser.add_argument('raw', help='init script 记录的原始数据')
+    parser.add_argument('--top', type=int, default=20, help='显示最慢的 N 个任务')
+    parser.add_argument('--output-dir', type=str, help='报告输出目录')
+    args = parser.parse_args()
+
+    report = analyze(json.loads(Path(args.raw).read_text(encoding='utf-8')), args.top)
+    print(format_report(report))
+    output_dir = Path(args.output_dir) if args.output_dir else get_project_root() / 'output'
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write_reports(report, output_dir)
+
+
+if __name__ == '__main__':
+    main()
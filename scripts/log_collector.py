@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+devWsLogger 日志收集服务
+基于 asyncio 的 WebSocket 服务，接收多台设备通过 src/utils/devWsLogger.ts 转发的 DevWsLogEntry，
+批量写入按大小轮转、gzip 压缩的 NDJSON 文件，并在控制台按级别/上下文过滤实时输出
+
+使用方法:
+    python scripts/log_collector.py [--port 8899] [--level warn] [--context KEY[=VALUE]] [--quiet]
+
+参数:
+    --port          监听端口（默认 8899）
+    --level         控制台实时输出的最低级别: debug / info / warn / error（默认 info）
+    --context       只输出包含指定上下文键（或键=值）的日志，可多次指定
+    --quiet         不在控制台实时输出，只写入文件
+    --queue-size    内存队列上限，队列满时丢弃新日志并计数（默认 10000）
+    --max-bytes     单个日志文件大小上限，超出后轮转并压缩（默认 32 MB）
+    --keep          保留的已压缩日志文件数量（默认 20）
+"""
+
+import sys
+import json
+import gzip
+import shutil
+import signal
+import base64
+import asyncio
+import hashlib
+import argparse
+import struct
+from pathlib import Path
+from datetime import datetime
+
+from toolchain import get_project_root
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+# 单条消息上限，防止异常客户端占满内存
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+LEVELS = {'debug': 0, 'info': 1, 'warn': 2, 'error': 3}
+
+# 单次批量写入的最大条数
+BATCH_SIZE = 500
+
+
+class WebSocketClosed(Exception):
+    """客户端关闭连接"""
+
+
+async def handshake(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+    """完成 WebSocket 握手"""
+    try:
+        request = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        return False
+
+    headers = {}
+    for line in request.decode('latin-1').split('\r\n')[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    key = headers.get('sec-websocket-key')
+    if headers.get('upgrade', '').lower() != 'websocket' or not key:
+        writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+        await writer.drain()
+        return False
+
+    accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+    writer.write(
+        'HTTP/1.1 101 Switching Protocols\r\n'
+        'Upgrade: websocket\r\n'
+        'Connection: Upgrade\r\n'
+        f'Sec-WebSocket-Accept: {accept}\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    return True
+
+
+def unmask(payload: bytes, mask: bytes) -> bytes:
+    """按 4 字节掩码还原数据（整数异或，避免逐字节循环）"""
+    if not payload:
+        return payload
+    length = len(payload)
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+
+
+def encode_frame(opcode: int, payload: bytes = b'') -> bytes:
+    """构造服务端帧（不加掩码）"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_message(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bytes:
+    """读取一条完整消息（处理分片、ping 与 close）"""
+    fragments = []
+    size = 0
+    while True:
+        first, second = await reader.readexactly(2)
+        fin = first & 0x80
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack('!H', await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack('!Q', await reader.readexactly(8))
+        if length > MAX_MESSAGE_SIZE:
+            raise WebSocketClosed('消息过大')
+
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask:
+            payload = unmask(payload, mask)
+
+        if opcode == OPCODE_CLOSE:
+            writer.write(encode_frame(OPCODE_CLOSE, payload[:2]))
+            raise WebSocketClosed()
+        if opcode == OPCODE_PING:
+            writer.write(encode_frame(OPCODE_PONG, payload))
+            continue
+        if opcode == OPCODE_PONG:
+            continue
+
+        fragments.append(payload)
+        size += length
+        if size > MAX_MESSAGE_SIZE:
+            raise WebSocketClosed('消息过大')
+        if fin:
+            return b''.join(fragments)
+
+
+class RotatingNdjsonWriter:
+    """按大小轮转的 NDJSON 文件，轮转后的文件在后台线程中 gzip 压缩"""
+
+    def __init__(self, log_dir: Path, max_bytes: int, keep: int):
+        self.log_dir = log_dir
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.file = None
+        self.path = None
+        self.size = 0
+        self.pending: set[asyncio.Task] = set()
+
+    def _open(self):
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        self.path = self.log_dir / f'devws-{timestamp}.ndjson'
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.size = 0
+
+    def write_lines(self, lines: list[str]):
+        """写入一批日志行，必要时轮转"""
+        if self.file is None:
+            self._open()
+        data = ''.join(lines)
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+        if self.size >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        """关闭当前文件并在后台压缩"""
+        if self.file is None:
+            return
+        self.file.close()
+        path = self.path
+        self.file = None
+        task = asyncio.get_running_loop().create_task(asyncio.to_thread(self._compress, path))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    def _compress(self, path: Path):
+        with open(path, 'rb') as src, gzip.open(path.with_suffix('.ndjson.gz'), 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        path.unlink()
+        archives = sorted(self.log_dir.glob('devws-*.ndjson.gz'))
+        for old in archives[:-self.keep] if self.keep else []:
+            old.unlink()
+
+    async def close(self):
+        """压缩当前文件并等待后台任务完成"""
+        self.rotate()
+        if self.pending:
+            await asyncio.gather(*self.pending)
+
+
+class LogCollector:
+    """接收、排队、批量落盘与实时过滤输出"""
+
+    def __init__(self, writer: RotatingNdjsonWriter, queue_size: int, min_level: str,
+                 context_filters: list[str], quiet: bool):
+        self.writer = writer
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.min_level = LEVELS[min_level]
+        self.context_filters = [f.split('=', 1) if '=' in f else [f, None] for f in context_filters]
+        self.quiet = quiet
+        self.stats = {'clients': 0, 'received': 0, 'written': 0, 'dropped': 0, 'invalid': 0}
+
+    def matches(self, record: dict) -> bool:
+        """是否满足控制台输出的过滤条件"""
+        if LEVELS.get(record.get('level'), 0) < self.min_level:
+            return False
+        context = record.get('context') or {}
+        for key, value in self.context_filters:
+            if key not in context:
+                return False
+            if value is not None and str(context[key]) != value:
+                return False
+        return True
+
+    def tail(self, record: dict):
+        """实时输出一条日志"""
+        context = record.get('context')
+        suffix = f' {json.dumps(context, ensure_ascii=False)}' if context else ''
+        print(f'[{record.get("timestamp", "")}] {str(record.get("level", "")).upper():<5} '
+              f'{record["device"]} {record.get("message", "")}{suffix}')
+
+    def accept(self, message: bytes, device: str):
+        """解析一条消息并放入队列，队列满时丢弃"""
+        try:
+            record = json.loads(message)
+        except ValueError:
+            self.stats['invalid'] += 1
+            return
+        if not isinstance(record, dict) or record.get('type') != 'js-log':
+            self.stats['invalid'] += 1
+            return
+
+        self.stats['received'] += 1
+        record['device'] = device
+        record['received_at'] = datetime.now().isoformat(timespec='milliseconds')
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+            return
+
+        if not self.quiet and self.matches(record):
+            self.tail(record)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理单个设备连接"""
+        peer = writer.get_extra_info('peername')
+        device = f'{peer[0]}:{peer[1]}' if peer else 'unknown'
+        if not await handshake(reader, writer):
+            writer.close()
+            return
+
+        self.stats['clients'] += 1
+        print(f'📱 设备已连接: {device}')
+        try:
+            while True:
+                self.accept(await read_message(reader, writer), device)
+        except (WebSocketClosed, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.stats['clients'] -= 1
+            writer.close()
+            print(f'📴 设备已断开: {device}')
+
+    async def write_loop(self):
+        """批量从队列取出日志并写入文件：有日志时一次取走队列中已有的全部（最多 BATCH_SIZE 条）"""
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self.flush(batch)
+            # 让出事件循环，使读取协程在大批量写入之间继续接收
+            await asyncio.sleep(0)
+
+    def flush(self, batch: list[dict]):
+        """写入一批日志"""
+        lines = [json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n' for record in batch]
+        self.writer.write_lines(lines)
+        self.stats['written'] += len(batch)
+
+    def drain(self):
+        """退出前写入队列中剩余的日志"""
+        batch = []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            self.flush(batch)
+
+    def print_stats(self):
+        """输出统计"""
+        s = self.stats
+        print(f'📊 接收 {s["received"]}, 写入 {s["written"]}, 丢弃 {s["dropped"]}, 无效 {s["invalid"]}')
+
+
+async def serve(args) -> int:
+    """启动服务直到收到退出信号"""
+    log_dir = Path(args.log_dir) if args.log_dir else get_project_root() / 'output' / 'logs'
+    file_writer = RotatingNdjsonWriter(log_dir, args.max_bytes, args.keep)
+    collector = LogCollector(file_writer, args.queue_size, args.level, args.context, args.quiet)
+
+    try:
+        server = await asyncio.start_server(collector.handle_client, args.host, args.port)
+    except OSError as e:
+        print(f'❌ 日志收集服务启动失败: {e}')
+        return 1
+
+    print(f'📝 日志收集服务: ws://{args.host}:{args.port}，写入 {log_dir}')
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    write_task = asyncio.create_task(collector.write_loop())
+    async with server:
+        await stop.wait()
+
+    write_task.cancel()
+    collector.drain()
+    await file_writer.close()
+    collector.print_stats()
+    return 0
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='devWsLogger 日志收集服务')
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址')
+    parser.add_argument('--port', type=int, default=8899, help='监听端口')
+    parser.add_argument('--log-dir', type=str, help='日志目录（默认 output/logs）')
+    parser.add_argument('--level', choices=list(LEVELS), default='info', help='控制台输出的最低级别')
+    parser.add_argument('--context', action='append', default=[], help='上下文过滤 KEY 或 KEY=VALUE')
+    parser.add_argument('--quiet', action='store_true', help='不在控制台实时输出')
+    parser.add_argument('--queue-size', type=int, default=10000, help='内存队列上限')
+    parser.add_argument('--max-bytes', type=int, default=32 * 1024 * 1024, help='单个日志文件大小上限')
+    parser.add_argument('--keep', type=int, default=20, help='保留的压缩日志文件数量')
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(serve(args)))
+
+
+if __name__ == '__main__':
+    main()
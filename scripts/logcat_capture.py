@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Android logcat 实时采集
+对每台已连接设备流式读取 `adb logcat -v threadtime`，只保留本应用进程与 ReactNativeJS/崩溃相关 TAG 的日志，
+放入固定大小的内存环形缓冲区；检测到本应用的崩溃时再收集 POST_CRASH_LINES 行或 POST_CRASH_SECONDS 秒
+（应用进程崩溃后往往不再输出日志），然后将缓冲区写入 output/logs
+
+使用方法:
+    python scripts/logcat_capture.py [--buffer N] [--quiet] [--adb PATH] [--replay FILE]
+
+参数:
+    --buffer    每台设备环形缓冲区保留的行数（默认 5000）
+    --quiet     不在控制台输出过滤后的日志
+    --adb       adb 可执行文件路径（默认使用 PATH 中的 adb，也可通过 ADB 环境变量指定）
+    --replay    从录制的 logcat 文本回放，不连接设备
+    --pid       回放时应用进程的 PID
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+from datetime import datetime
+
+from toolchain import get_connected_devices, get_project_root
+
+PACKAGE_NAME = 'com.storeverserepoapp'
+
+# threadtime 格式: 01-02 03:04:05.678  1234  5678 E TagName : message
+THREADTIME_LINE = re.compile(
+    r'^(?P<date>\d\d-\d\d)\s+(?P<time>\d\d:\d\d:\d\d\.\d+)\s+(?P<pid>\d+)\s+(?P<tid>\d+)\s+'
+    r'(?P<level>[VDIWEFA])\s+(?P<tag>.*?)\s*: (?P<message>.*)$'
+)
+# ActivityManager 的进程启动记录，用于跟踪应用重启后的新 PID
+PROCESS_START = re.compile(r'Start proc (\d+):' + re.escape(PACKAGE_NAME) + r'[/ ]')
+
+APP_TAGS = frozenset({'ReactNativeJS', 'ReactNative', 'AndroidRuntime', 'DEBUG', 'libc', 'CRASH'})
+CRASH_MARKERS = (
+    re.compile(r'FATAL EXCEPTION'),
+    re.compile(r'\*\*\* \*\*\* \*\*\* \*\*\* \*\*\*'),
+    re.compile(r'Fatal signal \d+'),
+)
+
+# 崩溃后继续收集的行数，包含完整堆栈后再写盘；未达到行数时最多等待的秒数
+POST_CRASH_LINES = 200
+POST_CRASH_SECONDS = 5.0
+
+# 主线程检查崩溃日志截止时间的间隔（秒）
+TICK_INTERVAL = 0.2
+
+
+def get_adb(adb: str | None = None) -> str:
+    """adb 可执行文件：参数 > ADB 环境变量 > PATH"""
+    return adb or os.environ.get('ADB') or 'adb'
+
+
+def get_app_pid(adb: str, serial: str) -> str | None:
+    """应用当前进程 PID"""
+    result = subprocess.run([adb, '-s', serial, 'shell', 'pidof', '-s', PACKAGE_NAME], capture_output=True, text=True)
+    pid = result.stdout.strip()
+    return pid if pid.isdigit() else None
+
+
+class LogcatCapture:
+    """单台设备的过滤器与环形缓冲区（读取线程 feed，主线程 tick / finish，由锁保护）"""
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, serial: str, buffer_lines: int, log_dir: Path, app_pid: str | None = None, quiet: bool = False):
+        self.serial = serial
+        self.buffer = deque(maxlen=buffer_lines)
+        self.log_dir = log_dir
+        self.app_pid = app_pid
+        self.quiet = quiet
+        self.post_crash_remaining = 0
+        self.post_crash_deadline = None
+        self.lock = threading.Lock()
+        self.crash_files: list[Path] = []
+        self.stats = {'lines': 0, 'matched': 0, 'crashes': 0}
+
+    def is_relevant(self, match: re.Match) -> bool:
+        """是否属于本应用进程或关注的 TAG"""
+        return match.group('pid') == self.app_pid or match.group('tag') in APP_TAGS
+
+    def is_app_line(self, match: re.Match) -> bool:
+        """是否由本应用进程输出或提到本应用（关注的 TAG 也包含其他应用与系统进程的崩溃）"""
+        return match.group('pid') == self.app_pid or PACKAGE_NAME in match.group('message')
+
+    def feed(self, line: str):
+        """处理一行 logcat 输出"""
+        with self.lock:
+            self.feed_locked(line)
+            self.check_deadline()
+
+    def feed_locked(self, line: str):
+        self.stats['lines'] += 1
+        match = THREADTIME_LINE.match(line)
+        if not match:
+            return
+
+        message = match.group('message')
+        started = PROCESS_START.search(message)
+        if started:
+            self.app_pid = started.group(1)
+
+        if not self.is_relevant(match):
+            return
+
+        self.stats['matched'] += 1
+        self.buffer.append(line)
+        if not self.quiet:
+            print(f'[{self.serial}] {line}')
+
+        if self.post_crash_remaining:
+            self.post_crash_remaining -= 1
+            if not self.post_crash_remaining:
+                self.flush('crash')
+        elif self.is_app_line(match) and any(marker.search(message) for marker in CRASH_MARKERS):
+            self.stats['crashes'] += 1
+            self.post_crash_remaining = POST_CRASH_LINES
+            self.post_crash_deadline = self.clock() + POST_CRASH_SECONDS
+            print(f'💥 [{self.serial}] 检测到崩溃，继续收集 {POST_CRASH_LINES} 行'
+                  f'（最多 {POST_CRASH_SECONDS:.0f}s）后写入文件')
+
+    def check_deadline(self):
+        """崩溃后超过 POST_CRASH_SECONDS 时不再等待后续日志（调用方持有锁）"""
+        if self.post_crash_remaining and self.clock() >= self.post_crash_deadline:
+            self.flush('crash')
+
+    def tick(self):
+        """定期调用：没有新日志时也能按截止时间写入崩溃日志"""
+        with self.lock:
+            self.check_deadline()
+
+    def flush(self, reason: str) -> Path | None:
+        """将环形缓冲区写入文件"""
+        if not self.buffer:
+            return None
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        serial = re.sub(r'[^\w.-]', '_', self.serial)
+        # 同一秒内多次写入时以序号区分
+        path = self.log_dir / f'logcat-{reason}-{serial}-{timestamp}-{len(self.crash_files) + 1}.log'
+        path.write_text('\n'.join(self.buffer) + '\n', encoding='utf-8')
+        self.crash_files.append(path)
+        self.post_crash_remaining = 0
+        self.post_crash_deadline = None
+        print(f'📄 [{self.serial}] 日志已写入: {path}')
+        return path
+
+    def finish(self):
+        """结束采集：未写完的崩溃日志立即写入"""
+        with self.lock:
+            if self.post_crash_remaining:
+                self.flush('crash')
+
+    def consume(self, stream):
+        """逐行消费输出流"""
+        for raw in stream:
+            self.feed(raw.rstrip('\r\n'))
+        self.finish()
+
+
+def open_logcat(adb: str, serial: str) -> subprocess.Popen:
+    """启动单台设备的 logcat 流"""
+    return subprocess.Popen(
+        [adb, '-s', serial, 'logcat', '-v', 'threadtime', '-T', '1'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        bufsize=1,
+    )
+
+
+def read_stream(process: subprocess.Popen, capture: LogcatCapture):
+    """读取线程：逐行交给 capture，流结束（设备断开或进程被终止）时返回"""
+    for raw in process.stdout:
+        capture.feed(raw.rstrip('\r\n'))
+
+
+def run_capture(adb: str | None = None, buffer_lines: int = 5000, quiet: bool = False,
+                stop: threading.Event | None = None) -> list[LogcatCapture]:
+    """对所有已连接设备采集 logcat，直到 Ctrl+C、stop 被设置或设备断开"""
+    adb = get_adb(adb)
+    log_dir = get_project_root() / 'output' / 'logs'
+    try:
+        devices = get_connected_devices(adb)
+    except FileNotFoundError:
+        print('❌ adb 未找到，请确保已安装 Android SDK platform-tools')
+        return []
+    if not devices:
+        print('❌ 未检测到连接的 Android 设备')
+        return []
+
+    stop = stop or threading.Event()
+    captures = []
+    processes = []
+    threads = []
+    for serial in devices:
+        capture = LogcatCapture(serial, buffer_lines, log_dir, get_app_pid(adb, serial), quiet)
+        process = open_logcat(adb, serial)
+        thread = threading.Thread(target=read_stream, args=(process, capture), daemon=True)
+        thread.start()
+        captures.append(capture)
+        processes.append(process)
+        threads.append(thread)
+
+    print(f'📱 正在采集 {len(devices)} 台设备的 logcat，按 Ctrl+C 退出')
+    try:
+        while not stop.is_set() and any(thread.is_alive() for thread in threads):
+            stop.wait(TICK_INTERVAL)
+            for capture in captures:
+                capture.tick()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # 终止 adb 使阻塞在读取上的线程退出，读取线程全部结束后再写入剩余的崩溃日志
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for thread in threads:
+            thread.join()
+        for process in processes:
+            process.wait()
+        for capture in captures:
+            capture.finish()
+
+    print_summary(captures)
+    return captures
+
+
+def print_summary(captures: list[LogcatCapture]):
+    """输出采集统计"""
+    for capture in captures:
+        s = capture.stats
+        print(f'📊 [{capture.serial}] 读取 {s["lines"]} 行, 匹配 {s["matched"]} 行, 崩溃 {s["crashes"]} 次')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Android logcat 实时采集')
+    parser.add_argument('--buffer', type=int, default=5000, help='环形缓冲区行数')
+    parser.add_argument('--quiet', action='store_true', help='不在控制台输出')
+    parser.add_argument('--adb', type=str, help='adb 可执行文件路径')
+    parser.add_argument('--replay', type=str, help='回放录制的 logcat 文本')
+    parser.add_argument('--pid', type=str, help='回放时的应用 PID')
+    args = parser.parse_args()
+
+    if args.replay:
+        capture = LogcatCapture('replay', args.buffer, get_project_root() / 'output' / 'logs', args.pid, args.quiet)
+        with open(args.replay, encoding='utf-8', errors='replace') as f:
+            capture.consume(f)
+        print_summary([capture])
+        return
+
+    if not run_capture(args.adb, args.buffer, args.quiet):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Metro 转换缓存管理
+将 Metro 的转换缓存放在项目缓存目录 .build-cache/metro-cache/<key>/ 中（通过 metro.config.js 读取的
+METRO_CACHE_DIR 环境变量），key 由 metro.config.js、babel.config.js、yarn.lock 中 Babel/Metro 相关包的版本
+以及 .env* 文件共同决定。支持导出/导入为单个归档，便于 CI 保存与恢复；按总大小上限以 key 为单位进行 LRU 清理，
+当前构建与最近使用过的 key 不清理
+
+使用方法:
+    python scripts/metro_cache.py info
+    python scripts/metro_cache.py export metro-cache.tar.gz
+    python scripts/metro_cache.py import metro-cache.tar.gz
+    python scripts/metro_cache.py prune [--max-size 2GB]
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+
+from toolchain import get_cache_dir, get_project_root, parse_size
+
+METRO_CACHE_ENV = 'METRO_CACHE_DIR'
+
+# 缓存总大小上限，超出后按最近使用时间清理
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+
+# 影响转换结果的项目文件
+KEY_FILES = ('metro.config.js', 'babel.config.js')
+# yarn.lock 中影响转换结果的包（Babel、Metro、React Native 的 Babel preset 与 worklets 插件等）
+TRANSFORM_PACKAGES = re.compile(
+    r'^(@babel/|babel-|metro|@react-native/(babel|metro)|hermes-parser|react-native-worklets|react-native-reanimated)'
+)
+
+LAST_USED_NAME = '.last-used'
+
+# 缓存目录在工作树间共享（见 build_queue.py），该时间内使用过的 key 可能属于其他分支正在运行的 Metro，清理时保留
+RECENT_SECONDS = 30 * 60
+
+
+def transform_package_versions(yarn_lock: Path) -> list[str]:
+    """从 yarn.lock 读取转换相关包的 name@version"""
+    if not yarn_lock.exists():
+        return []
+    versions = []
+    name = None
+    for line in yarn_lock.read_text(encoding='utf-8').splitlines():
+        if line and not line.startswith((' ', '#')):
+            spec = line.split(',')[0].strip().strip('"')
+            package = spec[:spec.index('@', 1)] if '@' in spec[1:] else spec.rstrip(':')
+            name = package if TRANSFORM_PACKAGES.match(package) else None
+        elif name and line.strip().startswith('version '):
+            versions.append(f'{name}@{line.split()[1].strip(chr(34))}')
+            name = None
+    return sorted(set(versions))
+
+
+def cache_key(project_root: Path | None = None) -> str:
+    """Metro 缓存 key"""
+    project_root = project_root or get_project_root()
+    digest = hashlib.sha256()
+    env_files = sorted(path.name for path in project_root.glob('.env*') if path.is_file())
+    for name in (*KEY_FILES, *env_files):
+        path = project_root / name
+        digest.update(name.encode())
+        digest.update(path.read_bytes() if path.exists() else b'')
+    digest.update('\n'.join(transform_package_versions(project_root / 'yarn.lock')).encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_root() -> Path:
+    return get_cache_dir('metro-cache')
+
+
+def activate(project_root: Path | None = None) -> Path:
+    """为当前进程（及其启动的 Metro）设置 METRO_CACHE_DIR，返回缓存目录"""
+    cache_dir = cache_root() / cache_key(project_root)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    (cache_dir / LAST_USED_NAME).touch()
+    os.environ[METRO_CACHE_ENV] = str(cache_dir)
+    return cache_dir
+
+
+def iter_files(directory: Path):
+    """产出 (路径, stat)"""
+    for root, _, filenames in os.walk(directory):
+        for name in filenames:
+            path = Path(root) / name
+            try:
+                yield path, path.stat()
+            except FileNotFoundError:
+                continue
+
+
+def directory_size(directory: Path) -> int:
+    return sum(st.st_size for _, st in iter_files(directory))
+
+
+def prune(max_size: int = DEFAULT_MAX_SIZE, keep: Path | None = None, recent_seconds: float = RECENT_SECONDS) -> dict:
+    """LRU 清理：按最近使用时间删除整个 key 目录，keep（当前构建的 key）与 recent_seconds 内使用过的 key 不删除"""
+    root = cache_root()
+    stats = {'before': 0, 'after': 0, 'removed_keys': 0, 'in_use_keys': 0}
+    cutoff = time.time() - recent_seconds
+    key_dirs = []
+    for key_dir in root.iterdir():
+        if not key_dir.is_dir():
+            continue
+        # 最近使用时间：activate() 更新的标记与 Metro 最近写入的缓存文件中较新的一个
+        last_used = key_dir.stat().st_mtime
+        size = 0
+        for _, st in iter_files(key_dir):
+            last_used = max(last_used, st.st_mtime)
+            size += st.st_size
+        key_dirs.append((last_used, key_dir, size))
+        stats['before'] += size
+
+    total = stats['before']
+    for last_used, key_dir, size in sorted(key_dirs, key=lambda item: item[0]):
+        if total <= max_size:
+            break
+        if key_dir == keep or last_used > cutoff:
+            stats['in_use_keys'] += 1
+            continue
+        shutil.rmtree(key_dir, ignore_errors=True)
+        total -= size
+        stats['removed_keys'] += 1
+
+    stats['after'] = total
+    return stats
+
+
+def export_cache(archive: Path, project_root: Path | None = None) -> Path:
+    """将当前 key 的缓存导出为 tar.gz"""
+    import tarfile
+
+    cache_dir = cache_root() / cache_key(project_root)
+    if not cache_dir.exists():
+        raise FileNotFoundError(cache_dir)
+    with tarfile.open(archive, 'w:gz', compresslevel=3) as tar:
+        tar.add(cache_dir, arcname=cache_dir.name)
+    return cache_dir
+
+
+def import_cache(archive: Path) -> list[str]:
+    """导入归档中的缓存目录，返回导入的 key"""
+    import tarfile
+
+    root = cache_root()
+    with tarfile.open(archive, 'r:*') as tar:
+        members = []
+        for member in tar.getmembers():
+            target = (root / member.name).resolve()
+            if not (member.isfile() or member.isdir()) or root.resolve() not in target.parents:
+                continue
+            members.append(member)
+        tar.extractall(root, members=members)
+    return sorted({member.name.split('/')[0] for member in members})
+
+
+def print_prune_stats(stats: dict, max_size: int):
+    mb = 1024 * 1024
+    print(f'  🧹 Metro 缓存 {stats["before"] / mb:.1f} MB → {stats["after"] / mb:.1f} MB '
+          f'(上限 {max_size / mb:.0f} MB, 删除 {stats["removed_keys"]} 个 key, '
+          f'保留使用中的 {stats["in_use_keys"]} 个 key)')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Metro 转换缓存管理')
+    parser.add_argument('command', choices=['info', 'export', 'import', 'prune'], help='操作')
+    parser.add_argument('archive', nargs='?', help='export/import 的归档路径')
+    parser.add_argument('--max-size', type=str, default='2GB', help='缓存总大小上限')
+    args = parser.parse_args()
+
+    if args.command in ('export', 'import') and not args.archive:
+        print(f'❌ {args.command} 需要指定归档路径')
+        sys.exit(1)
+
+    key = cache_key()
+    if args.command == 'info':
+        print(f'🔑 当前 key: {key}')
+        for key_dir in sorted(cache_root().iterdir()):
+            if key_dir.is_dir():
+                flag = ' ← 当前' if key_dir.name == key else ''
+                print(f'  {key_dir.name}  {directory_size(key_dir) / 1024 / 1024:.1f} MB{flag}')
+    elif args.command == 'export':
+        start = time.perf_counter()
+        try:
+            export_cache(Path(args.archive))
+        except FileNotFoundError:
+            print(f'❌ 当前 key ({key}) 没有 Metro 缓存')
+            sys.exit(1)
+        size = Path(args.archive).stat().st_size / 1024 / 1024
+        print(f'📦 已导出 Metro 缓存 {key}: {args.archive} ({size:.1f} MB, {time.perf_counter() - start:.1f}s)')
+    elif args.command == 'import':
+        keys = import_cache(Path(args.archive))
+        status = '命中当前 key' if key in keys else f'与当前 key ({key}) 不匹配'
+        print(f'📥 已导入 Metro 缓存: {", ".join(keys) or "无"} ({status})')
+    else:
+        max_size = parse_size(args.max_size)
+        current = cache_root() / key
+        print_prune_stats(prune(max_size, current if current.exists() else None), max_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+node_modules 快照仓库
+以 yarn.lock、package.json、patches/ 与 Node 版本的哈希为 key，保存安装并打补丁后的完整 node_modules。
+文件按内容哈希在所有快照间去重存储，恢复时优先使用 reflink（写时复制），不支持时复制。
+不使用硬链接：yarn install 与 postinstall 会就地改写 node_modules 中的文件，硬链接会把修改写回共享仓库
+
+使用方法:
+    python scripts/node_modules_cache.py save            # 保存当前 node_modules 为快照
+    python scripts/node_modules_cache.py restore         # 按当前 yarn.lock 恢复快照
+    python scripts/node_modules_cache.py list            # 列出快照
+    python scripts/node_modules_cache.py prune [--keep N]  # 只保留最近使用的 N 个快照（默认 5）
+"""
+
+import os
+import sys
+import gzip
+import json
+import stat
+import shutil
+import hashlib
+import argparse
+import platform
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from toolchain import get_cache_dir, get_project_root, probe_version
+
+SNAPSHOT_VERSION = 1
+# 写在 node_modules 中的标记文件，记录当前树对应的快照 key
+MARKER_NAME = '.snapshot-key'
+
+# Linux FICLONE ioctl
+FICLONE = 0x40049409
+
+HASH_WORKERS = 8
+
+
+def snapshot_key(project_root: Path | None = None) -> str:
+    """快照 key：依赖声明、补丁、Node 版本与平台共同决定安装结果"""
+    project_root = project_root or get_project_root()
+    digest = hashlib.sha256()
+    for name in ('yarn.lock', 'package.json'):
+        path = project_root / name
+        digest.update(name.encode())
+        digest.update(path.read_bytes() if path.exists() else b'')
+
+    patches_dir = project_root / 'patches'
+    if patches_dir.exists():
+        for patch in sorted(patches_dir.rglob('*')):
+            if patch.is_file():
+                digest.update(patch.relative_to(project_root).as_posix().encode())
+                digest.update(patch.read_bytes())
+
+    digest.update(f'{probe_version(["node", "--version"])}:{sys.platform}:{platform.machine()}'.encode())
+    return digest.hexdigest()[:32]
+
+
+def read_marker(node_modules: Path) -> str | None:
+    """当前 node_modules 对应的快照 key"""
+    marker = node_modules / MARKER_NAME
+    return marker.read_text(encoding='utf-8').strip() if marker.exists() else None
+
+
+def write_marker(node_modules: Path, key: str):
+    (node_modules / MARKER_NAME).write_text(key + '\n', encoding='utf-8')
+
+
+def clone_file(src: Path, dst: Path) -> bool:
+    """reflink 复制（APFS clonefile / Linux FICLONE），不支持时返回 False"""
+    if sys.platform == 'darwin':
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+
+    if sys.platform.startswith('linux'):
+        import fcntl
+
+        with open(src, 'rb') as source, open(dst, 'wb') as target:
+            try:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+                return True
+            except OSError:
+                pass
+        dst.unlink()
+    return False
+
+
+class SnapshotStore:
+    """内容寻址的文件仓库 + 每个 key 一份清单"""
+
+    def __init__(self, cache_dir: Path):
+        self.objects_dir = cache_dir / 'objects'
+        self.snapshots_dir = cache_dir / 'snapshots'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+
+    def object_path(self, digest: str, executable: bool) -> Path:
+        """可执行位不包含在内容哈希中，因此可执行文件单独存放"""
+        return self.objects_dir / digest[:2] / (digest + ('.x' if executable else ''))
+
+    def manifest_path(self, key: str) -> Path:
+        return self.snapshots_dir / f'{key}.json.gz'
+
+    def has(self, key: str) -> bool:
+        return self.manifest_path(key).exists()
+
+    def load_manifest(self, key: str) -> dict:
+        with gzip.open(self.manifest_path(key), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_snapshots(self) -> list[dict]:
+        """按最近使用时间倒序"""
+        snapshots = []
+        for path in self.snapshots_dir.glob('*.json.gz'):
+            snapshots.append({
+                'key': path.name[:-len('.json.gz')],
+                'used': path.stat().st_mtime,
+                'size': path.stat().st_size,
+            })
+        return sorted(snapshots, key=lambda item: item['used'], reverse=True)
+
+    def store_object(self, src: Path, digest: str, executable: bool):
+        """复制文件到仓库（不链接活动的 node_modules，避免之后的就地修改污染仓库）"""
+        target = self.object_path(digest, executable)
+        if target.exists():
+            return
+        target.parent.mkdir(exist_ok=True)
+        tmp = target.with_name(f'{target.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        if not clone_file(src, tmp):
+            shutil.copyfile(src, tmp)
+        os.chmod(tmp, 0o555 if executable else 0o444)
+        os.replace(tmp, target)
+
+    def save(self, key: str, node_modules: Path) -> dict:
+        """将 node_modules 保存为快照，返回统计信息"""
+        entries = []
+        files = []
+        for root, dirnames, filenames in os.walk(node_modules):
+            root_path = Path(root)
+            rel_root = root_path.relative_to(node_modules).as_posix()
+            for name in sorted(dirnames + filenames):
+                path = root_path / name
+                rel = name if rel_root == '.' else f'{rel_root}/{name}'
+                if rel == MARKER_NAME:
+                    continue
+                if path.is_symlink():
+                    entries.append([rel, 'link', os.readlink(path)])
+                elif path.is_dir():
+                    entries.append([rel, 'dir', None])
+                else:
+                    files.append((rel, path))
+
+        def hash_file(item):
+            rel, path = item
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            executable = bool(path.stat().st_mode & stat.S_IXUSR)
+            self.store_object(path, digest, executable)
+            return [rel, 'x' if executable else 'f', digest]
+
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+            entries.extend(pool.map(hash_file, files))
+
+        manifest = {'version': SNAPSHOT_VERSION, 'key': key, 'created': time.time(), 'entries': entries}
+        tmp = self.manifest_path(key).with_name(f'{key}.{os.getpid()}.tmp')
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self.manifest_path(key))
+        return {'files': len(files), 'entries': len(entries)}
+
+    def restore(self, key: str, node_modules: Path) -> dict:
+        """按清单重建 node_modules：优先 reflink，不支持时复制"""
+        manifest = self.load_manifest(key)
+        if node_modules.exists() or node_modules.is_symlink():
+            remove_tree(node_modules)
+        node_modules.mkdir()
+
+        stats = {'files': 0, 'clone': 0, 'copy': 0}
+        mode = None
+        for rel, kind, value in manifest['entries']:
+            path = node_modules / rel
+            if kind == 'dir':
+                path.mkdir(parents=True, exist_ok=True)
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if kind == 'link':
+                os.symlink(value, path)
+                continue
+
+            executable = kind == 'x'
+            source = self.object_path(value, executable)
+            mode = place_file(source, path, executable, mode)
+            stats['files'] += 1
+            stats[mode] += 1
+
+        write_marker(node_modules, key)
+        # 以清单 mtime 作为最近使用时间，供 prune 使用
+        os.utime(self.manifest_path(key))
+        return stats
+
+    def prune(self, keep: int) -> dict:
+        """删除最久未使用的快照以及不再被引用的文件"""
+        snapshots = self.list_snapshots()
+        removed = 0
+        for snapshot in snapshots[keep:]:
+            self.manifest_path(snapshot['key']).unlink()
+            removed += 1
+
+        referenced = set()
+        for snapshot in snapshots[:keep]:
+            for rel, kind, value in self.load_manifest(snapshot['key'])['entries']:
+                if kind in ('f', 'x'):
+                    referenced.add(self.object_path(value, kind == 'x').name)
+
+        freed = 0
+        for obj in self.objects_dir.glob('*/*'):
+            if obj.name not in referenced:
+                freed += obj.stat().st_size
+                obj.unlink()
+        return {'snapshots': removed, 'bytes': freed}
+
+
+def place_file(source: Path, target: Path, executable: bool, mode: str | None) -> str:
+    """放置单个文件，mode 记录上一次成功的方式以避免重复尝试"""
+    if mode in (None, 'clone') and clone_file(source, target):
+        os.chmod(target, 0o755 if executable else 0o644)
+        return 'clone'
+    shutil.copyfile(source, target)
+    os.chmod(target, 0o755 if executable else 0o644)
+    return 'copy'
+
+
+def remove_tree(path: Path):
+    """删除目录树（包括只读文件与目录）"""
+    if path.is_symlink():
+        path.unlink()
+        return
+
+    def on_error(func, failed_path, _):
+        os.chmod(os.path.dirname(failed_path), 0o755)
+        func(failed_path)
+
+    shutil.rmtree(path, onerror=on_error)
+
+
+def restore_or_none(project_root: Path | None = None) -> str | None:
+    """node_modules 已与当前 key 一致或成功恢复快照时返回 key，否则返回 None"""
+    project_root = project_root or get_project_root()
+    node_modules = project_root / 'node_modules'
+    key = snapshot_key(project_root)
+
+    if read_marker(node_modules) == key:
+        print(f'  ✅ node_modules 已是最新 (快照 {key[:12]})')
+        return key
+
+    store = SnapshotStore(get_cache_dir('node_modules'))
+    if not store.has(key):
+        return None
+
+    start = time.perf_counter()
+    stats = store.restore(key, node_modules)
+    print(f'  ♻️ 已从快照 {key[:12]} 恢复 node_modules: {stats["files"]} 个文件 '
+          f'(reflink {stats["clone"]}, 复制 {stats["copy"]}) '
+          f'{time.perf_counter() - start:.1f}s')
+    return key
+
+
+def save_snapshot(project_root: Path | None = None) -> str | None:
+    """保存当前 node_modules 为快照"""
+    project_root = project_root or get_project_root()
+    node_modules = project_root / 'node_modules'
+    if not node_modules.is_dir():
+        print('  ⚠️ node_modules 不存在，跳过快照保存')
+        return None
+
+    key = snapshot_key(project_root)
+    store = SnapshotStore(get_cache_dir('node_modules'))
+    start = time.perf_counter()
+    stats = store.save(key, node_modules)
+    write_marker(node_modules, key)
+    print(f'  💾 已保存 node_modules 快照 {key[:12]}: {stats["files"]} 个文件 '
+          f'{time.perf_counter() - start:.1f}s')
+    return key
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='node_modules 快照仓库')
+    parser.add_argument('command', choices=['save', 'restore', 'list', 'prune'], help='操作')
+    parser.add_argument('--keep', type=int, default=5, help='prune 时保留的快照数')
+    args = parser.parse_args()
+
+    if args.command == 'save':
+        if save_snapshot() is None:
+            sys.exit(1)
+    elif args.command == 'restore':
+        if restore_or_none() is None:
+            print(f'❌ 没有与当前 yarn.lock 匹配的快照 ({snapshot_key()[:12]})')
+            sys.exit(1)
+    elif args.command == 'list':
+        current = snapshot_key()
+        for snapshot in SnapshotStore(get_cache_dir('node_modules')).list_snapshots():
+            used = time.strftime('%Y-%m-%d %H:%M', time.localtime(snapshot['used']))
+            flag = ' ← 当前' if snapshot['key'] == current else ''
+            print(f'  {snapshot["key"][:12]}  最近使用 {used}{flag}')
+    else:
+        stats = SnapshotStore(get_cache_dir('node_modules')).prune(args.keep)
+        print(f'🗑️ 删除 {stats["snapshots"]} 个快照，释放 {stats["bytes"] / 1024 / 1024:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Bundle 图片资源优化
+对 react-native bundle 输出到 res/drawable-* 的 PNG 进行无损重压缩，可选转换为 WebP。
+处理结果按内容哈希缓存，重复构建时直接复用；缓存超出大小上限时按最近使用时间清理
+
+使用方法:
+    python scripts/optimize_assets.py [--res-dir PATH] [--webp-quality N]
+
+参数:
+    --res-dir       资源目录（默认 android/app/src/release/res，即 build_android.py 输出 bundle 资源的位置）
+    --webp-quality  转换为 WebP 的质量 (1-100)，不指定则只做无损 PNG 压缩（需要 cwebp）
+    --max-cache-size  缓存总大小上限（默认 512MB）
+"""
+
+import os
+import json
+import shutil
+import struct
+import hashlib
+import argparse
+import subprocess
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from toolchain import get_cache_dir, get_release_source_dir, parse_size
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 不影响像素的元数据块，无损压缩时可移除
+STRIPPABLE_CHUNKS = {b'tEXt', b'zTXt', b'iTXt', b'tIME'}
+
+CACHE_VERSION = 1
+
+# 缓存总大小上限，超出后按最近使用时间清理
+DEFAULT_MAX_CACHE_SIZE = 512 * 1024 ** 2
+# 不在索引中的 blob 可能属于尚未写回索引的并发构建，超过该时间后才删除
+ORPHAN_GRACE_SECONDS = 60 * 60
+
+
+def file_hash(data: bytes) -> str:
+    """内容哈希"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def iter_png_chunks(data: bytes):
+    """逐个产出 (类型, 数据)"""
+    offset = len(PNG_SIGNATURE)
+    while offset + 8 <= len(data):
+        length, chunk_type = struct.unpack('>I4s', data[offset:offset + 8])
+        yield chunk_type, data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+
+
+def make_chunk(chunk_type: bytes, payload: bytes) -> bytes:
+    """构造 PNG 块（含 CRC）"""
+    crc = zlib.crc32(chunk_type + payload) & 0xffffffff
+    return struct.pack('>I', len(payload)) + chunk_type + payload + struct.pack('>I', crc)
+
+
+def recompress_png(data: bytes) -> bytes:
+    """以最高级别重新 deflate IDAT 数据并去除文本元数据，像素保持不变"""
+    if not data.startswith(PNG_SIGNATURE):
+        return data
+
+    chunks = list(iter_png_chunks(data))
+    idat = b''.join(payload for chunk_type, payload in chunks if chunk_type == b'IDAT')
+    if not idat:
+        return data
+
+    raw = zlib.decompress(idat)
+    best = zlib.compress(raw, 9)
+    for strategy in (zlib.Z_FILTERED, zlib.Z_DEFAULT_STRATEGY):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        candidate = compressor.compress(raw) + compressor.flush()
+        if len(candidate) < len(best):
+            best = candidate
+
+    output = [PNG_SIGNATURE]
+    idat_written = False
+    for chunk_type, payload in chunks:
+        if chunk_type in STRIPPABLE_CHUNKS:
+            continue
+        if chunk_type == b'IDAT':
+            if not idat_written:
+                output.append(make_chunk(b'IDAT', best))
+                idat_written = True
+            continue
+        output.append(make_chunk(chunk_type, payload))
+
+    result = b''.join(output)
+    return result if len(result) < len(data) else data
+
+
+def optimize_png(data: bytes) -> bytes:
+    """无损压缩 PNG：优先使用 oxipng，未安装时使用内置实现"""
+    if shutil.which('oxipng'):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp) / 'image.png'
+            tmp_path.write_bytes(data)
+            result = subprocess.run(['oxipng', '-o', '4', '--strip', 'safe', '-q', str(tmp_path)],
+                                    capture_output=True)
+            if result.returncode == 0:
+                optimized = tmp_path.read_bytes()
+                return optimized if len(optimized) < len(data) else data
+    return recompress_png(data)
+
+
+def convert_webp(data: bytes, quality: int) -> bytes | None:
+    """使用 cwebp 转换为 WebP，失败时返回 None"""
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / 'image.png'
+        dst = Path(tmp) / 'image.webp'
+        src.write_bytes(data)
+        result = subprocess.run(['cwebp', '-quiet', '-q', str(quality), str(src), '-o', str(dst)],
+                                capture_output=True)
+        if result.returncode != 0 or not dst.exists():
+            return None
+        return dst.read_bytes()
+
+
+class AssetCache:
+    """以原始内容哈希 + 处理参数为 key 缓存优化结果"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.blob_dir = cache_dir / 'blobs'
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = cache_dir / 'index.json'
+        self.index = {}
+        self.opened_at = time.time()
+        if self.index_path.exists():
+            index = json.loads(self.index_path.read_text(encoding='utf-8'))
+            if index.get('version') == CACHE_VERSION:
+                self.index = index['entries']
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        """返回 (扩展名, 数据)"""
+        entry = self.index.get(key)
+        if not entry:
+            return None
+        blob = self.blob_dir / entry['blob']
+        if not blob.exists():
+            return None
+        entry['used'] = time.time()
+        return entry['suffix'], blob.read_bytes()
+
+    def put(self, key: str, suffix: str, data: bytes):
+        """保存处理结果"""
+        blob_name = file_hash(data)
+        blob = self.blob_dir / blob_name
+        if not blob.exists():
+            blob.write_bytes(data)
+        self.index[key] = {'suffix': suffix, 'blob': blob_name, 'used': time.time()}
+
+    def is_output(self, data_hash: str) -> bool:
+        """判断内容是否已经是优化产物"""
+        return (self.blob_dir / data_hash).exists()
+
+    def prune(self, max_size: int = DEFAULT_MAX_CACHE_SIZE) -> dict:
+        """LRU 清理：按最近使用时间淘汰索引条目并删除不再引用的 blob（本次构建用到的条目保留）"""
+        blobs = {}
+        for blob in self.blob_dir.iterdir():
+            try:
+                blobs[blob.name] = blob.stat()
+            except FileNotFoundError:
+                continue
+        references = {}
+        for entry in self.index.values():
+            references[entry['blob']] = references.get(entry['blob'], 0) + 1
+
+        stats = {'before': sum(st.st_size for st in blobs.values()), 'after': 0, 'removed': 0}
+        cutoff = time.time() - ORPHAN_GRACE_SECONDS
+        for name, st in list(blobs.items()):
+            if name not in references and st.st_mtime < cutoff:
+                (self.blob_dir / name).unlink(missing_ok=True)
+                del blobs[name]
+                stats['removed'] += 1
+
+        total = sum(st.st_size for st in blobs.values())
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1].get('used', 0)):
+            if total <= max_size or entry.get('used', 0) >= self.opened_at:
+                break
+            del self.index[key]
+            references[entry['blob']] -= 1
+            if not references[entry['blob']] and entry['blob'] in blobs:
+                (self.blob_dir / entry['blob']).unlink(missing_ok=True)
+                total -= blobs.pop(entry['blob']).st_size
+                stats['removed'] += 1
+        stats['after'] = total
+        return stats
+
+    def save(self):
+        """写回索引（先写临时文件再替换，多个构建共享缓存时不会读到写了一半的索引）"""
+        tmp = self.index_path.with_name(f'index.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps({'version': CACHE_VERSION, 'entries': self.index}), encoding='utf-8')
+        os.replace(tmp, self.index_path)
+
+
+def find_bundle_images(res_dir: Path) -> list[Path]:
+    """查找 bundle 输出到 drawable-* 中的 PNG（跳过 .9.png）"""
+    images = []
+    for drawable_dir in sorted(res_dir.glob('drawable-*')):
+        for image in sorted(drawable_dir.glob('*.png')):
+            if not image.name.endswith('.9.png'):
+                images.append(image)
+    return images
+
+
+def optimize_assets(res_dir: Path, cache_dir: Path, webp_quality: int | None = None,
+                    max_cache_size: int = DEFAULT_MAX_CACHE_SIZE) -> dict:
+    """优化资源目录中的图片，返回统计信息"""
+    use_webp = webp_quality is not None and shutil.which('cwebp') is not None
+    if webp_quality is not None and not use_webp:
+        print('  ⚠️ 未找到 cwebp，跳过 WebP 转换 (brew install webp)')
+
+    cache = AssetCache(cache_dir)
+    params = f'webp{webp_quality}' if use_webp else 'png'
+    stats = {'files': 0, 'optimized': 0, 'cached': 0, 'skipped': 0, 'bytes_before': 0, 'bytes_after': 0}
+
+    for image in find_bundle_images(res_dir):
+        data = image.read_bytes()
+        data_hash = file_hash(data)
+        stats['files'] += 1
+        stats['bytes_before'] += len(data)
+
+        # 上一次转换留下的 WebP 与新复制的 PNG 同名会导致资源重复
+        stale_webp = image.with_suffix('.webp')
+        if stale_webp.exists() and not use_webp and cache.is_output(file_hash(stale_webp.read_bytes())):
+            stale_webp.unlink()
+
+        if cache.is_output(data_hash):
+            stats['skipped'] += 1
+            stats['bytes_after'] += len(data)
+            continue
+
+        key = f'{data_hash}:{params}'
+        cached = cache.get(key)
+        if cached:
+            suffix, optimized = cached
+            stats['cached'] += 1
+        else:
+            suffix, optimized = '.png', optimize_png(data)
+            if use_webp:
+                webp = convert_webp(optimized, webp_quality)
+                if webp and len(webp) < len(optimized):
+                    suffix, optimized = '.webp', webp
+            cache.put(key, suffix, optimized)
+            stats['optimized'] += 1
+
+        target = image.with_suffix(suffix)
+        target.write_bytes(optimized)
+        if target != image:
+            image.unlink()
+        stats['bytes_after'] += len(optimized)
+
+    stats['evicted'] = cache.prune(max_cache_size)['removed']
+    cache.save()
+    return stats
+
+
+def print_stats(stats: dict):
+    """输出节省的字节数"""
+    saved = stats['bytes_before'] - stats['bytes_after']
+    ratio = saved / stats['bytes_before'] if stats['bytes_before'] else 0
+    print(f'  🖼️ {stats["files"]} 张图片: 新处理 {stats["optimized"]}, 命中缓存 {stats["cached"]}, '
+          f'已优化跳过 {stats["skipped"]}, 清理缓存 {stats.get("evicted", 0)}')
+    print(f'  💾 {stats["bytes_before"] / 1024:.1f} KB → {stats["bytes_after"] / 1024:.1f} KB '
+          f'(节省 {saved / 1024:.1f} KB, {ratio:.1%})')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Bundle 图片资源优化')
+    parser.add_argument('--res-dir', type=str, help='资源目录')
+    parser.add_argument('--webp-quality', type=int, choices=range(1, 101), metavar='1-100', help='WebP 质量')
+    parser.add_argument('--max-cache-size', type=parse_size, default=DEFAULT_MAX_CACHE_SIZE,
+                        help='缓存总大小上限，如 512MB')
+    args = parser.parse_args()
+
+    res_dir = Path(args.res_dir) if args.res_dir else get_release_source_dir() / 'res'
+    cache_dir = get_cache_dir('assets')
+
+    print('🖼️ 优化 Bundle 图片资源...')
+    stats = optimize_assets(res_dir, cache_dir, args.webp_quality, args.max_cache_size)
+    print_stats(stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+JS Bundle 热更新补丁（OTA 服务端）
+保存随 APK 发布的 index.android.bundle 及其图片资源作为基准（按原生版本区分），之后只改动 JS 的构建
+相对基准生成补丁: bundle 的二进制差分（块匹配 + LZMA，JS 文本与 Hermes 字节码均适用）、只包含新增/变化的资源，
+以及带哈希与目标原生版本的签名清单（openssl ECDSA P-256 / SHA-256）。verify 会校验签名、应用补丁，
+并确认还原出的 bundle 与资源和新构建逐字节一致
+
+补丁总是相对该原生版本随 APK 发布的基准生成，客户端只需持有基准 bundle 即可应用最新补丁
+
+使用方法:
+    python scripts/ota_patch.py ship [--native-version V]
+    python scripts/ota_patch.py create [--native-version V] [--key PATH]
+    python scripts/ota_patch.py verify PATCH_DIR [--public-key PATH]
+    python scripts/ota_patch.py list
+    python scripts/ota_patch.py keygen [--key PATH]
+
+参数:
+    --native-version    原生版本（默认读取 android/app/build.gradle 的 versionName 与 versionCode）
+    --key               create: 签名私钥（默认 OTA_SIGNING_KEY 环境变量，两者都未指定时报错）
+                        keygen: 生成的私钥路径（默认 .build-cache/ota/keys/ota-private.pem，公钥写在同一目录）
+    --public-key        验证签名的公钥（默认 keygen 默认位置的公钥）
+
+注意:
+    - 需要 openssl；生成的公钥需要内置到 App 中用于校验清单签名
+    - 基准必须显式保存：在构建实际发布的 APK 时执行 ship（或 build_android.py --release --ota-ship），
+      不会把某次本地构建自动当作用户手中的版本
+    - create 与构建流水线（build_android.py --ota）都必须通过 --key 或 OTA_SIGNING_KEY 指定签名私钥，
+      不会自动生成密钥：用临时密钥签名的补丁不会被任何已发布的 App 接受。新密钥对只通过 keygen 显式生成
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import subprocess
+from pathlib import Path
+
+from artifact_delta import decode_delta, encode_delta
+from toolchain import get_cache_dir, get_project_root, get_release_source_dir
+
+SIGNING_KEY_ENV = 'OTA_SIGNING_KEY'
+
+MANIFEST_FORMAT = 1
+BUNDLE_NAME = 'index.android.bundle'
+PATCH_NAME = 'bundle.patch'
+MANIFEST_NAME = 'manifest.json'
+SIGNATURE_NAME = 'manifest.json.sig'
+
+# 差分时对基准 bundle 建立索引的块大小
+BLOCK_SIZE = 32
+# 扩展匹配时每次比较的最大长度
+MATCH_STEP = 4096
+
+# react-native bundle 输出资源的目录
+ASSET_DIR_PATTERN = re.compile(r'^(drawable-[\w-]+|raw)$')
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_native_version() -> str:
+    """android/app/build.gradle 中的 versionName 与 versionCode"""
+    gradle = (get_project_root() / 'android' / 'app' / 'build.gradle').read_text(encoding='utf-8')
+    name = re.search(r'versionName\s+"([^"]+)"', gradle)
+    code = re.search(r'versionCode\s+(\d+)', gradle)
+    return f'{name.group(1) if name else "0"} ({code.group(1) if code else "0"})'
+
+
+def asset_prefixes(project_root: Path) -> tuple[str, ...]:
+    """bundle 资源名的前缀：Metro 以项目相对路径（小写、'/' 转 '_'）命名资源，如 src_assets_logo.png"""
+    prefixes = []
+    for path in project_root.iterdir():
+        if path.is_dir() and not path.name.startswith('.') and path.name not in ('android', 'ios'):
+            prefixes.append(re.sub(r'[^a-z0-9_]', '', path.name.lower()) + '_')
+    return tuple(prefixes)
+
+
+def collect_assets(res_dir: Path, project_root: Path | None = None) -> dict[str, Path]:
+    """bundle 输出到 res/ 中的资源 {相对路径: 文件}（不包含原生资源）"""
+    prefixes = asset_prefixes(project_root or get_project_root())
+    assets = {}
+    for asset_dir in sorted(res_dir.iterdir()) if res_dir.exists() else []:
+        if not asset_dir.is_dir() or not ASSET_DIR_PATTERN.match(asset_dir.name):
+            continue
+        for path in sorted(asset_dir.iterdir()):
+            if path.is_file() and path.name.startswith(prefixes):
+                assets[f'{asset_dir.name}/{path.name}'] = path
+    return assets
+
+
+def hash_assets(assets: dict[str, Path]) -> dict[str, dict]:
+    return {name: {'sha256': sha256_bytes(path.read_bytes()), 'size': path.stat().st_size}
+            for name, path in assets.items()}
+
+
+def current_build() -> tuple[Path, dict[str, Path]]:
+    """build_bundle 产出的 bundle 与资源"""
+    release_dir = get_release_source_dir()
+    return release_dir / 'assets' / BUNDLE_NAME, collect_assets(release_dir / 'res')
+
+
+def base_dir(native_version: str) -> Path:
+    return get_cache_dir('ota') / 'base' / re.sub(r'[^\w.-]', '_', native_version)
+
+
+# ============================================================
+# 二进制差分
+# ============================================================
+
+
+def match_length(old: bytes, old_offset: int, new: bytes, new_offset: int) -> int:
+    """old 与 new 从给定位置起相同的字节数（按块比较，逐步缩小步长）"""
+    length = 0
+    step = MATCH_STEP
+    while step:
+        while True:
+            end_old, end_new = old_offset + length + step, new_offset + length + step
+            if end_old > len(old) or end_new > len(new) or old[end_old - step:end_old] != new[end_new - step:end_new]:
+                break
+            length += step
+        step //= 2
+    return length
+
+
+def diff_bytes(old: bytes, new: bytes) -> list[tuple]:
+    """生成操作序列 [('copy', 偏移, 长度) | ('data', 字节)]，格式与 artifact_delta 相同"""
+    index = {}
+    for offset in range(0, len(old) - BLOCK_SIZE + 1, BLOCK_SIZE):
+        index.setdefault(old[offset:offset + BLOCK_SIZE], offset)
+
+    ops = []
+    literal_start = 0
+    position = 0
+    while position <= len(new) - BLOCK_SIZE:
+        offset = index.get(new[position:position + BLOCK_SIZE])
+        if offset is None:
+            position += 1
+            continue
+        # 向前扩展匹配，吃掉尚未输出的字面量
+        back = 0
+        while (back < position - literal_start and back < offset
+               and old[offset - back - 1] == new[position - back - 1]):
+            back += 1
+        start = position - back
+        length = back + BLOCK_SIZE + match_length(old, offset + BLOCK_SIZE, new, position + BLOCK_SIZE)
+        if start > literal_start:
+            ops.append(('data', new[literal_start:start]))
+        ops.append(('copy', offset - back, length))
+        position = literal_start = start + length
+    if literal_start < len(new):
+        ops.append(('data', new[literal_start:]))
+    return ops
+
+
+def apply_ops(old: bytes, ops: list[tuple]) -> bytes:
+    return b''.join(old[op[1]:op[1] + op[2]] if op[0] == 'copy' else op[1] for op in ops)
+
+
+# ============================================================
+# 签名
+# ============================================================
+
+
+def default_keys() -> tuple[Path, Path]:
+    keys_dir = get_cache_dir('ota') / 'keys'
+    return keys_dir / 'ota-private.pem', keys_dir / 'ota-public.pem'
+
+
+def export_public_key(private_key: Path, public_key: Path) -> Path:
+    subprocess.run(['openssl', 'pkey', '-in', str(private_key), '-pubout', '-out', str(public_key)],
+                   check=True, capture_output=True)
+    return public_key
+
+
+def generate_keys(private_key: Path) -> Path:
+    """生成新的 P-256 密钥对，公钥写在私钥旁边，返回公钥路径；私钥已存在时抛出 FileExistsError"""
+    if private_key.exists():
+        raise FileExistsError(private_key)
+    private_key.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(['openssl', 'ecparam', '-name', 'prime256v1', '-genkey', '-noout', '-out', str(private_key)],
+                   check=True, capture_output=True)
+    os.chmod(private_key, 0o600)
+    return export_public_key(private_key, private_key.with_name('ota-public.pem'))
+
+
+def sign_file(path: Path, private_key: Path) -> Path:
+    signature = path.with_name(path.name + '.sig')
+    subprocess.run(['openssl', 'dgst', '-sha256', '-sign', str(private_key), '-out', str(signature), str(path)],
+                   check=True, capture_output=True)
+    return signature
+
+
+def verify_signature(path: Path, signature: Path, public_key: Path) -> bool:
+    result = subprocess.run(['openssl', 'dgst', '-sha256', '-verify', str(public_key), '-signature', str(signature),
+                             str(path)], capture_output=True, text=True)
+    return result.returncode == 0
+
+
+# ============================================================
+# 基准与补丁
+# ============================================================
+
+
+def ship(native_version: str) -> Path:
+    """将当前构建的 bundle 与资源保存为该原生版本的基准（随 APK 发布的版本）"""
+    bundle, assets = current_build()
+    if not bundle.exists():
+        raise FileNotFoundError(bundle)
+    target = base_dir(native_version)
+    if target.exists():
+        shutil.rmtree(target)
+    (target / 'assets').mkdir(parents=True)
+    shutil.copy2(bundle, target / BUNDLE_NAME)
+    for name, path in assets.items():
+        (target / 'assets' / name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, target / 'assets' / name)
+    info = {
+        'native_version': native_version,
+        'bundle_sha256': sha256_bytes(bundle.read_bytes()),
+        'assets': hash_assets(assets),
+        'shipped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    (target / 'base.json').write_text(json.dumps(info, indent=2, ensure_ascii=False), encoding='utf-8')
+    return target
+
+
+def load_base(native_version: str) -> dict | None:
+    info_path = base_dir(native_version) / 'base.json'
+    if not info_path.exists():
+        return None
+    return json.loads(info_path.read_text(encoding='utf-8'))
+
+
+def create_patch(native_version: str, output_root: Path, key: str) -> dict | None:
+    """相对基准生成补丁目录并用 key 签名，返回清单；没有基准或 bundle 与资源均未变化时返回 None"""
+    base = load_base(native_version)
+    if base is None:
+        return None
+    bundle, assets = current_build()
+    old = (base_dir(native_version) / BUNDLE_NAME).read_bytes()
+    new = bundle.read_bytes()
+    new_assets = hash_assets(assets)
+    changed = {name: entry for name, entry in new_assets.items() if base['assets'].get(name) != entry}
+    removed = sorted(set(base['assets']) - set(new_assets))
+    target_sha = sha256_bytes(new)
+    if target_sha == base['bundle_sha256'] and not changed and not removed:
+        return None
+
+    patch_id = target_sha[:12]
+    patch_dir = output_root / 'ota' / patch_id
+    if patch_dir.exists():
+        shutil.rmtree(patch_dir)
+    (patch_dir / 'assets').mkdir(parents=True)
+
+    ops = diff_bytes(old, new)
+    header = {'source_sha256': base['bundle_sha256'], 'target_sha256': target_sha,
+              'target_size': len(new), 'target_name': BUNDLE_NAME}
+    patch_path = patch_dir / PATCH_NAME
+    patch_path.write_bytes(encode_delta(header, ops))
+    for name in changed:
+        (patch_dir / 'assets' / name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(assets[name], patch_dir / 'assets' / name)
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'id': patch_id,
+        'native_version': native_version,
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'base': {'bundle_sha256': base['bundle_sha256'], 'shipped_at': base['shipped_at']},
+        'bundle': {'sha256': target_sha, 'size': len(new)},
+        'patch': {'file': PATCH_NAME, 'sha256': sha256_bytes(patch_path.read_bytes()),
+                  'size': patch_path.stat().st_size},
+        'assets': {'changed': changed, 'removed': removed},
+    }
+    manifest_path = patch_dir / MANIFEST_NAME
+    manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    # 附带公钥便于核对；客户端必须使用内置的公钥校验，而不是补丁中的
+    private_key = Path(key)
+    sign_file(manifest_path, private_key)
+    public_key = export_public_key(private_key, patch_dir / 'ota-public.pem')
+    return {**manifest, 'dir': patch_dir, 'public_key': public_key}
+
+
+def verify_patch(patch_dir: Path, public_key: Path | None = None, expected_bundle: Path | None = None,
+                 expected_assets: dict[str, Path] | None = None) -> list[str]:
+    """校验签名与哈希，应用补丁并与新构建逐字节比较，返回问题列表（为空表示通过）"""
+    manifest_path = patch_dir / MANIFEST_NAME
+    public_key = public_key or default_keys()[1]
+    if not public_key.exists():
+        return [f'缺少公钥: {public_key}']
+    if not verify_signature(manifest_path, patch_dir / SIGNATURE_NAME, public_key):
+        return ['清单签名无效']
+
+    manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    problems = []
+    base = base_dir(manifest['native_version'])
+    old_path = base / BUNDLE_NAME
+    if not old_path.exists() or sha256_bytes(old_path.read_bytes()) != manifest['base']['bundle_sha256']:
+        return [f'缺少原生版本 {manifest["native_version"]} 的基准 bundle']
+
+    patch_bytes = (patch_dir / manifest['patch']['file']).read_bytes()
+    if sha256_bytes(patch_bytes) != manifest['patch']['sha256']:
+        return ['补丁文件哈希不匹配']
+    header, ops = decode_delta(patch_bytes)
+    rebuilt = apply_ops(old_path.read_bytes(), ops)
+    if sha256_bytes(rebuilt) != manifest['bundle']['sha256'] or header['target_sha256'] != manifest['bundle']['sha256']:
+        problems.append('还原的 bundle 哈希不匹配')
+    if expected_bundle and rebuilt != expected_bundle.read_bytes():
+        problems.append('还原的 bundle 与新构建不一致')
+
+    # 基准资源 + 补丁中的变化 - 删除的资源 = 新构建的资源
+    base_assets = json.loads((base / 'base.json').read_text(encoding='utf-8'))['assets']
+    result_assets = {name: entry for name, entry in base_assets.items() if name not in manifest['assets']['removed']}
+    for name, entry in manifest['assets']['changed'].items():
+        asset_path = patch_dir / 'assets' / name
+        if not asset_path.exists() or sha256_bytes(asset_path.read_bytes()) != entry['sha256']:
+            problems.append(f'资源哈希不匹配: {name}')
+        result_assets[name] = entry
+    if expected_assets is not None and result_assets != hash_assets(expected_assets):
+        problems.append('应用补丁后的资源与新构建不一致')
+    return problems
+
+
+def print_patch(manifest: dict, full_size: int):
+    patch_size = manifest['patch']['size'] + sum(entry['size'] for entry in manifest['assets']['changed'].values())
+    ratio = patch_size / full_size if full_size else 0
+    print(f'  📦 补丁 {manifest["id"]} (原生版本 {manifest["native_version"]}): {patch_size / 1024:.1f} KB '
+          f'/ 完整 bundle {full_size / 1024:.1f} KB ({ratio:.1%})')
+    print(f'     变化的资源 {len(manifest["assets"]["changed"])} 个，删除 {len(manifest["assets"]["removed"])} 个')
+    print(f'     📁 {manifest["dir"]}')
+
+
+def run_pipeline(native_version: str, output_root: Path, key: str | None = None):
+    """构建后调用：相对已发布的基准生成并验证补丁；没有基准或未指定签名私钥时构建失败"""
+    print('🛰️ 生成 JS 热更新补丁...')
+    key = key or os.environ.get(SIGNING_KEY_ENV)
+    if not key:
+        print(f'  ❌ 未设置 {SIGNING_KEY_ENV}：构建流水线必须使用固定的签名私钥（与 App 内置的公钥配套）')
+        sys.exit(1)
+    if not Path(key).exists():
+        print(f'  ❌ 签名私钥不存在: {key}')
+        sys.exit(1)
+    if load_base(native_version) is None:
+        print(f'  ❌ 原生版本 {native_version} 没有已发布的基准')
+        print('     请在构建发布的 APK 时使用 build_android.py --release --ota-ship，或执行 python scripts/ota_patch.py ship')
+        sys.exit(1)
+    manifest = create_patch(native_version, output_root, key)
+    if manifest is None:
+        print('  bundle 与资源相对基准没有变化，无需补丁\n')
+        return
+    bundle, assets = current_build()
+    print_patch(manifest, bundle.stat().st_size)
+    problems = verify_patch(manifest['dir'], manifest['public_key'], bundle, assets)
+    if problems:
+        print('  ❌ 补丁验证失败: ' + '; '.join(problems))
+        shutil.rmtree(manifest['dir'])
+        sys.exit(1)
+    print('  ✅ 补丁已验证，可逐字节还原新 bundle\n')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='JS Bundle 热更新补丁')
+    parser.add_argument('command', choices=['ship', 'create', 'verify', 'list', 'keygen'], help='操作')
+    parser.add_argument('patch_dir', nargs='?', help='verify 的补丁目录')
+    parser.add_argument('--native-version', type=str, help='原生版本')
+    parser.add_argument('--key', type=str, help='签名私钥（keygen 时为生成的私钥路径）')
+    parser.add_argument('--public-key', type=str, help='验证签名的公钥')
+    args = parser.parse_args()
+
+    native_version = args.native_version or read_native_version()
+    if args.command == 'ship':
+        try:
+            target = ship(native_version)
+        except FileNotFoundError as e:
+            print(f'❌ 未找到 bundle，请先构建 Release: {e}')
+            sys.exit(1)
+        print(f'✅ 已保存原生版本 {native_version} 的基准: {target}')
+    elif args.command == 'create':
+        key = args.key or os.environ.get(SIGNING_KEY_ENV)
+        if not key:
+            print(f'❌ 请通过 --key 或 {SIGNING_KEY_ENV} 指定签名私钥（与 App 内置的公钥配套）；'
+                  '新密钥对使用 keygen 生成')
+            sys.exit(1)
+        if not Path(key).exists():
+            print(f'❌ 签名私钥不存在: {key}')
+            sys.exit(1)
+        if load_base(native_version) is None:
+            print(f'❌ 原生版本 {native_version} 没有基准，请先执行 ship')
+            sys.exit(1)
+        manifest = create_patch(native_version, get_project_root() / 'output', key)
+        if manifest is None:
+            print('bundle 与资源相对基准没有变化，无需补丁')
+            return
+        print_patch(manifest, current_build()[0].stat().st_size)
+    elif args.command == 'verify':
+        if not args.patch_dir:
+            print('❌ verify 需要指定补丁目录')
+            sys.exit(1)
+        problems = verify_patch(Path(args.patch_dir), Path(args.public_key) if args.public_key else None)
+        if problems:
+            print('❌ ' + '; '.join(problems))
+            sys.exit(1)
+        print('✅ 签名有效，补丁可还原出清单中的 bundle 与资源')
+    elif args.command == 'keygen':
+        private_key = Path(args.key) if args.key else default_keys()[0]
+        try:
+            public_key = generate_keys(private_key)
+        except FileExistsError:
+            print(f'❌ 私钥已存在，不会覆盖: {private_key}')
+            sys.exit(1)
+        print(f'🔑 已生成签名密钥: {private_key}')
+        print(f'   请将公钥内置到 App 中: {public_key}')
+        print(f'   构建时设置 {SIGNING_KEY_ENV}={private_key}')
+    else:
+        for info_path in sorted((get_cache_dir('ota') / 'base').glob('*/base.json')):
+            info = json.loads(info_path.read_text(encoding='utf-8'))
+            print(f'  {info["native_version"]:<20}{info["shipped_at"]}  bundle {info["bundle_sha256"][:12]}  '
+                  f'{len(info["assets"])} 个资源')
+
+
+if __name__ == '__main__':
+    main()
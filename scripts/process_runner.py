@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+长时间子进程的输出管道
+gradlew、yarn install、pod install、xcodebuild 等工具的输出不再直接刷屏：后台线程按块读取子进程输出，
+完整内容流式压缩写入 .build-cache/logs/（安装了 zstandard 时为 .zst，否则 .gz），
+末尾 RING_BUFFER_SIZE 字节保存在环形缓冲区中用于失败摘要，终端只显示一行进度。
+读取队列、环形缓冲区与未结束的行都有上限，无论工具输出多少，内存占用保持不变
+
+使用方法:
+    python scripts/process_runner.py list
+    python scripts/process_runner.py show [LOG] [--tail N]
+
+环境变量:
+    BUILD_VERBOSE=1     同时将原始输出写到终端（不显示进度行）
+"""
+
+import os
+import re
+import sys
+import time
+import queue
+import shutil
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+
+from toolchain import get_cache_dir
+
+VERBOSE_ENV = 'BUILD_VERBOSE'
+
+READ_CHUNK_SIZE = 64 * 1024
+# 读取线程与主线程之间最多缓存的块数，写日志跟不上时子进程会被管道反压
+MAX_PENDING_CHUNKS = 16
+RING_BUFFER_SIZE = 64 * 1024
+# 没有换行的超长输出按该长度切分后交给 on_line
+MAX_LINE_LENGTH = 64 * 1024
+FAILURE_TAIL_LINES = 60
+
+PROGRESS_INTERVAL = 0.2
+# 非终端（CI、build_queue 日志）时的心跳间隔，避免长时间无输出
+HEARTBEAT_INTERVAL = 60
+
+MAX_LOGS = 50
+
+ANSI_ESCAPE = re.compile(rb'\x1b\[[0-9;?]*[A-Za-z]')
+
+
+class RingBuffer:
+    """保留最近 size 字节的输出"""
+
+    def __init__(self, size: int = RING_BUFFER_SIZE):
+        self.size = size
+        self.data = bytearray()
+
+    def append(self, chunk: bytes):
+        self.data += chunk
+        # 超过两倍容量时才整理，摊还复制开销
+        if len(self.data) > self.size * 2:
+            del self.data[:-self.size]
+
+    def tail(self) -> str:
+        """最近 size 字节，从第一个完整行开始"""
+        data = bytes(self.data[-self.size:])
+        if len(self.data) > self.size and b'\n' in data:
+            data = data[data.index(b'\n') + 1:]
+        return ANSI_ESCAPE.sub(b'', data).decode('utf-8', errors='replace')
+
+
+def open_log(name: str):
+    """创建压缩日志文件，返回 (文件对象, 路径)"""
+    log_dir = get_cache_dir('logs')
+    safe_name = re.sub(r'[^\w.-]', '_', name)
+    stem = f'{time.strftime("%Y%m%d-%H%M%S")}-{safe_name}'
+    try:
+        import zstandard
+    except ImportError:
+        import gzip
+
+        path = log_dir / f'{stem}.log.gz'
+        return gzip.open(path, 'wb', compresslevel=1), path
+    path = log_dir / f'{stem}.log.zst'
+    return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb')), path
+
+
+def read_log(path: Path) -> bytes:
+    """读取（解压）日志"""
+    if path.suffix == '.zst':
+        import zstandard
+
+        with open(path, 'rb') as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+            return reader.read()
+    import gzip
+
+    return gzip.decompress(path.read_bytes())
+
+
+def list_logs() -> list[Path]:
+    """按时间排列的日志（旧 → 新）"""
+    return sorted(get_cache_dir('logs').glob('*.log.*'), key=lambda path: path.stat().st_mtime)
+
+
+def prune_logs(keep: int = MAX_LOGS):
+    """只保留最近 keep 个日志"""
+    logs = list_logs()
+    for path in logs[:max(len(logs) - keep, 0)]:
+        path.unlink(missing_ok=True)
+
+
+def read_chunks(stream, chunks: queue.Queue):
+    """读取线程：按块读取子进程输出，结束时放入 None"""
+    fd = stream.fileno()
+    try:
+        while True:
+            chunk = os.read(fd, READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.put(chunk)
+    finally:
+        chunks.put(None)
+
+
+class LineSplitter:
+    """将输出块拆分为行交给回调，未结束的行长度有上限"""
+
+    def __init__(self, on_line):
+        self.on_line = on_line
+        self.partial = b''
+
+    def feed(self, chunk: bytes):
+        lines = (self.partial + chunk).split(b'\n')
+        self.partial = lines.pop()
+        if len(self.partial) > MAX_LINE_LENGTH:
+            lines.append(self.partial)
+            self.partial = b''
+        for line in lines:
+            self.on_line(line.decode('utf-8', errors='replace'))
+
+    def finish(self):
+        if self.partial:
+            self.on_line(self.partial.decode('utf-8', errors='replace'))
+            self.partial = b''
+
+
+class Progress:
+    """终端上的单行进度；非终端时定期输出心跳"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.tty = sys.stdout.isatty()
+        self.start = time.monotonic()
+        self.last_update = self.start
+        self.last_line = b''
+
+    def status(self, output_bytes: int) -> str:
+        return f'{self.label} {time.monotonic() - self.start:.0f}s · {output_bytes / 1024 / 1024:.1f} MB'
+
+    def observe(self, chunk: bytes):
+        """记录最近一行非空输出（仅在刷新时解码）"""
+        stripped = chunk.rstrip()
+        if stripped:
+            self.last_line = stripped.rsplit(b'\n', 1)[-1]
+
+    def update(self, output_bytes: int):
+        now = time.monotonic()
+        if self.tty:
+            if now - self.last_update < PROGRESS_INTERVAL:
+                return
+            width = shutil.get_terminal_size().columns
+            line = ANSI_ESCAPE.sub(b'', self.last_line).decode('utf-8', errors='replace').strip()
+            text = f'  ⏳ {self.status(output_bytes)} · {line}'
+            sys.stdout.write('\r\x1b[K' + text[:max(width - 4, 20)])
+            sys.stdout.flush()
+        elif now - self.last_update >= HEARTBEAT_INTERVAL:
+            print(f'  ⏳ {self.status(output_bytes)}', flush=True)
+        else:
+            return
+        self.last_update = now
+
+    def clear(self):
+        if self.tty:
+            sys.stdout.write('\r\x1b[K')
+            sys.stdout.flush()
+
+
+def run_logged(cmd: list[str], cwd: Path, label: str, env: dict | None = None, on_line=None) -> dict:
+    """运行子进程：完整输出压缩写入日志，终端显示进度行
+
+    on_line 为每行输出的回调（如 xcodebuild 日志解析），返回
+    {'code', 'log', 'seconds', 'bytes', 'tail'}
+    """
+    verbose = os.environ.get(VERBOSE_ENV) == '1'
+    log, log_path = open_log(label)
+    ring = RingBuffer()
+    splitter = LineSplitter(on_line) if on_line else None
+    progress = Progress(label)
+    output_bytes = 0
+
+    process = subprocess.Popen(cmd, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    chunks = queue.Queue(maxsize=MAX_PENDING_CHUNKS)
+    reader = threading.Thread(target=read_chunks, args=(process.stdout, chunks), daemon=True)
+    reader.start()
+    try:
+        with log:
+            while True:
+                try:
+                    chunk = chunks.get(timeout=PROGRESS_INTERVAL)
+                except queue.Empty:
+                    chunk = b''
+                if chunk is None:
+                    break
+                if chunk:
+                    log.write(chunk)
+                    ring.append(chunk)
+                    output_bytes += len(chunk)
+                    if splitter:
+                        splitter.feed(chunk)
+                    if verbose:
+                        sys.stdout.buffer.write(chunk)
+                        sys.stdout.flush()
+                        continue
+                    progress.observe(chunk)
+                if not verbose:
+                    progress.update(output_bytes)
+            if splitter:
+                splitter.finish()
+        code = process.wait()
+    except KeyboardInterrupt:
+        process.terminate()
+        process.wait()
+        raise
+    finally:
+        progress.clear()
+        process.stdout.close()
+
+    seconds = time.monotonic() - progress.start
+    prune_logs()
+    status = '✅' if code == 0 else '❌'
+    print(f'  {status} {label} {seconds:.1f}s, 输出 {output_bytes / 1024 / 1024:.1f} MB → {log_path}')
+    return {'code': code, 'log': log_path, 'seconds': seconds, 'bytes': output_bytes, 'tail': ring.tail()}
+
+
+def print_failure(result: dict, lines: int = FAILURE_TAIL_LINES):
+    """输出失败时的末尾日志"""
+    tail = result['tail'].rstrip('\n').split('\n')[-lines:]
+    print(f'\n----- 输出末尾 {len(tail)} 行 (完整日志: {result["log"]}) -----')
+    print('\n'.join(tail))
+    print('-' * 40)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='构建日志查看')
+    parser.add_argument('command', choices=['list', 'show'], help='操作')
+    parser.add_argument('log', nargs='?', help='日志路径（默认最近一个）')
+    parser.add_argument('--tail', type=int, help='只输出最后 N 行')
+    args = parser.parse_args()
+
+    logs = list_logs()
+    if args.command == 'list':
+        for path in logs:
+            print(f'  {path.stat().st_size / 1024:>9.1f} KB  {path}')
+        return
+
+    if not args.log and not logs:
+        print('没有构建日志')
+        sys.exit(1)
+    text = read_log(Path(args.log) if args.log else logs[-1]).decode('utf-8', errors='replace')
+    if args.tail:
+        text = '\n'.join(text.rstrip('\n').split('\n')[-args.tail:]) + '\n'
+    sys.stdout.write(text)
+
+
+if __name__ == '__main__':
+    main()
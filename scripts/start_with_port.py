@@ -3,33 +3,55 @@
 从 metro.config.js 读取端口配置，启动 Metro bundler 或 Android 应用。
 
 用法:
-    python scripts/start_with_port.py start      # 启动 Metro bundler
-    python scripts/start_with_port.py android    # 运行 Android 应用
-    python scripts/start_with_port.py ios        # 运行 iOS 应用
+    python scripts/start_with_port.py start      # 启动 Metro bundler（已在运行则直接复用）
+    python scripts/start_with_port.py android    # 运行 Android 应用（自动复用或后台启动 Metro）
+    python scripts/start_with_port.py ios        # 运行 iOS 应用（自动复用或后台启动 Metro）
+    python scripts/start_with_port.py supervise  # 前台守护 Metro，崩溃后自动重启
+    python scripts/start_with_port.py status     # 查看后台 Metro 状态
+    python scripts/start_with_port.py stop       # 停止后台 Metro
+
+    在 start/android/ios 后追加 --logs 可同时启动 devWsLogger 日志收集服务（见 log_collector.py）
+    在 android 后追加 --logcat 可在应用启动后采集设备 logcat，崩溃时写入 output/logs（见 logcat_capture.py）
 
 配置:
-    在脚本顶部的 CONFIG 中设置 JAVA_HOME 路径，留空则使用系统默认 Java
+    JAVA_HOME 路径在 toolchain.py 的 DEFAULT_JAVA_HOME 中设置，留空则自动查找 JDK（优先 17）
 """
 
 import os
 import re
+import signal
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
 
+import metro_cache
+from toolchain import (
+    DEFAULT_JAVA_HOME,
+    find_android_sdk,
+    get_cache_dir,
+    get_project_root,
+    is_java_home,
+    resolve_java_home,
+    toolchain_env,
+)
+
 # ============ 配置区域 ============
 CONFIG = {
-    # 指定 Java 路径，留空则使用系统默认
-    # 例如: "JAVA_HOME": "/opt/homebrew/Cellar/openjdk@17/17.0.15/libexec/openjdk.jdk/Contents/Home",
-    # "JAVA_HOME": "",
-     "JAVA_HOME": "/opt/homebrew/Cellar/openjdk@17/17.0.15/libexec/openjdk.jdk/Contents/Home",
+    # devWsLogger 日志收集服务端口（--logs 时启动），App 端通过 .env 中的 LOG_WS_URL 指向该端口
+    "LOG_COLLECTOR_PORT": 8899,
 }
-# =================================
 
+# Metro 就绪后预先请求的开发 bundle 平台，留空则不预热
+PREWARM_PLATFORMS = ["android", "ios"]
 
-def get_project_root() -> Path:
-    """获取项目根目录"""
-    return Path(__file__).parent.parent
+# 后台 Metro 启动等待时间（秒）
+METRO_START_TIMEOUT = 120
+# 守护模式下，在该时间窗口（秒）内崩溃超过 METRO_MAX_RESTARTS 次则放弃重启
+METRO_RESTART_WINDOW = 60
+METRO_MAX_RESTARTS = 5
+# =================================
 
 
 def read_metro_port() -> int:
@@ -56,22 +78,24 @@ def read_metro_port() -> int:
 
 
 def get_env_with_java() -> dict:
-    """获取包含 Java 配置的环境变量"""
-    env = os.environ.copy()
+    """获取包含 Java 与 Android SDK 配置的环境变量（未指定 JAVA_HOME 时自动查找 JDK）"""
+    java_home = (DEFAULT_JAVA_HOME or "").strip()
+    if java_home and not is_java_home(java_home):
+        print(f"警告: 指定的 JAVA_HOME 路径无效: {java_home}")
+        print("将自动查找 JDK")
+        java_home = ""
 
-    java_home = CONFIG.get("JAVA_HOME", "").strip()
     if java_home:
-        if not Path(java_home).exists():
-            print(f"警告: 指定的 JAVA_HOME 路径不存在: {java_home}")
-            print("将使用系统默认 Java")
+        print(f"使用指定 Java: {java_home}")
+    else:
+        resolved = resolve_java_home()
+        if resolved:
+            java_home = resolved[0]
+            print(f"使用 Java {resolved[1]}: {java_home}")
         else:
-            env["JAVA_HOME"] = java_home
-            # 将 Java bin 目录添加到 PATH 最前面
-            java_bin = str(Path(java_home) / "bin")
-            env["PATH"] = f"{java_bin}:{env.get('PATH', '')}"
-            print(f"使用指定 Java: {java_home}")
+            print("警告: 未找到可用的 JDK，将使用系统默认 Java")
 
-    return env
+    return toolchain_env({"java_home": java_home, "android_sdk": find_android_sdk()})
 
 
 def run_command(command: list[str], use_java_env: bool = False) -> int:
@@ -88,31 +112,280 @@ def run_command(command: list[str], use_java_env: bool = False) -> int:
         return 130
 
 
+def get_metro_files(port: int) -> dict:
+    """指定端口对应的 PID 与日志文件"""
+    state_dir = get_cache_dir("metro")
+    return {
+        "supervisor_pid": state_dir / f"supervisor-{port}.pid",
+        "metro_pid": state_dir / f"metro-{port}.pid",
+        "log": state_dir / f"metro-{port}.log",
+    }
+
+
+def read_pid(pid_file: Path) -> int | None:
+    """读取 PID 文件，进程不存在时返回 None"""
+    if not pid_file.exists():
+        return None
+    try:
+        pid = int(pid_file.read_text().strip())
+        os.kill(pid, 0)
+        return pid
+    except (ValueError, ProcessLookupError, PermissionError):
+        return None
+
+
+def is_metro_running(port: int) -> bool:
+    """通过 Metro 的 /status 接口检查端口上是否有健康的 Metro"""
+    import urllib.request
+
+    try:
+        with urllib.request.urlopen(f"http://localhost:{port}/status", timeout=1) as response:
+            return b"packager-status:running" in response.read()
+    except OSError:
+        return False
+
+
+def wait_for_metro(port: int, timeout: float = METRO_START_TIMEOUT) -> bool:
+    """等待 Metro 就绪"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_metro_running(port):
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def prewarm_bundle(port: int, platform: str) -> dict:
+    """请求一次开发 bundle，填充 Metro 的转换缓存，返回首字节耗时、总耗时与大小"""
+    import urllib.request
+
+    url = (
+        f"http://localhost:{port}/index.bundle?platform={platform}"
+        "&dev=true&lazy=true&minify=false&modulesOnly=false&runModule=true"
+    )
+    start = time.monotonic()
+    first_byte = None
+    size = 0
+    with urllib.request.urlopen(url, timeout=600) as response:
+        while chunk := response.read(64 * 1024):
+            if first_byte is None:
+                first_byte = time.monotonic() - start
+            size += len(chunk)
+    return {"first_byte": first_byte or 0.0, "total": time.monotonic() - start, "size": size}
+
+
+def prewarm_metro(port: int, platforms: list[str]) -> threading.Thread | None:
+    """在后台线程中等待 Metro 就绪后依次预热各平台 bundle"""
+    if not platforms:
+        return None
+
+    def worker():
+        if not wait_for_metro(port):
+            return
+        for platform in platforms:
+            try:
+                stats = prewarm_bundle(port, platform)
+            except OSError as e:
+                print(f"预热 {platform} bundle 失败: {e}")
+                continue
+            print(
+                f"预热 {platform} bundle 完成: 首字节 {stats['first_byte']:.1f}s, "
+                f"总耗时 {stats['total']:.1f}s, 大小 {stats['size'] / (1024 * 1024):.2f} MB"
+            )
+
+    thread = threading.Thread(target=worker, name="metro-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def prewarm_order(first: str) -> list[str]:
+    """将当前运行的平台排在预热顺序最前面"""
+    return sorted(PREWARM_PLATFORMS, key=lambda platform: platform != first)
+
+
+def metro_command(port: int) -> list[str]:
+    """Metro 启动命令"""
+    return ["npx", "react-native", "start", "--port", str(port)]
+
+
 def start_metro(port: int) -> int:
-    """启动 Metro bundler"""
-    return run_command(["npx", "react-native", "start", "--port", str(port)])
+    """启动 Metro bundler（端口上已有健康的 Metro 时直接复用）"""
+    if is_metro_running(port):
+        print(f"Metro 已在端口 {port} 运行，直接复用")
+        print(f"日志: {get_metro_files(port)['log']}")
+        return 0
+    metro_cache.activate()
+    prewarm_metro(port, PREWARM_PLATFORMS)
+    return run_command(metro_command(port))
+
+
+def supervise_metro(port: int) -> int:
+    """前台守护 Metro：输出写入日志文件，崩溃后自动重启"""
+    files = get_metro_files(port)
+    if read_pid(files["supervisor_pid"]):
+        print(f"端口 {port} 的 Metro 守护进程已在运行")
+        return 0
+
+    files["supervisor_pid"].write_text(str(os.getpid()))
+    metro_cache.activate()
+    process = None
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        if process and process.poll() is None:
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    crashes = []
+    try:
+        with open(files["log"], "a", encoding="utf-8") as log:
+            while not stopping:
+                log.write(f"\n===== {time.strftime('%Y-%m-%d %H:%M:%S')} 启动 Metro (端口 {port}) =====\n")
+                log.flush()
+                process = subprocess.Popen(
+                    metro_command(port),
+                    cwd=get_project_root(),
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
+                files["metro_pid"].write_text(str(process.pid))
+                code = process.wait()
+                if stopping:
+                    break
+
+                now = time.monotonic()
+                crashes = [t for t in crashes if now - t < METRO_RESTART_WINDOW] + [now]
+                log.write(f"===== Metro 退出 (code={code})，第 {len(crashes)} 次重启 =====\n")
+                log.flush()
+                if len(crashes) > METRO_MAX_RESTARTS:
+                    log.write("===== 短时间内崩溃次数过多，停止重启 =====\n")
+                    return 1
+                time.sleep(min(2 ** len(crashes), 30))
+    finally:
+        for pid_file in (files["supervisor_pid"], files["metro_pid"]):
+            pid_file.unlink(missing_ok=True)
+    return 0
+
+
+def ensure_metro(port: int, platform: str) -> bool:
+    """确保端口上有可用的 Metro：健康则复用，否则以后台守护进程启动并预热 bundle"""
+    if is_metro_running(port):
+        print(f"复用端口 {port} 上已运行的 Metro")
+        return True
+
+    files = get_metro_files(port)
+    if not read_pid(files["supervisor_pid"]):
+        print(f"启动后台 Metro (端口 {port})，日志: {files['log']}")
+        kwargs = {"start_new_session": True} if os.name != "nt" else {
+            "creationflags": subprocess.CREATE_NEW_PROCESS_GROUP,
+        }
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "supervise"],
+            cwd=get_project_root(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **kwargs,
+        )
+
+    start = time.monotonic()
+    if not wait_for_metro(port):
+        print(f"警告: Metro 在 {METRO_START_TIMEOUT} 秒内未就绪，请查看日志: {files['log']}")
+        return False
+    print(f"Metro 已就绪 ({time.monotonic() - start:.1f}s)")
+    # 原生构建期间在后台预热，设备首次加载时转换缓存已就绪
+    prewarm_metro(port, prewarm_order(platform))
+    return True
+
+
+def metro_status(port: int) -> int:
+    """输出后台 Metro 状态"""
+    files = get_metro_files(port)
+    supervisor_pid = read_pid(files["supervisor_pid"])
+    metro_pid = read_pid(files["metro_pid"])
+    print(f"端口 {port}: {'运行中' if is_metro_running(port) else '未运行'}")
+    print(f"守护进程 PID: {supervisor_pid or '-'}")
+    print(f"Metro PID: {metro_pid or '-'}")
+    print(f"日志: {files['log']}")
+    return 0 if is_metro_running(port) else 1
+
+
+def stop_metro(port: int) -> int:
+    """停止后台 Metro 守护进程"""
+    files = get_metro_files(port)
+    supervisor_pid = read_pid(files["supervisor_pid"])
+    if not supervisor_pid:
+        print(f"端口 {port} 没有后台 Metro 守护进程")
+        return 0
+
+    os.kill(supervisor_pid, signal.SIGTERM)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline and read_pid(files["supervisor_pid"]):
+        time.sleep(0.2)
+    print(f"已停止后台 Metro (PID {supervisor_pid})")
+    return 0
 
 
 def run_android(port: int) -> int:
     """运行 Android 应用"""
-    return run_command(
-        ["npx", "react-native", "run-android", "--port", str(port)],
-        use_java_env=True
-    )
+    command = ["npx", "react-native", "run-android", "--port", str(port)]
+    if ensure_metro(port, "android"):
+        command.append("--no-packager")
+    return run_command(command, use_java_env=True)
 
 
 def run_ios(port: int) -> int:
     """运行 iOS 应用"""
-    return run_command(["npx", "react-native", "run-ios", "--port", str(port)])
+    command = ["npx", "react-native", "run-ios", "--port", str(port)]
+    if ensure_metro(port, "ios"):
+        command.append("--no-packager")
+    return run_command(command)
+
+
+def start_log_collector() -> subprocess.Popen | None:
+    """启动日志收集服务子进程，输出直接显示在当前终端"""
+    port = CONFIG.get("LOG_COLLECTOR_PORT")
+    if not port:
+        return None
+
+    collector = Path(__file__).resolve().parent / "log_collector.py"
+    process = subprocess.Popen([sys.executable, str(collector), "--port", str(port)], cwd=get_project_root())
+    print(f"日志收集服务: ws://localhost:{port}/")
+
+    # Android 设备通过 adb reverse 访问电脑上的收集服务
+    try:
+        subprocess.run(["adb", "reverse", f"tcp:{port}", f"tcp:{port}"], capture_output=True)
+    except FileNotFoundError:
+        pass
+    return process
+
+
+def wait_log_collector(process: subprocess.Popen | None):
+    """前台保持日志收集，Ctrl+C 后等待其写完剩余日志"""
+    if not process or process.poll() is not None:
+        return
+    print("日志收集中，按 Ctrl+C 退出")
+    try:
+        process.wait()
+    except KeyboardInterrupt:
+        process.wait()
 
 
 def print_usage():
     """打印使用说明"""
     print(__doc__)
     print("可用命令:")
-    print("  start   - 启动 Metro bundler")
-    print("  android - 构建并运行 Android 应用")
-    print("  ios     - 构建并运行 iOS 应用")
+    print("  start     - 启动 Metro bundler")
+    print("  android   - 构建并运行 Android 应用")
+    print("  ios       - 构建并运行 iOS 应用")
+    print("  supervise - 前台守护 Metro，崩溃后自动重启")
+    print("  status    - 查看后台 Metro 状态")
+    print("  stop      - 停止后台 Metro")
 
 
 def main():
@@ -121,16 +394,27 @@ def main():
         sys.exit(1)
 
     command = sys.argv[1].lower()
+    with_logs = "--logs" in sys.argv[2:]
+    with_logcat = "--logcat" in sys.argv[2:]
     port = read_metro_port()
 
     commands = {
         "start": lambda: start_metro(port),
         "android": lambda: run_android(port),
         "ios": lambda: run_ios(port),
+        "supervise": lambda: supervise_metro(port),
+        "status": lambda: metro_status(port),
+        "stop": lambda: stop_metro(port),
     }
 
     if command in commands:
-        sys.exit(commands[command]())
+        collector = start_log_collector() if with_logs and command in ("start", "android", "ios") else None
+        code = commands[command]()
+        if with_logcat and command == "android" and code == 0:
+            import logcat_capture
+            logcat_capture.run_capture()
+        wait_log_collector(collector)
+        sys.exit(code)
     else:
         print(f"未知命令: {command}")
         print_usage()
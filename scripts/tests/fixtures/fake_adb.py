@@ -0,0 +1,20 @@
+"""测试用的 adb：一台设备，logcat 输出录制的崩溃日志后保持连接（应用已崩溃，不再有输出）"""
+
+import sys
+import time
+from pathlib import Path
+
+args = sys.argv[1:]
+if args[:2] == ['-s', 'emulator-5554']:
+    args = args[2:]
+
+if args == ['devices']:
+    print('List of devices attached\nemulator-5554\tdevice\n')
+elif args[:2] == ['shell', 'pidof']:
+    print('4321')
+elif args[:1] == ['logcat']:
+    sys.stdout.write((Path(__file__).parent / 'logcat-crash.log').read_text(encoding='utf-8'))
+    sys.stdout.flush()
+    time.sleep(60)
+else:
+    sys.exit(1)
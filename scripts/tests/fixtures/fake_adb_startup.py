@@ -0,0 +1,37 @@
+"""测试用的 adb：一台设备，am start -W 依次返回 FAKE_ADB_TIMES 中的 TotalTime，所有命令记录到 FAKE_ADB_LOG"""
+
+import os
+import sys
+from pathlib import Path
+
+args = sys.argv[1:]
+if args[:2] == ['-s', 'emulator-5554']:
+    args = args[2:]
+
+log = Path(os.environ['FAKE_ADB_LOG'])
+with log.open('a', encoding='utf-8') as f:
+    f.write(' '.join(args) + '\n')
+
+if args == ['devices']:
+    print('List of devices attached\nemulator-5554\tdevice\n')
+elif args == ['shell', 'getprop', 'ro.product.model']:
+    print('Pixel 7')
+elif args[:4] == ['shell', 'am', 'start', '-W']:
+    launches = sum(1 for line in log.read_text(encoding='utf-8').splitlines() if line.startswith('shell am start'))
+    times = os.environ['FAKE_ADB_TIMES'].split(',')
+    if launches > len(times):
+        print('Starting: Intent { cmp=com.storeverserepoapp/.MainActivity }')
+        print('Error: Activity class {com.storeverserepoapp/com.storeverserepoapp.MainActivity} does not exist.')
+        sys.exit(0)
+    total = int(times[launches - 1])
+    print('Starting: Intent { cmp=com.storeverserepoapp/.MainActivity }')
+    print('Status: ok')
+    print('LaunchState: COLD')
+    print('Activity: com.storeverserepoapp/.MainActivity')
+    print(f'TotalTime: {total}')
+    print(f'WaitTime: {total + 4}')
+    print('Complete')
+elif args[:1] == ['shell']:
+    pass
+else:
+    sys.exit(1)
@@ -0,0 +1,143 @@
+"""artifact_server：Range、If-Range、If-None-Match 与 416"""
+
+import http.client
+import threading
+
+import pytest
+
+import artifact_server
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / 'app-arm64-v8a-release.apk').write_bytes(CONTENT)
+    (tmp_path.parent / 'secret.txt').write_text('secret', encoding='utf-8')
+    server = artifact_server.create_server(tmp_path, '127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(5)
+
+
+def request(server, path: str = '/files/app-arm64-v8a-release.apk', method: str = 'GET', **headers):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    try:
+        connection.request(method, path, headers=headers)
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def etag_of(server) -> str:
+    return request(server, method='HEAD')[1]['ETag']
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-9', (0, 9)),
+    ('bytes=1000-', (1000, 1023)),
+    ('bytes=-24', (1000, 1023)),
+    ('bytes=-5000', (0, 1023)),
+    ('bytes=1000-9999', (1000, 1023)),
+    ('bytes=5-5', (5, 5)),
+    ('bytes=5-3', None),
+    ('bytes=-', None),
+    ('bytes=0-1,5-9', None),
+    ('items=0-9', None),
+])
+def test_parse_range(header, expected):
+    assert artifact_server.parse_range(header, len(CONTENT)) == expected
+
+
+def test_full_download(server):
+    status, headers, body = request(server)
+    assert status == 200
+    assert body == CONTENT
+    assert headers['Accept-Ranges'] == 'bytes'
+    assert headers['ETag'].startswith('"') and headers['ETag'].endswith('"')
+    assert 'Content-Range' not in headers
+
+
+def test_head_has_no_body(server):
+    status, headers, body = request(server, method='HEAD')
+    assert status == 200
+    assert headers['Content-Length'] == str(len(CONTENT))
+    assert body == b''
+
+
+@pytest.mark.parametrize('header, start, end', [
+    ('bytes=0-9', 0, 9),
+    ('bytes=1000-', 1000, 1023),
+    ('bytes=-24', 1000, 1023),
+])
+def test_range(server, header, start, end):
+    status, headers, body = request(server, Range=header)
+    assert status == 206
+    assert headers['Content-Range'] == f'bytes {start}-{end}/{len(CONTENT)}'
+    assert headers['Content-Length'] == str(end - start + 1)
+    assert body == CONTENT[start:end + 1]
+
+
+def test_reversed_range_is_ignored(server):
+    status, headers, body = request(server, Range='bytes=5-3')
+    assert status == 200
+    assert body == CONTENT
+    assert 'Content-Range' not in headers
+
+
+def test_unsatisfiable_range(server):
+    status, headers, body = request(server, Range=f'bytes={len(CONTENT)}-')
+    assert status == 416
+    assert headers['Content-Range'] == f'bytes */{len(CONTENT)}'
+    assert body == b''
+
+
+def test_if_range(server):
+    etag = etag_of(server)
+    status, headers, body = request(server, Range='bytes=0-9', **{'If-Range': etag})
+    assert status == 206
+    assert body == CONTENT[:10]
+
+    # 文件已更新（ETag 不一致）时返回完整内容
+    status, headers, body = request(server, Range='bytes=0-9', **{'If-Range': '"stale"'})
+    assert status == 200
+    assert body == CONTENT
+
+
+@pytest.mark.parametrize('value', ['{etag}', '"other", {etag}', 'W/{etag}', '*'])
+def test_if_none_match_not_modified(server, value):
+    etag = etag_of(server)
+    status, headers, body = request(server, **{'If-None-Match': value.format(etag=etag)})
+    assert status == 304
+    assert headers['ETag'] == etag
+    assert body == b''
+
+
+def test_if_none_match_other_etag(server):
+    status, _, body = request(server, **{'If-None-Match': '"other"'})
+    assert status == 200
+    assert body == CONTENT
+
+
+def test_etag_changes_with_content(server, tmp_path):
+    etag = etag_of(server)
+    updated = CONTENT[::-1] + b'\n'
+    (tmp_path / 'app-arm64-v8a-release.apk').write_bytes(updated)
+    status, headers, body = request(server, **{'If-None-Match': etag})
+    assert status == 200
+    assert headers['ETag'] != etag
+    assert body == updated
+
+
+def test_latest_redirect_and_traversal(server):
+    status, headers, _ = request(server, '/latest/arm64-v8a.apk')
+    assert status == 302
+    assert headers['Location'] == '/files/app-arm64-v8a-release.apk'
+
+    assert request(server, '/latest/x86.apk')[0] == 404
+    assert request(server, '/files/../secret.txt')[0] == 404
+    assert request(server, '/files/%2e%2e/secret.txt')[0] == 404
@@ -0,0 +1,102 @@
+"""bench_startup：模拟的 adb、统计与基线对比"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+import bench_startup
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+@pytest.fixture
+def fake_adb(tmp_path, monkeypatch):
+    if os.name == 'nt':
+        pytest.skip('模拟的 adb 是 shell 脚本')
+    adb = tmp_path / 'adb'
+    adb.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FIXTURES / "fake_adb_startup.py"}" "$@"\n',
+                   encoding='utf-8')
+    adb.chmod(0o755)
+    log = tmp_path / 'adb.log'
+    monkeypatch.setenv('FAKE_ADB_LOG', str(log))
+    monkeypatch.setenv('FAKE_ADB_TIMES', '812,790,845')
+    return str(adb), log
+
+
+def commands(log: Path) -> list[str]:
+    return log.read_text(encoding='utf-8').splitlines()
+
+
+def test_launch_parses_am_start_output(fake_adb):
+    adb, _ = fake_adb
+    assert bench_startup.get_device_model(adb, 'emulator-5554') == 'Pixel 7'
+    assert bench_startup.launch(adb, 'emulator-5554') == {'TotalTime': 812, 'WaitTime': 816}
+
+
+def test_launch_without_total_time_is_none(fake_adb, monkeypatch):
+    adb, _ = fake_adb
+    monkeypatch.setenv('FAKE_ADB_TIMES', '')
+    assert bench_startup.launch(adb, 'emulator-5554') is None
+
+
+def test_cold_runs_force_stop_before_each_launch(fake_adb):
+    adb, log = fake_adb
+    samples = bench_startup.measure(adb, 'emulator-5554', 'cold', 3, settle=0)
+
+    assert [s['TotalTime'] for s in samples] == [812, 790, 845]
+    issued = [c for c in commands(log) if c.startswith(('shell am force-stop', 'shell am start'))]
+    assert issued == ['shell am force-stop com.storeverserepoapp',
+                      'shell am start -W -n com.storeverserepoapp/.MainActivity'] * 3
+
+
+def test_hot_keeps_process_and_returns_home(fake_adb):
+    adb, log = fake_adb
+    samples = bench_startup.measure(adb, 'emulator-5554', 'hot', 2, settle=0)
+
+    # 第一次启动只用于创建进程，不计入样本
+    assert [s['TotalTime'] for s in samples] == [790, 845]
+    issued = commands(log)
+    assert issued.count('shell am force-stop com.storeverserepoapp') == 1
+    assert issued.count('shell input keyevent KEYCODE_HOME') == 2
+
+
+def test_summarize():
+    samples = [{'TotalTime': t, 'WaitTime': t + 4} for t in (700, 800, 900, 1000, 600)]
+    summary = bench_startup.summarize(samples)
+
+    assert summary['runs'] == 5
+    assert summary['TotalTime'] == {'median': 800, 'p90': 1000, 'variance': 20000, 'min': 600, 'max': 1000}
+    assert summary['WaitTime']['median'] == 804
+
+
+def test_compare_uses_model_baseline_and_threshold():
+    baseline = {'Pixel 7': {'cold': {'TotalTime': {'median': 800}}, 'hot': {'TotalTime': {'median': 200}}}}
+    report = {
+        'emulator-5554': {'model': 'Pixel 7', 'modes': {
+            'cold': {'TotalTime': {'median': 900}},
+            'hot': {'TotalTime': {'median': 210}},
+        }},
+        # 没有基线的型号不参与对比
+        'R58M': {'model': 'Galaxy S21', 'modes': {'cold': {'TotalTime': {'median': 5000}}}},
+    }
+    regressions = bench_startup.compare(report, baseline, threshold=10)
+
+    assert regressions == ['Pixel 7 (emulator-5554) cold: 800 ms → 900 ms (+12.5%)']
+
+
+def test_update_baseline_keeps_other_models():
+    baseline = {
+        'Pixel 7': {'cold': {'runs': 10}, 'hot': {'runs': 10}},
+        'Galaxy S21': {'cold': {'runs': 10}},
+    }
+    samples = {'Pixel 7': {'cold': [{'TotalTime': 700}, {'TotalTime': 720}]}}
+    updated = bench_startup.update_baseline(baseline, samples)
+
+    assert updated['Galaxy S21'] == {'cold': {'runs': 10}}
+    assert updated['Pixel 7']['hot'] == {'runs': 10}
+    assert updated['Pixel 7']['cold']['runs'] == 2
+    assert updated['Pixel 7']['cold']['TotalTime']['median'] == 710
+    # 不修改传入的基线
+    assert baseline['Pixel 7']['cold'] == {'runs': 10}
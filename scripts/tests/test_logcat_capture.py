@@ -0,0 +1,119 @@
+"""logcat_capture：录制的 logcat 流与模拟的 adb"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import logcat_capture
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+RECORDED = (FIXTURES / 'logcat-crash.log').read_text(encoding='utf-8').splitlines()
+
+
+def make_capture(tmp_path: Path, pid: str | None = None) -> logcat_capture.LogcatCapture:
+    return logcat_capture.LogcatCapture('emulator-5554', 5000, tmp_path, pid, quiet=True)
+
+
+def test_recorded_stream_filters_app_lines(tmp_path):
+    capture = make_capture(tmp_path)
+    capture.consume(RECORDED)
+
+    # PID 取自 ActivityManager 的进程启动记录
+    assert capture.app_pid == '4321'
+    assert capture.stats == {'lines': len(RECORDED), 'matched': 11, 'crashes': 1}
+    (crash_file,) = capture.crash_files
+    text = crash_file.read_text(encoding='utf-8')
+    assert 'FATAL EXCEPTION: mqt_native_modules' in text
+    assert 'ExceptionsManagerModule.reportException' in text
+    assert 'SurfaceFlinger' not in text and 'chatty' not in text
+
+
+def test_other_process_crash_is_not_ours(tmp_path):
+    capture = make_capture(tmp_path, '4321')
+    capture.consume([
+        '10-19 14:05:01.100  5555  5601 E AndroidRuntime: FATAL EXCEPTION: main',
+        '10-19 14:05:01.100  5555  5601 E AndroidRuntime: Process: com.google.android.gms, PID: 5555',
+        '10-19 14:05:01.300  6001  6001 F libc    : Fatal signal 6 (SIGABRT), code -1 in tid 6001 (surfaceflinger)',
+    ])
+
+    # 关注的 TAG 仍写入缓冲区，但不会触发本应用的崩溃日志
+    assert capture.stats == {'lines': 3, 'matched': 3, 'crashes': 0}
+    assert not capture.crash_files
+
+
+def test_crash_files_in_same_second_are_kept(tmp_path):
+    capture = make_capture(tmp_path, '4321')
+    capture.consume(RECORDED)
+    capture.consume(RECORDED)
+
+    assert capture.stats['crashes'] == 2
+    assert len({path.name for path in capture.crash_files}) == 2
+    assert all(path.exists() for path in capture.crash_files)
+
+
+def test_crash_flushed_after_deadline_without_new_lines(tmp_path, monkeypatch):
+    now = [100.0]
+    capture = make_capture(tmp_path, '4321')
+    monkeypatch.setattr(capture, 'clock', lambda: now[0])
+    for line in RECORDED:
+        capture.feed(line)
+    assert capture.post_crash_remaining and not capture.crash_files
+
+    now[0] += logcat_capture.POST_CRASH_SECONDS - 0.1
+    capture.tick()
+    assert not capture.crash_files
+
+    now[0] += 0.2
+    capture.tick()
+    assert len(capture.crash_files) == 1
+    assert capture.post_crash_remaining == 0
+
+    # 已写入的崩溃不会在结束时重复写入
+    capture.finish()
+    assert len(capture.crash_files) == 1
+
+
+def test_crash_flushed_after_post_crash_lines(tmp_path, monkeypatch):
+    monkeypatch.setattr(logcat_capture, 'POST_CRASH_LINES', 3)
+    capture = make_capture(tmp_path, '4321')
+    for line in RECORDED:
+        capture.feed(line)
+    (crash_file,) = capture.crash_files
+    assert crash_file.read_text(encoding='utf-8').rstrip('\n').endswith('onPress@1:204518')
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='模拟的 adb 是 shell 脚本')
+def test_fake_adb_crash_written_while_device_connected(tmp_path, monkeypatch):
+    adb = tmp_path / 'adb'
+    adb.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FIXTURES / "fake_adb.py"}" "$@"\n', encoding='utf-8')
+    adb.chmod(0o755)
+    monkeypatch.setattr(logcat_capture, 'get_project_root', lambda: tmp_path)
+    monkeypatch.setattr(logcat_capture, 'POST_CRASH_SECONDS', 0.5)
+
+    stop = threading.Event()
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.update(captures=logcat_capture.run_capture(str(adb), quiet=True, stop=stop)),
+    )
+    thread.start()
+    try:
+        # adb 仍在运行（不会再有输出），崩溃日志应按截止时间写入，而不是等到退出
+        deadline = time.monotonic() + 10
+        log_dir = tmp_path / 'output' / 'logs'
+        while time.monotonic() < deadline and not list(log_dir.glob('logcat-crash-*.log')):
+            time.sleep(0.05)
+        assert thread.is_alive()
+        (crash_file,) = log_dir.glob('logcat-crash-emulator-5554-*.log')
+        assert 'FATAL EXCEPTION' in crash_file.read_text(encoding='utf-8')
+    finally:
+        stop.set()
+        thread.join(10)
+
+    assert not thread.is_alive()
+    (capture,) = result['captures']
+    assert capture.stats['crashes'] == 1
+    assert len(capture.crash_files) == 1
@@ -0,0 +1,127 @@
+"""xcodebuild_log 解析器
+
+fixtures/xcodebuild-*-synthetic.log 是按 xcodebuild（-showBuildTimingSummary、clang -ftime-report、
+swiftc -driver-time-compilation）的输出格式手工构造的合成日志，不是录制的真实构建输出；
+只验证解析逻辑，不能证明与各个 Xcode 版本的实际输出兼容
+"""
+
+from pathlib import Path
+
+import pytest
+
+import xcodebuild_log
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+APP_DIR = '/Users/dev/my app/ios'
+
+
+def parse(name: str) -> dict:
+    with open(FIXTURES / name, encoding='utf-8') as f:
+        return xcodebuild_log.parse_lines(f)
+
+
+@pytest.fixture(scope='module')
+def timing():
+    return parse('xcodebuild-timing-synthetic.log')
+
+
+def test_result_and_totals(timing):
+    assert timing['result'] == 'SUCCEEDED'
+    assert timing['timed_files'] == 5
+    assert timing['compile_seconds'] == pytest.approx(17.0)
+    assert timing['pods_compile_seconds'] == pytest.approx(8.5)
+    assert timing['errors'] == []
+
+
+def test_phases_use_build_timing_summary(timing):
+    assert timing['phases'] == {
+        'SwiftDriver': {'tasks': 1, 'seconds': 9.5},
+        'CompileC': {'tasks': 3, 'seconds': 8.5},
+        'PhaseScriptExecution': {'tasks': 1, 'seconds': 3.25},
+        'Ld': {'tasks': 1, 'seconds': 1.125},
+        'SwiftCompile': {'tasks': 1, 'seconds': 0.8},
+    }
+    assert list(timing['phases']) == ['SwiftDriver', 'CompileC', 'PhaseScriptExecution', 'Ld', 'SwiftCompile']
+
+
+def test_phases_without_summary():
+    with open(FIXTURES / 'xcodebuild-timing-synthetic.log', encoding='utf-8') as f:
+        lines = f.read().split('Build Timing Summary')[0].splitlines()
+    phases = xcodebuild_log.parse_lines(lines)['phases']
+    assert phases['CompileC'] == {'tasks': 3, 'seconds': pytest.approx(8.5)}
+    assert phases['SwiftDriver'] == {'tasks': 1, 'seconds': pytest.approx(8.5)}
+    assert phases['PhaseScriptExecution'] == {'tasks': 1, 'seconds': 0.0}
+
+
+def test_targets(timing):
+    pods = {target['target']: target for target in timing['pods']}
+    assert [target['target'] for target in timing['pods']] == ['React-Core', 'Yoga', 'React-Codegen']
+    assert pods['React-Core']['tasks'] == 2
+    assert pods['React-Core']['compile_seconds'] == pytest.approx(6.0)
+    assert pods['Yoga']['compile_seconds'] == pytest.approx(2.5)
+    assert pods['React-Codegen']['compile_seconds'] == 0.0
+
+    (app,) = timing['app_targets']
+    assert app['target'] == 'App'
+    assert app['pod'] is False
+    assert app['tasks'] == 3
+    # Swift driver 的 link 任务不计入编译耗时
+    assert app['compile_seconds'] == pytest.approx(8.5)
+
+
+def test_slowest_files(timing):
+    assert [(entry['file'], entry['target'], entry['seconds']) for entry in timing['slowest_files']] == [
+        (f'{APP_DIR}/App/AppDelegate.swift', 'App', pytest.approx(6.0)),
+        (f'{APP_DIR}/Pods/React-Core/React/Base/RCTBridge.mm', 'React-Core', pytest.approx(4.25)),
+        (f'{APP_DIR}/Pods/Yoga/yoga/Yoga.cpp', 'Yoga', pytest.approx(2.5)),
+        ('App (2 个 Swift 文件)', 'App', pytest.approx(2.5)),
+        (f'{APP_DIR}/Pods/React-Core/React/Modules/RCTUIManager.m', 'React-Core', pytest.approx(1.75)),
+    ]
+
+
+def test_top_limits_lists(timing):
+    with open(FIXTURES / 'xcodebuild-timing-synthetic.log', encoding='utf-8') as f:
+        report = xcodebuild_log.parse_lines(f, top=2)
+    assert len(report['slowest_files']) == 2
+    assert len(report['pods']) == 2
+    assert report['timed_files'] == 5
+
+
+def test_slow_type_checks(timing):
+    assert timing['slow_type_checks'] == [
+        {'file': f'{APP_DIR}/App/AppDelegate.swift', 'line': 88, 'what': "instance method 'layoutSubviews()'",
+         'ms': 512, 'target': 'App'},
+        {'file': f'{APP_DIR}/App/AppDelegate.swift', 'line': 42, 'what': 'expression', 'ms': 350, 'target': 'App'},
+    ]
+
+
+def test_timer_tables_are_suppressed():
+    parser = xcodebuild_log.XcodebuildLogParser()
+    with open(FIXTURES / 'xcodebuild-timing-synthetic.log', encoding='utf-8') as f:
+        hidden = [line for line in f if parser.feed(line)]
+    assert hidden
+    assert all('CompileC' not in line and 'warning:' not in line for line in hidden)
+
+
+def test_target_span_from_timestamps():
+    parser = xcodebuild_log.XcodebuildLogParser()
+    with open(FIXTURES / 'xcodebuild-timing-synthetic.log', encoding='utf-8') as f:
+        for second, line in enumerate(f):
+            parser.feed(line, float(second))
+    report = parser.report()
+    spans = {target['target']: target['span_seconds'] for target in report['pods'] + report['app_targets']}
+    assert spans['React-Core'] > spans['Yoga'] > 0
+    assert spans['App'] > 0
+
+
+def test_failed_build():
+    report = parse('xcodebuild-failed-synthetic.log')
+    assert report['result'] == 'FAILED'
+    assert report['timed_files'] == 0
+    assert report['slowest_files'] == []
+    assert report['errors'] == [
+        f"{APP_DIR}/App/Broken.m:12:5: error: use of undeclared identifier 'bridge'",
+        'error: Signing for "App" requires a development team. Select a development team in the Signing & '
+        "Capabilities editor. (in target 'App' from project 'App')",
+    ]
+    assert 'FAILED' in xcodebuild_log.format_report(report)
@@ -0,0 +1,455 @@
+"""
+脚本共享的工具链与缓存层
+集中管理项目路径、缓存目录、Java 环境与子进程辅助函数，供各构建/启动脚本复用。
+本模块只依赖轻量的标准库，保证 cli.py 分发子命令时的启动开销
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import threading
+import subprocess
+from pathlib import Path
+
+# ============================================================
+# 配置区域 - 可根据需要修改
+# ============================================================
+
+# 强制使用的 Java 路径，设置为 None 则自动查找（优先 PREFERRED_JAVA_VERSION）
+# 示例:
+#   macOS (Homebrew): '/opt/homebrew/opt/openjdk@17'
+#   macOS (Oracle):   '/Library/Java/JavaVirtualMachines/jdk-17.jdk/Contents/Home'
+#   Linux:            '/usr/lib/jvm/java-17-openjdk'
+#   Windows:          'C:\\Program Files\\Java\\jdk-17'
+DEFAULT_JAVA_HOME: str | None = None
+
+# 自动查找 JDK 时优先的主版本，找不到时使用不低于 MIN_JAVA_VERSION 的最低版本
+PREFERRED_JAVA_VERSION = 17
+MIN_JAVA_VERSION = 17
+
+# 多个工作树并行构建时共享的缓存目录（见 build_queue.py）：内容寻址或按 key 区分、与分支无关的缓存，
+# 以及按原生版本保存的热更新发布基准（ota，发布的 APK 与分支无关）；体积基线、增量包基准等按分支区分的缓存不共享
+SHARED_CACHE_ENV = 'BUILD_SHARED_CACHE_DIR'
+SHARED_CACHE_NAMES = ('node_modules', 'assets', 'toolchain', 'metro-cache', 'gradle-cache', 'ota')
+
+# ============================================================
+
+
+def get_project_root() -> Path:
+    """获取项目根目录"""
+    return Path(__file__).resolve().parent.parent
+
+
+def get_cache_dir(name: str) -> Path:
+    """获取项目级缓存目录（跨构建保留，不随 output 清理）
+
+    设置 BUILD_SHARED_CACHE_DIR 时（build_queue.py 的工作树构建），内容与分支无关的缓存放在共享目录中
+    """
+    shared = os.environ.get(SHARED_CACHE_ENV)
+    base = Path(shared) if shared and name in SHARED_CACHE_NAMES else get_project_root() / '.build-cache'
+    cache_dir = base / name
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def get_release_source_dir() -> Path:
+    """build_android.py 输出 Release bundle 与图片资源的 source set
+
+    src/release 只参与 Release 构建类型（包括 <flavor>Release），同一次 Gradle 调用中的 Debug 变体不会打包这些文件
+    """
+    return get_project_root() / 'android' / 'app' / 'src' / 'release'
+
+
+def parse_size(value: str) -> int:
+    """解析 '10GB'、'500MB' 等大小"""
+    value = value.strip().upper()
+    for unit, factor in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024), ('B', 1)):
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * factor)
+    return int(value)
+
+
+def is_java_home(java_home: str | Path) -> bool:
+    """判断路径是否为有效的 JAVA_HOME（包含 bin/java）"""
+    java_path = Path(java_home)
+    return (java_path / 'bin' / 'java').exists() or (java_path / 'bin' / 'java.exe').exists()
+
+
+def java_env(java_home: str | None, base: dict | None = None) -> dict:
+    """返回设置了 JAVA_HOME 且 Java bin 目录位于 PATH 最前面的环境变量副本"""
+    env = dict(base if base is not None else os.environ)
+    if java_home:
+        env['JAVA_HOME'] = str(java_home)
+        env['PATH'] = str(Path(java_home) / 'bin') + os.pathsep + env.get('PATH', '')
+    return env
+
+
+def setup_java_home(java_home: str):
+    """设置当前进程的 JAVA_HOME 环境变量，路径无效时退出"""
+    if not java_home:
+        return
+
+    java_path = Path(java_home)
+    if not java_path.exists():
+        print(f'❌ 指定的 Java 路径不存在: {java_home}')
+        sys.exit(1)
+
+    # 验证是否是有效的 Java 目录
+    if not is_java_home(java_path):
+        print(f'❌ 指定的路径不是有效的 Java 目录: {java_home}')
+        print('   请确保路径指向 JAVA_HOME (包含 bin/java)')
+        sys.exit(1)
+
+    os.environ.update(java_env(str(java_path)))
+    print(f'☕ 使用指定的 Java: {java_home}\n')
+
+
+PROBE_CACHE_VERSION = 1
+_probe_cache: dict | None = None
+_probe_lock = threading.Lock()
+
+
+def _probe_cache_path() -> Path:
+    return get_cache_dir('toolchain') / 'probes.json'
+
+
+def _load_probe_cache() -> dict:
+    """读取版本探测缓存（进程内只读一次）"""
+    global _probe_cache
+    with _probe_lock:
+        if _probe_cache is None:
+            _probe_cache = _read_probe_cache()
+    return _probe_cache
+
+
+def _read_probe_cache() -> dict:
+    path = _probe_cache_path()
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except ValueError:
+            data = {}
+        if data.get('version') == PROBE_CACHE_VERSION:
+            return data['entries']
+    return {}
+
+
+def _save_probe_cache():
+    """写回缓存（并发探测时加锁，先写临时文件再替换）"""
+    path = _probe_cache_path()
+    with _probe_lock:
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_text(json.dumps({'version': PROBE_CACHE_VERSION, 'entries': _probe_cache}, indent=2), encoding='utf-8')
+        os.replace(tmp, path)
+
+
+def probe_key(binary: str, args: list[str]) -> str | None:
+    """缓存 key：解析符号链接后的可执行文件路径 + mtime + 大小 + 参数，升级或替换二进制后自动失效"""
+    real = os.path.realpath(binary)
+    try:
+        st = os.stat(real)
+    except OSError:
+        return None
+    return f'{real}:{st.st_mtime_ns}:{st.st_size}:{" ".join(args)}'
+
+
+def probe_version(cmd: list[str]) -> str | None:
+    """执行版本命令并返回第一行输出（java -version 输出在 stderr），命令不存在时返回 None
+
+    结果按可执行文件缓存在 .build-cache/toolchain/probes.json，二进制未变化时不再启动子进程
+    """
+    binary = shutil.which(cmd[0])
+    if binary is None:
+        return None
+
+    cache = _load_probe_cache()
+    key = probe_key(binary, cmd[1:])
+    if key is not None and key in cache:
+        return cache[key]
+
+    try:
+        result = subprocess.run([binary, *cmd[1:]], capture_output=True, text=True)
+    except OSError:
+        return None
+    output = result.stdout.strip() or result.stderr.strip()
+    version = output.split('\n')[0] if output else ''
+
+    if key is not None and result.returncode == 0:
+        with _probe_lock:
+            cache[key] = version
+        _save_probe_cache()
+    return version
+
+
+# ============================================================
+# 工具链自动查找
+# ============================================================
+
+JAVA_RELEASE_VERSION = re.compile(r'^JAVA_VERSION="([^"]+)"', re.MULTILINE)
+JAVA_VERSION_OUTPUT = re.compile(r'version "([^"]+)"')
+
+
+def parse_java_major(version: str) -> int | None:
+    """'17.0.15' -> 17, '1.8.0_292' -> 8"""
+    match = re.match(r'(\d+)(?:\.(\d+))?', version)
+    if not match:
+        return None
+    major = int(match.group(1))
+    return int(match.group(2) or 0) if major == 1 else major
+
+
+def java_home_candidates() -> list[Path]:
+    """常见的 JDK 安装位置（Linux / macOS），按优先级排列"""
+    home = Path.home()
+    candidates = []
+
+    if os.environ.get('JAVA_HOME'):
+        candidates.append(Path(os.environ['JAVA_HOME']))
+
+    java_on_path = shutil.which('java')
+    if java_on_path:
+        candidates.append(Path(os.path.realpath(java_on_path)).parent.parent)
+
+    patterns = [
+        # macOS
+        (Path('/Library/Java/JavaVirtualMachines'), '*/Contents/Home'),
+        (Path('/opt/homebrew/opt'), 'openjdk*/libexec/openjdk.jdk/Contents/Home'),
+        (Path('/usr/local/opt'), 'openjdk*/libexec/openjdk.jdk/Contents/Home'),
+        (Path('/Applications/Android Studio.app/Contents'), 'jbr/Contents/Home'),
+        # Linux
+        (Path('/usr/lib/jvm'), '*'),
+        (Path('/opt'), 'android-studio/jbr'),
+        # SDKMAN / IntelliJ
+        (home / '.sdkman' / 'candidates' / 'java', '*'),
+        (home / '.jdks', '*'),
+    ]
+    for base, pattern in patterns:
+        if base.exists():
+            candidates.extend(sorted(base.glob(pattern)))
+
+    seen = set()
+    unique = []
+    for candidate in candidates:
+        real = os.path.realpath(candidate)
+        if real not in seen and is_java_home(candidate):
+            seen.add(real)
+            unique.append(Path(real))
+    return unique
+
+
+def java_major_version(java_home: str | Path) -> int | None:
+    """读取 JDK 主版本：优先解析 $JAVA_HOME/release，缺失时探测 java -version（有缓存）"""
+    release = Path(java_home) / 'release'
+    if release.exists():
+        match = JAVA_RELEASE_VERSION.search(release.read_text(encoding='utf-8', errors='replace'))
+        if match:
+            return parse_java_major(match.group(1))
+
+    output = probe_version([str(Path(java_home) / 'bin' / 'java'), '-version'])
+    match = JAVA_VERSION_OUTPUT.search(output or '')
+    return parse_java_major(match.group(1)) if match else None
+
+
+def resolve_java_home(preferred: int = PREFERRED_JAVA_VERSION) -> tuple[str, int] | None:
+    """自动选择 JDK：优先 preferred 主版本，否则选不低于 MIN_JAVA_VERSION 的最低版本"""
+    found = []
+    for candidate in java_home_candidates():
+        major = java_major_version(candidate)
+        if major is not None:
+            found.append((str(candidate), major))
+
+    for java_home, major in found:
+        if major == preferred:
+            return java_home, major
+
+    usable = [item for item in found if item[1] >= MIN_JAVA_VERSION]
+    return min(usable, key=lambda item: item[1]) if usable else None
+
+
+def is_android_sdk(path: str | Path) -> bool:
+    """判断路径是否为 Android SDK 根目录"""
+    sdk = Path(path)
+    return (sdk / 'platform-tools').is_dir() or (sdk / 'platforms').is_dir()
+
+
+def find_android_sdk() -> str | None:
+    """按 ANDROID_HOME、ANDROID_SDK_ROOT、android/local.properties、默认安装位置的顺序查找 Android SDK"""
+    candidates = [os.environ.get('ANDROID_HOME'), os.environ.get('ANDROID_SDK_ROOT')]
+
+    local_properties = get_project_root() / 'android' / 'local.properties'
+    if local_properties.exists():
+        for line in local_properties.read_text(encoding='utf-8').splitlines():
+            if line.startswith('sdk.dir='):
+                candidates.append(line.split('=', 1)[1].strip().replace('\\:', ':').replace('\\\\', '\\'))
+
+    home = Path.home()
+    candidates += [
+        str(home / 'Library' / 'Android' / 'sdk'),
+        str(home / 'Android' / 'Sdk'),
+        '/opt/android-sdk',
+        '/usr/lib/android-sdk',
+    ]
+
+    for candidate in candidates:
+        if candidate and is_android_sdk(candidate):
+            return str(Path(candidate))
+    return None
+
+
+def resolve_java(java_home: str | None = None) -> tuple[str | None, int | None]:
+    """显式指定的 java_home 只读取版本，否则自动查找"""
+    if java_home:
+        return java_home, java_major_version(java_home) if is_java_home(java_home) else None
+    return resolve_java_home() or (None, None)
+
+
+def resolve_toolchain(java_home: str | None = None, android: bool = True) -> dict:
+    """并发查找构建需要的工具链
+
+    返回 {'java_home', 'java_version', 'node', 'yarn', 'npm', 'android_sdk'}，未找到的项为 None。
+    java_home 为显式指定的路径时不再自动查找
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        node = pool.submit(probe_version, ['node', '--version'])
+        yarn = pool.submit(probe_version, ['yarn', '--version'])
+        npm = pool.submit(probe_version, ['npm', '--version'])
+        java = pool.submit(resolve_java, java_home) if android else None
+        sdk = pool.submit(find_android_sdk) if android else None
+
+        toolchain = {
+            'node': node.result(),
+            'yarn': yarn.result(),
+            'npm': None,
+            'java_home': None,
+            'java_version': None,
+            'android_sdk': sdk.result() if sdk else None,
+        }
+        if toolchain['yarn'] is None:
+            toolchain['npm'] = npm.result()
+        if java:
+            toolchain['java_home'], toolchain['java_version'] = java.result()
+
+    return toolchain
+
+
+# ============================================================
+# Android SDK 组件校验
+# ============================================================
+
+GRADLE_SDK_VERSIONS = ('compileSdkVersion', 'buildToolsVersion', 'ndkVersion')
+
+
+def read_gradle_sdk_versions(build_gradle: Path | None = None) -> dict[str, str]:
+    """从 android/build.gradle 的 ext 中读取 compileSdkVersion、buildToolsVersion、ndkVersion"""
+    build_gradle = build_gradle or get_project_root() / 'android' / 'build.gradle'
+    if not build_gradle.exists():
+        return {}
+    content = build_gradle.read_text(encoding='utf-8')
+    versions = {}
+    for name in GRADLE_SDK_VERSIONS:
+        match = re.search(rf'\b{name}\s*=\s*["\']?([\w.-]+)["\']?', content)
+        if match:
+            versions[name] = match.group(1)
+    return versions
+
+
+def read_source_properties(path: Path) -> dict[str, str]:
+    """解析 SDK 组件目录中的 source.properties"""
+    properties = {}
+    source = path / 'source.properties'
+    if source.exists():
+        for line in source.read_text(encoding='utf-8', errors='replace').splitlines():
+            if '=' in line and not line.lstrip().startswith('#'):
+                key, value = line.split('=', 1)
+                properties[key.strip()] = value.strip()
+    return properties
+
+
+def find_sdk_platform(sdk: Path, api_level: str) -> Path | None:
+    """查找 API Level 对应的 platforms 目录（兼容 android-36 与 android-36.1 等命名）"""
+    direct = sdk / 'platforms' / f'android-{api_level}'
+    if read_source_properties(direct).get('AndroidVersion.ApiLevel') == api_level:
+        return direct
+    for platform in sorted((sdk / 'platforms').glob('android-*')):
+        if read_source_properties(platform).get('AndroidVersion.ApiLevel') == api_level:
+            return platform
+    return None
+
+
+def check_sdk_components(sdk: str, versions: dict[str, str]) -> list[str]:
+    """直接读取 source.properties 校验 SDK 组件是否已安装（不启动 sdkmanager），返回错误列表"""
+    sdk_path = Path(sdk)
+    errors = []
+
+    compile_sdk = versions.get('compileSdkVersion')
+    if compile_sdk and find_sdk_platform(sdk_path, compile_sdk) is None:
+        errors.append(f'缺少 SDK Platform {compile_sdk}: sdkmanager "platforms;android-{compile_sdk}"')
+
+    build_tools = versions.get('buildToolsVersion')
+    if build_tools:
+        revision = read_source_properties(sdk_path / 'build-tools' / build_tools).get('Pkg.Revision')
+        if revision != build_tools:
+            errors.append(f'缺少 Build Tools {build_tools}: sdkmanager "build-tools;{build_tools}"')
+
+    ndk = versions.get('ndkVersion')
+    if ndk:
+        revision = read_source_properties(sdk_path / 'ndk' / ndk).get('Pkg.Revision')
+        if revision != ndk:
+            errors.append(f'缺少 NDK {ndk}: sdkmanager "ndk;{ndk}"')
+
+    if not (sdk_path / 'platform-tools' / 'adb').exists() and not (sdk_path / 'platform-tools' / 'adb.exe').exists():
+        errors.append('缺少 platform-tools: sdkmanager "platform-tools"')
+
+    return errors
+
+
+def toolchain_env(toolchain: dict, base: dict | None = None) -> dict:
+    """返回设置了 JAVA_HOME / ANDROID_HOME 的环境变量副本"""
+    env = java_env(toolchain.get('java_home'), base)
+    if toolchain.get('android_sdk'):
+        env['ANDROID_HOME'] = toolchain['android_sdk']
+        env.setdefault('ANDROID_SDK_ROOT', toolchain['android_sdk'])
+    return env
+
+
+def run_step(cmd: list[str], cwd: Path, error: str, env: dict | None = None, label: str | None = None):
+    """执行构建步骤：输出压缩保存到日志、终端只显示进度（见 process_runner.py），失败时输出末尾日志并退出"""
+    import process_runner
+
+    result = process_runner.run_logged(cmd, cwd, label or Path(cmd[0]).name, env=env)
+    if result['code'] != 0:
+        process_runner.print_failure(result)
+        print(f'❌ {error}')
+        sys.exit(1)
+
+
+def get_connected_devices(adb: str = 'adb') -> list[str]:
+    """获取已连接（已授权）的 Android 设备序列号"""
+    result = subprocess.run([adb, 'devices'], capture_output=True, text=True)
+    return [line.split('\t')[0] for line in result.stdout.split('\n') if '\tdevice' in line]
+
+
+def install_dependencies(use_snapshot: bool = True):
+    """安装项目 JS 依赖（优先使用 yarn）
+
+    use_snapshot 时先按 yarn.lock + patches/ 查找 node_modules 快照（见 node_modules_cache.py），
+    命中则直接恢复，未命中则安装后保存快照
+    """
+    print('📦 安装项目依赖...')
+    if use_snapshot:
+        import node_modules_cache
+
+        if node_modules_cache.restore_or_none() is not None:
+            print()
+            return
+
+    cmd = ['yarn', 'install'] if shutil.which('yarn') else ['npm', 'install']
+    run_step(cmd, get_project_root(), '依赖安装失败', label=f'{cmd[0]}-install')
+
+    if use_snapshot:
+        node_modules_cache.save_snapshot()
+    print('  ✅ 依赖安装完成\n')
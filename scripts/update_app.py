@@ -5,16 +5,12 @@ import os
 import re
 import subprocess
 import json
-from pathlib import Path
+
+from toolchain import get_project_root
 
 # 应用名称常量 - 在这里修改应用名称
 APP_NAME = "个人助理"
 
-def get_project_root():
-    """获取项目根目录"""
-    script_path = Path(os.path.dirname(os.path.realpath(__file__)))
-    return script_path.parent
-
 def change_app_name():
     """修改应用名称"""
     project_root = get_project_root()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+xcodebuild 日志分析
+逐行解析 xcodebuild 输出（可边构建边解析，也可分析保存的日志），统计:
+  - 各 target 的编译耗时与活动时间窗（Pods 与应用 target 分开）
+  - 各构建阶段（CompileC、SwiftCompile、PhaseScriptExecution、Ld 等）的耗时（-showBuildTimingSummary）
+  - 单个 Swift / ObjC / C++ 文件的编译耗时（需开启计时编译参数，见 TIMING_BUILD_SETTINGS）
+  - 类型检查过慢的 Swift 函数与表达式
+
+使用方法:
+    python scripts/xcodebuild_log.py LOG [--top N] [--output-dir DIR]
+
+参数:
+    LOG             保存的 xcodebuild 输出（- 表示标准输入）
+    --top           显示最慢的 N 个 target / 文件（默认 20）
+    --output-dir    报告输出目录（默认 output）
+"""
+
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+
+from toolchain import get_project_root
+
+# 输出构建阶段耗时汇总
+TIMING_SUMMARY_ARGS = ['-showBuildTimingSummary']
+
+# 单文件计时：clang 输出 -ftime-report，Swift driver 输出每个编译任务的耗时，并对类型检查超过阈值的函数/表达式给出警告
+SLOW_TYPE_CHECK_MS = 200
+TIMING_BUILD_SETTINGS = [
+    'OTHER_CFLAGS=$(inherited) -ftime-report',
+    'OTHER_SWIFT_FLAGS=$(inherited) -driver-time-compilation'
+    f' -Xfrontend -warn-long-function-bodies={SLOW_TYPE_CHECK_MS}'
+    f' -Xfrontend -warn-long-expression-type-checking={SLOW_TYPE_CHECK_MS}',
+]
+
+SOURCE_EXTENSIONS = ('.swift', '.m', '.mm', '.c', '.cc', '.cpp', '.cxx')
+
+# 任务标题行: CompileC <obj> <src> normal arm64 ... (in target 'React-Core' from project 'Pods')
+TASK_HEADER = re.compile(
+    r"^(?P<kind>[A-Z](?:[A-Za-z]|\\ )+) (?P<args>.*?) ?\(in target '(?P<target>[^']+)'(?: from project '(?P<project>[^']+)')?\)$"
+)
+# -showBuildTimingSummary: CompileC (1234 tasks) | 456.789 seconds
+SUMMARY_LINE = re.compile(r'^(?P<kind>\w+) \((?P<count>\d+) tasks?\) \| (?P<seconds>[\d.]+) seconds$')
+# LLVM 计时表（clang -ftime-report 与 swift -driver-time-compilation 格式相同）
+TIMER_SEPARATOR = re.compile(r'^===-+===$')
+TIMER_TOTAL = re.compile(r'^\s+Total Execution Time: [\d.]+ seconds \((?P<wall>[\d.]+) wall clock\)$')
+TIMER_COLUMNS = re.compile(r'^\s+---User Time---')
+TIMER_ROW = re.compile(r'^\s+(?:[\d.]+ \(\s*[\d.]+%\)\s+)*(?P<wall>[\d.]+) \(\s*[\d.]+%\)\s+(?P<name>\S.*)$')
+# Swift 类型检查警告
+SLOW_TYPE_CHECK = re.compile(
+    r'^(?P<file>\S.*?):(?P<line>\d+):\d+: warning: (?P<what>.+?) took (?P<ms>\d+)ms to type-check'
+)
+RESULT_LINE = re.compile(r'^\*\* (?P<action>[A-Z ]+) (?P<result>SUCCEEDED|FAILED) \*\*')
+ERROR_LINE = re.compile(r'^(?:\S.*?: )?error: ')
+
+SWIFT_FILE = re.compile(r'(?:[^\s{}<=,]|\\ )+\.swift\b')
+MAX_ERRORS = 20
+
+
+def split_args(args: str) -> list[str]:
+    """按未转义的空格拆分任务参数（路径中的空格以 '\\ ' 转义）"""
+    return [part.replace('\\ ', ' ') for part in re.split(r'(?<!\\) ', args) if part]
+
+
+def source_of(args: str) -> str | None:
+    """任务参数中的源文件"""
+    for part in split_args(args):
+        if part.endswith(SOURCE_EXTENSIONS):
+            return part
+    return None
+
+
+class XcodebuildLogParser:
+    """xcodebuild 输出的流式解析器：逐行 feed()，构建结束后 report()"""
+
+    def __init__(self):
+        self.task: dict | None = None
+        self.in_summary = False
+        self.in_timer = False
+        self.title_expected = False
+        self.targets: dict[str, dict] = {}
+        self.files: dict[str, dict] = {}
+        self.phases: dict[str, dict] = {}
+        self.summary: dict[str, dict] = {}
+        self.type_checks: list[dict] = []
+        self.errors: list[str] = []
+        self.result: str | None = None
+
+    def feed(self, line: str, timestamp: float | None = None) -> bool:
+        """解析一行输出；返回 True 表示该行属于计时表，可不回显"""
+        line = line.rstrip('\r\n')
+
+        if self.in_timer:
+            if self.consume_timer(line):
+                return True
+            self.in_timer = False
+
+        header = TASK_HEADER.match(line)
+        if header:
+            self.finish_task()
+            self.start_task(header, timestamp)
+            return False
+
+        if TIMER_SEPARATOR.match(line):
+            self.in_timer = True
+            self.title_expected = True
+            return True
+
+        if line == 'Build Timing Summary':
+            self.finish_task()
+            self.in_summary = True
+            return False
+
+        if self.in_summary:
+            summary = SUMMARY_LINE.match(line)
+            if summary:
+                self.summary[summary.group('kind')] = {
+                    'tasks': int(summary.group('count')),
+                    'seconds': float(summary.group('seconds')),
+                }
+                return False
+
+        result = RESULT_LINE.match(line)
+        if result:
+            self.finish_task()
+            self.result = result.group('result')
+            return False
+
+        slow = SLOW_TYPE_CHECK.match(line)
+        if slow:
+            self.type_checks.append({
+                'file': slow.group('file'),
+                'line': int(slow.group('line')),
+                'what': slow.group('what'),
+                'ms': int(slow.group('ms')),
+                'target': self.task['target'] if self.task else None,
+            })
+        elif ERROR_LINE.match(line) and len(self.errors) < MAX_ERRORS:
+            self.errors.append(line)
+
+        if not line.strip():
+            self.finish_task()
+        elif self.task and timestamp is not None:
+            self.touch(self.task['target'], timestamp)
+        return False
+
+    def consume_timer(self, line: str) -> bool:
+        """处理计时表内的行，返回 False 表示计时表已结束"""
+        if TIMER_SEPARATOR.match(line):
+            self.title_expected = not self.title_expected
+            return True
+        if self.title_expected:
+            return True
+        if not line.strip() or TIMER_COLUMNS.match(line):
+            return True
+        total = TIMER_TOTAL.match(line)
+        if total:
+            if self.task:
+                self.task['seconds'] = max(self.task['seconds'], float(total.group('wall')))
+            return True
+        row = TIMER_ROW.match(line)
+        if row:
+            if self.task:
+                self.task['jobs'].append((row.group('name'), float(row.group('wall'))))
+            return True
+        return False
+
+    def start_task(self, header: re.Match, timestamp: float | None):
+        project = header.group('project') or ''
+        target = header.group('target')
+        self.targets.setdefault(target, {
+            'project': project, 'pod': project == 'Pods', 'tasks': 0, 'compile_seconds': 0.0,
+            'first_seen': None, 'last_seen': None,
+        })['tasks'] += 1
+        kind = header.group('kind').replace('\\ ', ' ')
+        self.phases.setdefault(kind, {'tasks': 0, 'seconds': 0.0})['tasks'] += 1
+        self.task = {
+            'kind': kind, 'target': target, 'source': source_of(header.group('args')),
+            'seconds': 0.0, 'jobs': [],
+        }
+        if timestamp is not None:
+            self.touch(target, timestamp)
+
+    def touch(self, target: str, timestamp: float):
+        entry = self.targets[target]
+        if entry['first_seen'] is None:
+            entry['first_seen'] = timestamp
+        entry['last_seen'] = timestamp
+
+    def add_file(self, path: str, target: str, seconds: float):
+        entry = self.files.setdefault(path, {'target': target, 'seconds': 0.0})
+        entry['seconds'] += seconds
+        self.targets[target]['compile_seconds'] += seconds
+
+    def finish_task(self):
+        """一个任务的输出结束，归集其计时"""
+        task, self.task = self.task, None
+        if not task:
+            return
+        target = task['target']
+
+        # Swift driver 按编译任务列出耗时（Total 行是合计，跳过）
+        swift_jobs = [(name, wall) for name, wall in task['jobs'] if name != 'Total' and '.swift' in name]
+        if swift_jobs:
+            for name, wall in swift_jobs:
+                sources = SWIFT_FILE.findall(name)
+                key = sources[0].replace('\\ ', ' ') if len(sources) == 1 else f'{target} ({len(sources)} 个 Swift 文件)'
+                self.add_file(key, target, wall)
+            seconds = sum(wall for _, wall in swift_jobs)
+        else:
+            seconds = task['seconds']
+            if seconds and task['source']:
+                self.add_file(task['source'], target, seconds)
+            elif seconds:
+                self.targets[target]['compile_seconds'] += seconds
+        self.phases[task['kind']]['seconds'] += seconds
+
+    def report(self, top: int = 20) -> dict:
+        """生成报告数据"""
+        self.finish_task()
+        targets = []
+        for name, entry in self.targets.items():
+            span = (entry['last_seen'] - entry['first_seen']) if entry['first_seen'] is not None else 0.0
+            targets.append({
+                'target': name, 'project': entry['project'], 'pod': entry['pod'], 'tasks': entry['tasks'],
+                'compile_seconds': entry['compile_seconds'], 'span_seconds': span,
+            })
+        targets.sort(key=lambda t: (t['compile_seconds'], t['span_seconds']), reverse=True)
+
+        files = sorted(
+            ({'file': path, **entry} for path, entry in self.files.items()),
+            key=lambda f: f['seconds'], reverse=True,
+        )
+        type_checks = sorted(self.type_checks, key=lambda t: t['ms'], reverse=True)
+        # 有 -showBuildTimingSummary 时以其为准，否则使用按任务累计的耗时
+        phases = self.summary or self.phases
+
+        return {
+            'result': self.result,
+            'timed_files': len(files),
+            'compile_seconds': sum(t['compile_seconds'] for t in targets),
+            'pods_compile_seconds': sum(t['compile_seconds'] for t in targets if t['pod']),
+            'phases': dict(sorted(phases.items(), key=lambda item: item[1]['seconds'], reverse=True)),
+            'pods': [t for t in targets if t['pod']][:top],
+            'app_targets': [t for t in targets if not t['pod']][:top],
+            'slowest_files': files[:top],
+            'slow_type_checks': type_checks[:top],
+            'errors': self.errors,
+        }
+
+
+def parse_lines(lines, top: int = 20) -> dict:
+    """解析保存的日志（没有时间戳，时间窗为 0）"""
+    parser = XcodebuildLogParser()
+    for line in lines:
+        parser.feed(line)
+    return parser.report(top)
+
+
+def format_report(report: dict) -> str:
+    """文本报告"""
+    lines = [f'🍎 xcodebuild: {report["result"] or "未完成"}, 编译耗时累计 {report["compile_seconds"]:.1f}s '
+             f'(Pods {report["pods_compile_seconds"]:.1f}s), 已计时文件 {report["timed_files"]} 个']
+
+    lines.append('\n⏱️ 构建阶段:')
+    for kind, entry in report['phases'].items():
+        lines.append(f'  {kind:<32}{entry["seconds"]:>9.1f}s  {entry["tasks"]:>5} 个任务')
+
+    for title, key in (('📦 最慢的 Pods', 'pods'), ('🎯 应用 target', 'app_targets')):
+        lines.append(f'\n{title} (编译耗时 / 活动时间窗):')
+        for target in report[key]:
+            lines.append(f'  {target["compile_seconds"]:>8.1f}s  {target["span_seconds"]:>8.1f}s  '
+                         f'{target["target"]} ({target["tasks"]} 个任务)')
+
+    if report['slowest_files']:
+        lines.append('\n🐢 最慢的源文件:')
+        for entry in report['slowest_files']:
+            lines.append(f'  {entry["seconds"]:>8.2f}s  [{entry["target"]}] {entry["file"]}')
+    else:
+        lines.append('\n💡 没有单文件耗时，可使用 build_ios.py --compile-timing 开启计时编译参数')
+
+    if report['slow_type_checks']:
+        lines.append(f'\n🔍 类型检查超过 {SLOW_TYPE_CHECK_MS}ms:')
+        for entry in report['slow_type_checks']:
+            lines.append(f'  {entry["ms"]:>6}ms  {entry["file"]}:{entry["line"]}  {entry["what"]}')
+
+    if report['errors']:
+        lines.append('\n❌ 错误:')
+        lines.extend(f'  {error}' for error in report['errors'])
+    return '\n'.join(lines)
+
+
+def write_reports(report: dict, output_dir: Path) -> tuple[Path, Path]:
+    """写出文本与 JSON 报告"""
+    text_path = output_dir / 'xcodebuild-report.txt'
+    json_path = output_dir / 'xcodebuild-report.json'
+    text_path.write_text(format_report(report) + '\n', encoding='utf-8')
+    json_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    return text_path, json_path
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='xcodebuild 日志分析')
+    parser.add_argument('log', help='保存的 xcodebuild 输出（- 表示标准输入）')
+    parser.add_argument('--top', type=int, default=20, help='显示最慢的 N 个 target / 文件')
+    parser.add_argument('--output-dir', type=str, help='报告输出目录')
+    args = parser.parse_args()
+
+    if args.log == '-':
+        report = parse_lines(sys.stdin, args.top)
+    else:
+        with open(args.log, encoding='utf-8', errors='replace') as f:
+            report = parse_lines(f, args.top)
+
+    print(format_report(report))
+    output_dir = Path(args.output_dir) if args.output_dir else get_project_root() / 'output'
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write_reports(report, output_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -20,6 +20,8 @@ export interface IEnvConfig {
   DEBUG: boolean;
   /** 存储前缀 */
   STORAGE_PREFIX: string;
+  /** 开发日志转发地址（如 scripts/log_collector.py 的 ws://localhost:8899/），未配置时为 undefined */
+  LOG_WS_URL?: string;
 }
 
 /**
@@ -32,6 +34,7 @@ export const ENV: IEnvConfig = {
   ENV: (Config.ENV as TEnvType) ?? 'development',
   DEBUG: Config.DEBUG === 'true',
   STORAGE_PREFIX: Config.STORAGE_PREFIX ?? '@MallBrain:',
+  LOG_WS_URL: Config.LOG_WS_URL || undefined,
 };
 
 /**
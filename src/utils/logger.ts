@@ -3,6 +3,8 @@
  * 提供结构化日志记录，支持不同日志级别和输出目标
  */
 
+import { ENV } from '~/common/env';
+
 import { createDevWsLogger } from './devWsLogger';
 
 /** 日志级别 */
@@ -55,7 +57,10 @@ const { metroPort } = { metroPort: 9000 };
 // 仅在开发环境启用的 WebSocket 日志转发地址
 // 这里指向 Metro bundler 的 WebSocket 服务，并复用 metroPort
 // 如需带 query（例如 role=logger），可以在这里自行拼接
-const LOG_WS_URL: string | undefined = __DEV__ ? `ws://localhost:${metroPort}/message` : undefined;
+// 在 .env 中配置 LOG_WS_URL（例如 ws://localhost:8899/）可改为发送到 scripts/log_collector.py
+const LOG_WS_URL: string | undefined = __DEV__
+  ? (ENV.LOG_WS_URL ?? `ws://localhost:${metroPort}/message`)
+  : undefined;
 
 /**
  * 格式化日志条目为字符串